@@ -1,8 +1,9 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     Movie, Genre, ProductionCompany, Person,
-    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew
+    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew, BackgroundJob
 )
 
 
@@ -186,3 +187,42 @@ class MovieCrewAdmin(admin.ModelAdmin):
     search_fields = ['movie__title', 'person__name', 'job', 'department']
     autocomplete_fields = ['movie', 'person']
     ordering = ['movie', 'department', 'job']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    """Admin for BackgroundJob model"""
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at',
+                    'duration_seconds', 'queued_seconds', 'created_at']
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'dedupe_key', 'last_error']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+    ordering = ['-created_at']
+    actions = ['requeue_jobs']
+
+    def requeue_jobs(self, request, queryset):
+        """
+        Give dead jobs a fresh set of attempts. Jobs whose dedupe key is taken
+        by a pending or running job (or by another selected one) are skipped:
+        that job already does the work, and the key is unique among them.
+        """
+        dead = queryset.filter(status='dead').order_by('-finished_at')
+        active_keys = set(BackgroundJob.objects.filter(
+            status__in=['pending', 'running'], dedupe_key__in=dead.exclude(dedupe_key=None).values('dedupe_key')
+        ).values_list('dedupe_key', flat=True))
+        requeue, skipped = [], 0
+        for job_id, dedupe_key in dead.values_list('id', 'dedupe_key'):
+            if dedupe_key in active_keys:
+                skipped += 1
+                continue
+            if dedupe_key:
+                active_keys.add(dedupe_key)
+            requeue.append(job_id)
+        updated = BackgroundJob.objects.filter(id__in=requeue, status='dead').update(
+            status='pending', attempts=0, run_at=timezone.now(), locked_until=None
+        )
+        message = f"Requeued {updated} jobs."
+        if skipped:
+            message += f" Skipped {skipped} already queued under the same dedupe key."
+        self.message_user(request, message)
+    requeue_jobs.short_description = 'Requeue selected dead jobs'
@@ -1,4 +1,34 @@
 from django.apps import AppConfig
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def ensure_movie_search_index(sender, using, **kwargs):
+    """Recreate the FTS index if a migration rebuilt the movies table"""
+    from django.db import connections
+    from .search_index import ensure_search_index
+    ensure_search_index(connections[using])
+
+
+def update_autocomplete_index(sender, instance, **kwargs):
+    """Apply a saved movie to this process's autocomplete index once committed"""
+    from .autocomplete import MOVIE_FIELDS, get_title_index
+    if set(MOVIE_FIELDS) & instance.get_deferred_fields():
+        # Partially loaded; the index's polling picks the row up instead
+        return
+    transaction.on_commit(lambda: get_title_index().update(instance))
+
+
+def remove_from_autocomplete_index(sender, instance, **kwargs):
+    from .autocomplete import get_title_index
+    movie_id = instance.pk
+    transaction.on_commit(lambda: get_title_index().remove(movie_id))
+
+
+def invalidate_search_cache(sender, **kwargs):
+    """Movie, genre or company written (admin or sync): cached search responses and facet counts are outdated"""
+    from .search_cache import bump_catalog_version_on_commit
+    bump_catalog_version_on_commit()
 
 
 class MoviesConfig(AppConfig):
@@ -8,4 +38,9 @@ class MoviesConfig(AppConfig):
     
     def ready(self):
         """Initialize app when Django starts"""
-        pass
+        post_migrate.connect(ensure_movie_search_index, sender=self)
+        post_save.connect(update_autocomplete_index, sender='movies.Movie')
+        post_delete.connect(remove_from_autocomplete_index, sender='movies.Movie')
+        for model in ('movies.Movie', 'movies.Genre', 'movies.ProductionCompany'):
+            post_save.connect(invalidate_search_cache, sender=model)
+            post_delete.connect(invalidate_search_cache, sender=model)
@@ -0,0 +1,317 @@
+"""
+In-process prefix index for title autocomplete.
+Normalized titles (and their word-start suffixes, so "godf" finds "The
+Godfather") are kept in a sorted array; a prefix lookup bisects to the range
+of matching keys and returns the most popular movies in it. Top results of
+prefixes with large ranges are cached until a movie under them changes.
+
+Each process keeps its own copy, built on a background thread on first use
+(lookups are served from the full-text index meanwhile). Saves and deletes made
+by this process are applied once committed (signals); changes made by other
+processes (workers, batch imports) are picked up on a background thread by
+polling rows whose updated_at moved, and deletions by periodically comparing
+ID sets.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Movie
+from .search_index import search_movies
+
+logger = logging.getLogger(__name__)
+
+# Sorts after every character, closing a prefix range
+PREFIX_END = chr(0x10FFFF)
+# Prefixes matching more keys than this get their top results cached
+CACHE_RANGE_THRESHOLD = 512
+# Re-read rows updated this long before the watermark, for slow commits
+REFRESH_OVERLAP = timedelta(seconds=10)
+
+MOVIE_FIELDS = ['id', 'title', 'original_title', 'release_date', 'poster_url', 'popularity_score', 'updated_at']
+
+
+NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace to single spaces"""
+    text = text or ''
+    if not text.isascii():
+        decomposed = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_WORD.sub(' ', text.lower()).strip()
+
+
+def title_keys(title: str, original_title: str = '') -> List[str]:
+    """Index keys of a movie: its normalized titles and their word-start suffixes"""
+    keys = []
+    for text in (title, original_title) if original_title != title else (title,):
+        words = normalize(text).split(' ')
+        for start in range(min(len(words), settings.AUTOCOMPLETE_MAX_KEYS_PER_TITLE)):
+            key = ' '.join(words[start:])
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+class TitleIndex:
+    """Sorted-array prefix index over movie titles, ranked by popularity"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: List[str] = []
+        self._owners: List[str] = []  # movie id of each key
+        self._movies: Dict[str, Tuple] = {}  # id -> (suggestion dict, keys, popularity)
+        self._top_cache: Dict[str, List[str]] = {}
+        self._built = False
+        self._building = False
+        self._refreshing = False
+        # Movies saved or deleted by this process while a refresh queries the database
+        self._touched = None
+        self._watermark = None
+        self._last_refresh = 0.0
+        self._last_reconcile = 0.0
+
+    # Lookups
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """Return up to ``limit`` movies whose title (or a word in it) starts with ``query``"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if not self._built:
+            # Served from the full-text index until the background build finishes
+            self.start_build()
+            return self._suggest_from_database(query, limit)
+        self.refresh_if_stale()
+        with self._lock:
+            ids = self._top_cache.get(prefix)
+            if ids is None or len(ids) < limit:
+                ids = self._top_ids(prefix, max(limit, settings.AUTOCOMPLETE_MAX_LIMIT))
+            return [self._movies[movie_id][0] for movie_id in ids[:limit]]
+
+    def _top_ids(self, prefix: str, limit: int) -> List[str]:
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + PREFIX_END, lo)
+        candidates = set(self._owners[lo:hi])
+        ids = heapq.nlargest(limit, candidates, key=lambda movie_id: self._movies[movie_id][2])
+        if hi - lo > CACHE_RANGE_THRESHOLD:
+            self._top_cache[prefix] = ids
+        return ids
+
+    def _suggest_from_database(self, query: str, limit: int) -> List[Dict]:
+        rows = search_movies(Movie.objects.all(), query).order_by('-popularity_score').values(*MOVIE_FIELDS)
+        return [self._entry(row)[1][0] for row in rows[:limit]]
+
+    # Maintenance
+
+    def start_build(self):
+        """Rebuild the index on a background thread (no-op while one is running)"""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build_in_background, name='autocomplete-build', daemon=True).start()
+
+    def _build_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Autocomplete index build failed: {str(e)}")
+        finally:
+            self._building = False
+            connection.close()
+
+    def rebuild(self):
+        """Load every movie and rebuild the index from scratch"""
+        started = time.perf_counter()
+        movies, pairs, watermark = {}, [], None
+        for row in Movie.objects.order_by().values(*MOVIE_FIELDS).iterator(chunk_size=5000):
+            movie_id, entry = self._entry(row)
+            movies[movie_id] = entry
+            pairs.extend((key, movie_id) for key in entry[1])
+            if watermark is None or row['updated_at'] > watermark:
+                watermark = row['updated_at']
+        pairs.sort()
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._owners = [movie_id for _, movie_id in pairs]
+            self._movies = movies
+            self._top_cache = {}
+            self._watermark = watermark
+            self._built = True
+            self._last_refresh = self._last_reconcile = time.monotonic()
+        # Cache the widest ranges (first keystrokes) up front
+        for prefix in sorted({key[:length] for key, _ in pairs for length in (1, 2)}):
+            with self._lock:
+                self._top_ids(prefix, settings.AUTOCOMPLETE_MAX_LIMIT)
+        logger.info(
+            f"Autocomplete index built: {len(movies)} movies, {len(pairs)} keys "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def refresh_if_stale(self):
+        """Poll for rows other processes changed on a background thread, when due"""
+        now = time.monotonic()
+        if now - self._last_refresh < settings.AUTOCOMPLETE_REFRESH_SECONDS:
+            return
+        with self._lock:
+            if self._refreshing or now - self._last_refresh < settings.AUTOCOMPLETE_REFRESH_SECONDS:
+                return
+            self._refreshing = True
+            self._last_refresh = now
+            # Deletions leave no row behind to poll; compare ID sets now and then
+            reconcile = now - self._last_reconcile >= settings.AUTOCOMPLETE_RECONCILE_SECONDS
+            if reconcile:
+                self._last_reconcile = now
+        threading.Thread(
+            target=self._refresh_in_background, args=(reconcile,), name='autocomplete-refresh', daemon=True
+        ).start()
+
+    def _refresh_in_background(self, reconcile: bool):
+        try:
+            self.refresh(reconcile)
+        except Exception as e:
+            logger.error(f"Autocomplete index refresh failed: {str(e)}")
+        finally:
+            self._refreshing = False
+            connection.close()
+
+    def refresh(self, reconcile: bool = False):
+        """
+        Apply rows other processes changed since the last poll; with
+        ``reconcile``, also drop movies deleted elsewhere and load any the
+        polls missed. The queries and the diff run outside the lock, which is
+        held only to apply them. Movies this process saved or deleted in the
+        meantime keep their newer state.
+        """
+        with self._lock:
+            watermark = self._watermark
+            known = set(self._movies) if reconcile else set()
+            self._touched = set()
+        try:
+            changed = Movie.objects.order_by().values(*MOVIE_FIELDS)
+            if watermark is not None:
+                changed = changed.filter(updated_at__gte=watermark - REFRESH_OVERLAP)
+            rows = list(changed)
+            deleted, missing = set(), set()
+            if reconcile:
+                stored = {str(movie_id) for movie_id in Movie.objects.order_by().values_list('id', flat=True)}
+                deleted = known - stored
+                missing = stored - known - {str(row['id']) for row in rows}
+                rows += Movie.objects.order_by().filter(id__in=missing).values(*MOVIE_FIELDS)
+        except Exception:
+            with self._lock:
+                self._touched = None
+            raise
+
+        with self._lock:
+            touched, self._touched = self._touched, None
+            for movie_id in deleted - touched:
+                self._remove(movie_id)
+            for row in rows:
+                if str(row['id']) not in touched:
+                    self._upsert(row)
+        if deleted or missing:
+            logger.info(f"Autocomplete index reconciled: {len(deleted)} removed, {len(missing)} added")
+
+    def update(self, movie: Movie):
+        """Apply a saved movie (called once its transaction committed)"""
+        if self._built:
+            with self._lock:
+                self._touch(str(movie.id))
+                self._upsert({field: getattr(movie, field) for field in MOVIE_FIELDS})
+
+    def remove(self, movie_id):
+        if self._built:
+            with self._lock:
+                self._touch(str(movie_id))
+                self._remove(str(movie_id))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'built': self._built,
+                'movies': len(self._movies),
+                'keys': len(self._keys),
+                'cached_prefixes': len(self._top_cache),
+            }
+
+    def _entry(self, row: Dict) -> Tuple[str, Tuple]:
+        movie_id = str(row['id'])
+        suggestion = {
+            'id': movie_id,
+            'title': row['title'],
+            'release_year': row['release_date'].year if row['release_date'] else None,
+            'poster_url': row['poster_url'],
+            'popularity_score': row['popularity_score'],
+        }
+        keys = title_keys(row['title'], row['original_title'])
+        return movie_id, (suggestion, keys, row['popularity_score'] or 0.0)
+
+    def _upsert(self, row: Dict):
+        movie_id, entry = self._entry(row)
+        if self._watermark is None or (row['updated_at'] and row['updated_at'] > self._watermark):
+            self._watermark = row['updated_at']
+        current = self._movies.get(movie_id)
+        if current == entry:
+            return
+        if current is not None:
+            self._remove(movie_id)
+        self._movies[movie_id] = entry
+        for key in entry[1]:
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._owners.insert(position, movie_id)
+        self._invalidate(entry[1])
+
+    def _remove(self, movie_id: str):
+        entry = self._movies.pop(movie_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._owners[position] == movie_id:
+                    del self._keys[position]
+                    del self._owners[position]
+                    break
+                position += 1
+        self._invalidate(entry[1])
+
+    def _touch(self, movie_id: str):
+        """Keep a running refresh from overwriting this process's newer change"""
+        if self._touched is not None:
+            self._touched.add(movie_id)
+
+    def _invalidate(self, keys: List[str]):
+        if not self._top_cache:
+            return
+        for key in keys:
+            for length in range(1, len(key) + 1):
+                self._top_cache.pop(key[:length], None)
+
+
+_title_index: Optional[TitleIndex] = None
+_title_index_lock = threading.Lock()
+
+
+def get_title_index() -> TitleIndex:
+    """Return the process-wide title index"""
+    global _title_index
+    if _title_index is None:
+        with _title_index_lock:
+            if _title_index is None:
+                _title_index = TitleIndex()
+    return _title_index
@@ -0,0 +1,272 @@
+"""
+Batch import pipeline for syncing many movies from TMDB.
+IDs are streamed in, already-imported ones are skipped, import plans are fetched
+on a bounded thread (or process) pool and written in batches (one transaction each). Every
+outcome is appended to a checkpoint file so an interrupted run can resume.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import django
+from django.db import close_old_connections
+
+from .import_plan import MovieImportPlan
+from .models import Movie
+
+logger = logging.getLogger(__name__)
+
+STATUS_SYNCED = 'synced'
+STATUS_EXISTS = 'exists'
+STATUS_FAILED = 'failed'
+
+# Outcomes that a resumed run does not need to repeat
+DONE_STATUSES = {STATUS_SYNCED, STATUS_EXISTS}
+
+
+class Checkpoint:
+    """Append-only JSON-lines log of per-ID outcomes"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.completed: Set[int] = set()
+        self._file = None
+        if path:
+            self._load()
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crashed run
+                    continue
+                if record.get('status') in DONE_STATUSES:
+                    self.completed.add(record['tmdb_id'])
+                else:
+                    self.completed.discard(record['tmdb_id'])
+
+    def record(self, outcomes: List[Dict]):
+        """Persist a batch of outcomes; called only after the batch committed"""
+        for outcome in outcomes:
+            if outcome['status'] in DONE_STATUSES:
+                self.completed.add(outcome['tmdb_id'])
+        if self._file is None:
+            return
+        for outcome in outcomes:
+            self._file.write(json.dumps(outcome) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass
+class BatchStats:
+    """Counters and per-movie latencies of a batch run"""
+    counts: Dict[str, int] = field(default_factory=lambda: {
+        STATUS_SYNCED: 0, STATUS_EXISTS: 0, STATUS_FAILED: 0, 'skipped': 0
+    })
+    latencies: List[float] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def processed(self) -> int:
+        return self.counts[STATUS_SYNCED] + self.counts[STATUS_EXISTS] + self.counts[STATUS_FAILED]
+
+    @property
+    def throughput(self) -> float:
+        """Movies synced per second"""
+        return self.counts[STATUS_SYNCED] / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self) -> str:
+        return (
+            f"{self.processed} processed in {self.elapsed:.1f}s: "
+            f"{self.counts[STATUS_SYNCED]} synced, {self.counts[STATUS_EXISTS]} already present, "
+            f"{self.counts[STATUS_FAILED]} failed, {self.counts['skipped']} skipped (checkpoint). "
+            f"Throughput {self.throughput:.2f} movies/s, per-movie latency "
+            f"p50 {self.percentile(50) * 1000:.0f}ms / p95 {self.percentile(95) * 1000:.0f}ms"
+        )
+
+
+# Per-process MovieDataService instances of process pool workers, by priority
+_process_services = {}
+
+
+def _fetch_in_process(tmdb_id: int, priority: str) -> Optional[MovieImportPlan]:
+    """Fetch an import plan inside a pool worker process (plans are picklable)"""
+    from .services import MovieDataService
+    service = _process_services.get(priority)
+    if service is None:
+        service = _process_services[priority] = MovieDataService(priority=priority)
+    return service.fetch_import_plan(tmdb_id, parallel=False)
+
+
+def _chunks(iterable: Iterable[int], size: int) -> Iterator[List[int]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BatchSyncRunner:
+    """Fetch movies in parallel and write them in batches"""
+
+    def __init__(self, movie_service, workers: int = 8, batch_size: int = 50,
+                 max_in_flight: Optional[int] = None, checkpoint: Optional[Checkpoint] = None,
+                 progress: Optional[Callable[[BatchStats], None]] = None,
+                 use_processes: bool = False):
+        self.movie_service = movie_service
+        self.workers = max(1, workers)
+        # Fetch in worker processes instead of threads (JSON decoding is CPU bound);
+        # writes always stay in this process
+        self.use_processes = use_processes
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.progress = progress
+        self.stats = BatchStats()
+
+    def run(self, tmdb_ids: Iterable[int]) -> BatchStats:
+        """Sync every ID from the iterable; returns the run's statistics"""
+        self.stats = BatchStats()
+        pending_writes = {}
+        fetch_started = {}
+        in_flight = {}
+
+        with self._executor() as executor:
+            for chunk in _chunks(self._unique(tmdb_ids), self.batch_size):
+                for tmdb_id in self._filter_new(chunk):
+                    # Bound the number of outstanding fetches (and buffered plans)
+                    while len(in_flight) >= self.max_in_flight:
+                        self._collect(in_flight, pending_writes, fetch_started, block=True)
+                    fetch_started[tmdb_id] = time.perf_counter()
+                    future = self._submit(executor, tmdb_id)
+                    in_flight[future] = tmdb_id
+                    self._collect(in_flight, pending_writes, fetch_started, block=False)
+
+            while in_flight:
+                self._collect(in_flight, pending_writes, fetch_started, block=True)
+            self._flush(pending_writes, fetch_started)
+
+        self.stats.finished_at = time.perf_counter()
+        self.checkpoint.close()
+        return self.stats
+
+    def _unique(self, tmdb_ids: Iterable[int]) -> Iterator[int]:
+        seen = set()
+        for tmdb_id in tmdb_ids:
+            if tmdb_id in seen:
+                continue
+            seen.add(tmdb_id)
+            if tmdb_id in self.checkpoint.completed:
+                self.stats.counts['skipped'] += 1
+                continue
+            yield tmdb_id
+
+    def _filter_new(self, chunk: List[int]) -> List[int]:
+        """Drop IDs already stored locally with one IN query"""
+        existing = set(Movie.objects.filter(tmdb_id__in=chunk).values_list('tmdb_id', flat=True))
+        if existing:
+            outcomes = [{'tmdb_id': tmdb_id, 'status': STATUS_EXISTS} for tmdb_id in chunk if tmdb_id in existing]
+            self.stats.counts[STATUS_EXISTS] += len(outcomes)
+            self.checkpoint.record(outcomes)
+        return [tmdb_id for tmdb_id in chunk if tmdb_id not in existing]
+
+    def _executor(self):
+        if not self.use_processes:
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='tmdb-batch')
+        # Spawned (not forked) workers so no DB connection, session or SQLite handle
+        # is shared with this process; each worker sets Django up on start
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+
+    def _submit(self, executor, tmdb_id: int):
+        if self.use_processes:
+            return executor.submit(_fetch_in_process, tmdb_id, self.movie_service.tmdb_service.priority)
+        return executor.submit(self._fetch, tmdb_id)
+
+    def _fetch(self, tmdb_id: int) -> Optional[MovieImportPlan]:
+        try:
+            # Parallelism comes from the pool, so fetch companies sequentially here
+            return self.movie_service.fetch_import_plan(tmdb_id, parallel=False)
+        finally:
+            close_old_connections()
+
+    def _collect(self, in_flight: Dict, pending_writes: Dict, fetch_started: Dict, block: bool):
+        if not in_flight:
+            return
+        done, _ = wait(list(in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            tmdb_id = in_flight.pop(future)
+            try:
+                plan = future.result()
+            except Exception as e:
+                logger.error(f"Fetching movie {tmdb_id} failed: {e}")
+                plan = None
+            if plan is None:
+                self._finish([{'tmdb_id': tmdb_id, 'status': STATUS_FAILED, 'error': 'fetch failed'}],
+                             fetch_started)
+                continue
+            pending_writes[tmdb_id] = plan
+            if len(pending_writes) >= self.batch_size:
+                self._flush(pending_writes, fetch_started)
+
+    def _flush(self, pending_writes: Dict, fetch_started: Dict):
+        """Write buffered plans in one transaction and checkpoint the outcomes"""
+        if not pending_writes:
+            return
+        movies, errors = self.movie_service.write_import_plans(dict(pending_writes))
+        outcomes = []
+        for tmdb_id in pending_writes:
+            if tmdb_id in movies:
+                outcomes.append({'tmdb_id': tmdb_id, 'status': STATUS_SYNCED})
+            else:
+                outcomes.append({'tmdb_id': tmdb_id, 'status': STATUS_FAILED,
+                                 'error': errors.get(tmdb_id, 'write failed')})
+        pending_writes.clear()
+        self._finish(outcomes, fetch_started)
+
+    def _finish(self, outcomes: List[Dict], fetch_started: Dict):
+        now = time.perf_counter()
+        for outcome in outcomes:
+            started = fetch_started.pop(outcome['tmdb_id'], None)
+            if started is not None:
+                latency = now - started
+                outcome['seconds'] = round(latency, 4)
+                self.stats.latencies.append(latency)
+            self.stats.counts[outcome['status']] += 1
+        self.checkpoint.record(outcomes)
+        if self.progress is not None:
+            self.progress(self.stats)
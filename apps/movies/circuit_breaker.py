@@ -0,0 +1,141 @@
+"""
+Circuit breaker for TMDB calls.
+Tracks a sliding window of recent call outcomes; calls that fail or take longer
+than the slow-call threshold count as bad. When the bad ratio crosses the
+threshold the circuit opens and calls are rejected immediately until the reset
+timeout passes, after which a single trial call decides whether to close again.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker with error-rate and latency thresholds"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float,
+                 slow_call_seconds: float, reset_timeout: float):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._counters = {'rejected': 0, 'opened': 0, 'failures': 0, 'slow_calls': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may proceed; half-open lets one trial call through"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._counters['rejected'] += 1
+            return False
+
+    def release(self):
+        """Give back an admitted call that was not completed, so a half-open circuit admits another trial"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self, duration: float):
+        """Record a completed call; slow calls count against the circuit"""
+        if duration >= self.slow_call_seconds:
+            with self._lock:
+                self._counters['slow_calls'] += 1
+            self._record(bad=True)
+        else:
+            self._record(bad=False)
+
+    def record_failure(self):
+        with self._lock:
+            self._counters['failures'] += 1
+        self._record(bad=True)
+
+    def _record(self, bad: bool):
+        with self._lock:
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                if bad:
+                    self._open()
+                else:
+                    logger.info(f"Circuit '{self.name}' closed after successful trial call")
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                self._trial_in_flight = False
+                return
+
+            self._outcomes.append(bad)
+            if state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self):
+        logger.warning(f"Circuit '{self.name}' opened; rejecting calls for {self.reset_timeout}s")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._counters['opened'] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'recent_calls': len(self._outcomes),
+                'recent_bad_calls': sum(self._outcomes),
+                **self._counters,
+            }
+
+
+_tmdb_breaker = None
+_tmdb_breaker_lock = threading.Lock()
+
+
+def get_tmdb_breaker() -> Optional[CircuitBreaker]:
+    """Return the process-wide TMDB circuit breaker, or None when disabled"""
+    global _tmdb_breaker
+    if not settings.TMDB_BREAKER_ENABLED:
+        return None
+    if _tmdb_breaker is None:
+        with _tmdb_breaker_lock:
+            if _tmdb_breaker is None:
+                _tmdb_breaker = CircuitBreaker(
+                    name='tmdb',
+                    window=settings.TMDB_BREAKER_WINDOW,
+                    min_calls=settings.TMDB_BREAKER_MIN_CALLS,
+                    failure_rate=settings.TMDB_BREAKER_FAILURE_RATE,
+                    slow_call_seconds=settings.TMDB_BREAKER_SLOW_CALL_SECONDS,
+                    reset_timeout=settings.TMDB_BREAKER_RESET_TIMEOUT,
+                )
+    return _tmdb_breaker
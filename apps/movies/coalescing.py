@@ -0,0 +1,127 @@
+"""
+Request coalescing helpers for TMDB fetches and movie syncs.
+SingleFlight collapses concurrent calls for the same key inside one process;
+sync_claim uses a SyncClaim row so only one process at a time works on a key.
+"""
+
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(Exception):
+    """Raised to a follower whose call did not finish within its timeout"""
+    pass
+
+
+class _Call:
+    """An in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``fn`` or wait for the call already running under ``key``.
+        Followers wait at most ``timeout`` seconds (forever when None) and then
+        raise SingleFlightTimeout; the leader's call is not affected.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            if not call.done.wait(None if timeout is None else max(timeout, 0)):
+                raise SingleFlightTimeout(f"Coalesced call {key} did not finish within {timeout:.2f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def _claim_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+@contextmanager
+def sync_claim(key: str, ttl: int):
+    """
+    Claim a key across processes for up to ``ttl`` seconds.
+    Yields True when this caller holds the claim, False when another live
+    owner does. Expired claims left behind by crashed workers are taken over.
+    """
+    from .models import SyncClaim
+
+    owner = _claim_owner()
+    now = timezone.now()
+    claimed = False
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                SyncClaim.objects.create(key=key, owner=owner, expires_at=now + timedelta(seconds=ttl))
+            claimed = True
+            break
+        except IntegrityError:
+            # Drop the claim only if it has expired, then retry once
+            if not SyncClaim.objects.filter(key=key, expires_at__lt=now).delete()[0]:
+                break
+            logger.warning(f"Took over expired sync claim: {key}")
+
+    try:
+        yield claimed
+    finally:
+        if claimed:
+            SyncClaim.objects.filter(key=key, owner=owner).delete()
+
+
+def is_claimed(key: str) -> bool:
+    """Return whether a live claim exists for the key"""
+    from .models import SyncClaim
+
+    return SyncClaim.objects.filter(key=key, expires_at__gte=timezone.now()).exists()
+
+
+# Process-wide coalescers
+tmdb_requests = SingleFlight()
+movie_syncs = SingleFlight()
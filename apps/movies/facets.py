@@ -0,0 +1,118 @@
+"""
+Facet counts for the movie list (?facets=genre,year,decade,status,company).
+Counts cover the current filtered set in one pass per table: status and
+release year come from one grouped query over movies (decades are summed from
+the years), genres and companies from one grouped query over their link
+table each. Counts of the unfiltered catalog are computed for every facet at
+once and cached under the catalog version, so movie writes invalidate them in
+every process (see search_cache).
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, QuerySet
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import ExtractYear
+
+from .coalescing import SingleFlight
+from .models import Movie, MovieGenre, MovieProductionCompany
+from .search_cache import catalog_version
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('genre', 'year', 'decade', 'status', 'company')
+
+# Concurrent cache misses of the catalog counts compute them once
+catalog_facet_counts = SingleFlight()
+
+
+def parse_facets(value: str) -> List[str]:
+    """Facet names of a ?facets= value ('all' or a comma-separated list); raises ValueError on unknown names"""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    if names == ['all']:
+        return list(FACETS)
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ValueError(f"Unknown facets: {', '.join(unknown)}. Choose from: {', '.join(FACETS)}.")
+    return [name for name in FACETS if name in names]
+
+
+def get_facets(queryset: QuerySet, names: List[str]) -> Dict[str, List[Dict]]:
+    """Facet counts of a filtered Movie queryset (cached when it is the whole catalog)"""
+    if not queryset.query.has_filters():
+        return catalog_facets(names)
+    return compute_facets(queryset, names)
+
+
+def catalog_facets(names: List[str]) -> Dict[str, List[Dict]]:
+    """Facet counts of the whole catalog, computed for every facet once per catalog version"""
+    key = f"movies:facets:{catalog_version()}"
+    facets = caches[settings.FACET_CACHE_ALIAS].get(key)
+    if facets is None:
+        facets = catalog_facet_counts.do(key, lambda: _compute_catalog_facets(key))
+    return {name: facets[name] for name in names}
+
+
+def _compute_catalog_facets(key: str) -> Dict[str, List[Dict]]:
+    facets = compute_facets(None, list(FACETS))
+    caches[settings.FACET_CACHE_ALIAS].set(key, facets, settings.FACET_CACHE_TTL)
+    logger.info(f"Computed catalog facet counts ({key})")
+    return facets
+
+
+def compute_facets(queryset, names: List[str]) -> Dict[str, List[Dict]]:
+    """Count movies per facet value; ``queryset`` None counts the whole catalog"""
+    if queryset is None:
+        movies = Movie.objects.all()
+        genre_links = MovieGenre.objects.all()
+        company_links = MovieProductionCompany.objects.all()
+    else:
+        # Raw, so the subquery keeps the "movies" name that full-text search SQL refers to
+        ids = RawSQL(*queryset.order_by().values('pk').query.sql_with_params())
+        movies = Movie.objects.filter(pk__in=ids)
+        genre_links = MovieGenre.objects.filter(movie_id__in=ids)
+        company_links = MovieProductionCompany.objects.filter(movie_id__in=ids)
+
+    facets = {}
+    if {'status', 'year', 'decade'} & set(names):
+        statuses, years, decades = Counter(), Counter(), Counter()
+        rows = movies.order_by().values('status', year=ExtractYear('release_date')).annotate(count=Count('pk'))
+        for row in rows:
+            statuses[row['status']] += row['count']
+            if row['year']:
+                years[row['year']] += row['count']
+                decades[row['year'] // 10 * 10] += row['count']
+        labels = dict(Movie.STATUS_CHOICES)
+        if 'status' in names:
+            facets['status'] = [
+                {'value': value, 'label': labels.get(value, value), 'count': count}
+                for value, count in statuses.most_common()
+            ]
+        if 'year' in names:
+            facets['year'] = [{'value': value, 'count': count} for value, count in sorted(years.items(), reverse=True)]
+        if 'decade' in names:
+            facets['decade'] = [
+                {'value': value, 'count': count} for value, count in sorted(decades.items(), reverse=True)
+            ]
+
+    if 'genre' in names:
+        rows = genre_links.values('genre_id', 'genre__name').annotate(count=Count('movie_id')).order_by(
+            '-count', 'genre__name'
+        )
+        facets['genre'] = [
+            {'id': str(row['genre_id']), 'name': row['genre__name'], 'count': row['count']} for row in rows
+        ]
+
+    if 'company' in names:
+        rows = company_links.values('company_id', 'company__name').annotate(count=Count('movie_id')).order_by(
+            '-count', 'company__name'
+        )[:settings.FACET_TOP_COMPANIES]
+        facets['company'] = [
+            {'id': str(row['company_id']), 'name': row['company__name'], 'count': row['count']} for row in rows
+        ]
+
+    return {name: facets[name] for name in names}
@@ -1,6 +1,8 @@
 import django_filters
 from django.db.models import Q
+from rest_framework.filters import OrderingFilter, SearchFilter
 from .models import Movie, Genre, ProductionCompany, Person
+from .search_index import search_movies
 
 
 class MovieFilter(django_filters.FilterSet):
@@ -57,14 +59,9 @@ class MovieFilter(django_filters.FilterSet):
         }
 
     def filter_search(self, queryset, name, value):
-        """Search across multiple fields"""
+        """Full-text search across title, original title, overview and tagline"""
         if value:
-            return queryset.filter(
-                Q(title__icontains=value) |
-                Q(original_title__icontains=value) |
-                Q(overview__icontains=value) |
-                Q(tagline__icontains=value)
-            ).distinct()
+            return search_movies(queryset, value)
         return queryset
 
     def filter_genre(self, queryset, name, value):
@@ -86,6 +83,25 @@ class MovieFilter(django_filters.FilterSet):
         return queryset
 
 
+class MovieSearchFilter(SearchFilter):
+    """?search= backed by the movies full-text index instead of icontains scans"""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+        return search_movies(queryset, terms)
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """Keeps relevance order for searches unless ?ordering= is given"""
+
+    def get_default_ordering(self, view):
+        if view.request.query_params.get(SearchFilter.search_param):
+            return None
+        return super().get_default_ordering(view)
+
+
 class GenreFilter(django_filters.FilterSet):
     """Filter for Genre model"""
     search = django_filters.CharFilter(method='filter_search')
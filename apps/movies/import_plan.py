@@ -0,0 +1,37 @@
+"""
+In-memory import plan for one movie.
+The fetch phase turns a TMDB payload into a MovieImportPlan without touching
+the database, so the write phase only has to apply it inside a short
+transaction (no HTTP calls or payload parsing while the write lock is held).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Tuple
+
+
+@dataclass
+class MovieImportPlan:
+    """Rows to write for one movie, keyed the way the write phase resolves them"""
+    tmdb_id: int
+    # Movie column values (see MovieDataService.MOVIE_SYNC_FIELDS)
+    movie: Dict[str, Any]
+    # Referenced rows: lookup key -> field values used if the row has to be created
+    genres: Dict[str, Dict] = field(default_factory=dict)
+    companies: Dict[str, Dict] = field(default_factory=dict)
+    people: Dict[int, Dict] = field(default_factory=dict)
+    # Links: person TMDB ID (and job for crew) -> extra through-table columns
+    cast: Dict[int, Dict] = field(default_factory=dict)
+    crew: Dict[Tuple[int, str], Dict] = field(default_factory=dict)
+
+    @property
+    def title(self) -> str:
+        return self.movie.get('title', '')
+
+
+def merge_rows(plans: Iterable[MovieImportPlan], attribute: str) -> Dict:
+    """Union one kind of referenced rows across plans (first definition wins)"""
+    rows = {}
+    for plan in plans:
+        for key, values in getattr(plan, attribute).items():
+            rows.setdefault(key, values)
+    return rows
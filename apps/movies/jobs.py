@@ -0,0 +1,262 @@
+"""
+Database-backed background job queue.
+Jobs are rows in BackgroundJob. Workers claim one at a time with
+SELECT ... FOR UPDATE SKIP LOCKED where the database supports it, or with a
+compare-and-set UPDATE on SQLite (whose writers are serialized anyway), and
+hold it under a lease so a crashed worker's job is picked up again. Failures
+are retried with jittered exponential backoff; jobs that run out of attempts
+are kept with status 'dead' for inspection.
+"""
+
+import importlib
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_DEAD = 'dead'
+
+# Modules whose @job functions are registered on first lookup
+HANDLER_MODULES = ['apps.movies.tasks']
+
+# Tries of enqueue when it keeps losing dedupe races
+ENQUEUE_ATTEMPTS = 3
+
+
+class PermanentJobError(Exception):
+    """Raised by a job that must not be retried"""
+    pass
+
+
+_handlers: Dict[str, Dict] = {}
+_handlers_loaded = False
+
+
+def job(name: str, lease_seconds: Optional[int] = None):
+    """Register a function as the handler of a named job"""
+    def decorator(fn: Callable) -> Callable:
+        _handlers[name] = {'fn': fn, 'lease_seconds': lease_seconds}
+        return fn
+    return decorator
+
+
+def get_handler(name: str) -> Optional[Dict]:
+    global _handlers_loaded
+    if not _handlers_loaded:
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+        _handlers_loaded = True
+    return _handlers.get(name)
+
+
+def enqueue(name: str, payload: Optional[Dict] = None, delay: float = 0, priority: int = 0,
+            max_attempts: Optional[int] = None, dedupe_key: Optional[str] = None) -> BackgroundJob:
+    """
+    Queue a job; with a dedupe_key, an already queued or running job with the
+    same key is returned instead of adding another. A pending one is promoted
+    to this call's payload and priority when they are higher.
+    """
+    if get_handler(name) is None:
+        raise ValueError(f"Unknown job '{name}'")
+    for attempt in range(ENQUEUE_ATTEMPTS):
+        if dedupe_key:
+            existing = BackgroundJob.objects.filter(
+                dedupe_key=dedupe_key, status__in=[STATUS_PENDING, STATUS_RUNNING]
+            ).first()
+            if existing:
+                return _promote(existing, payload, priority)
+
+        try:
+            with transaction.atomic():
+                return BackgroundJob.objects.create(
+                    name=name,
+                    payload=payload or {},
+                    priority=priority,
+                    dedupe_key=dedupe_key or None,
+                    max_attempts=max_attempts or settings.JOB_QUEUE_MAX_ATTEMPTS,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                )
+        except IntegrityError:
+            # Lost a race with another enqueue of the same key; that job may
+            # already have finished by the time we look it up, so start over
+            if not dedupe_key or attempt == ENQUEUE_ATTEMPTS - 1:
+                raise
+
+
+def _promote(job: BackgroundJob, payload: Optional[Dict], priority: int) -> BackgroundJob:
+    """Give a pending duplicate the payload and priority of a higher priority enqueue"""
+    if job.status != STATUS_PENDING or priority <= job.priority:
+        return job
+    promoted = BackgroundJob.objects.filter(pk=job.pk, status=STATUS_PENDING).update(
+        payload=payload or {}, priority=priority
+    )
+    if promoted:
+        logger.info(f"Promoted queued job {job.name} {job.id} to priority {priority}")
+        job.refresh_from_db()
+    return job
+
+
+def _lease_seconds(name: str) -> int:
+    handler = get_handler(name)
+    return (handler and handler['lease_seconds']) or settings.JOB_QUEUE_LEASE_SECONDS
+
+
+def claim_job(worker_id: str) -> Optional[BackgroundJob]:
+    """Claim the next due job (or one whose lease expired) for this worker"""
+    now = timezone.now()
+    available = BackgroundJob.objects.filter(
+        Q(status=STATUS_PENDING, run_at__lte=now) |
+        Q(status=STATUS_RUNNING, locked_until__lt=now)
+    ).order_by('-priority', 'run_at')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = available.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status = STATUS_RUNNING
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=_lease_seconds(job.name))
+            job.attempts += 1
+            job.started_at = now
+            job.save(update_fields=['status', 'locked_by', 'locked_until', 'attempts', 'started_at'])
+            return job
+
+    # Compare-and-set on (status, attempts): only one worker's UPDATE matches
+    for job in available[:settings.JOB_QUEUE_CLAIM_CANDIDATES]:
+        claimed = BackgroundJob.objects.filter(
+            pk=job.pk, status=job.status, attempts=job.attempts
+        ).update(
+            status=STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=_lease_seconds(job.name)),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_job(job: BackgroundJob) -> bool:
+    """Run a claimed job and record its outcome; returns whether it succeeded"""
+    owned = BackgroundJob.objects.filter(pk=job.pk, locked_by=job.locked_by, attempts=job.attempts)
+    queued_from = job.run_at if job.attempts > 1 else job.created_at
+    queued_seconds = max(0.0, (job.started_at - queued_from).total_seconds())
+
+    handler = get_handler(job.name)
+    duration = None
+    if handler is None:
+        error, retry = f"Unknown job '{job.name}'", False
+    elif job.attempts > job.max_attempts:
+        # Reclaimed after its lease expired on the final attempt
+        error, retry = 'Lease expired on the final attempt', False
+    else:
+        started = time.perf_counter()
+        try:
+            result = handler['fn'](**job.payload)
+        except Exception as e:
+            duration = time.perf_counter() - started
+            error = f"{e.__class__.__name__}: {e}\n{traceback.format_exc(limit=5)}"
+            retry = not isinstance(e, PermanentJobError)
+        else:
+            duration = time.perf_counter() - started
+            owned.update(
+                status=STATUS_SUCCEEDED, result=result, last_error='',
+                locked_until=None, finished_at=timezone.now(),
+                queued_seconds=queued_seconds, duration_seconds=duration,
+            )
+            logger.info(
+                f"Job {job.name} {job.id} succeeded in {duration * 1000:.0f}ms "
+                f"(queued {queued_seconds:.2f}s, attempt {job.attempts})"
+            )
+            return True
+
+    fields = {
+        'last_error': error[:10000], 'locked_until': None, 'finished_at': timezone.now(),
+        'queued_seconds': queued_seconds, 'duration_seconds': duration,
+    }
+    if retry and job.attempts < job.max_attempts:
+        delay = retry_delay(job.attempts)
+        owned.update(status=STATUS_PENDING, run_at=timezone.now() + timedelta(seconds=delay), **fields)
+        logger.warning(
+            f"Job {job.name} {job.id} failed (attempt {job.attempts}/{job.max_attempts}), "
+            f"retrying in {delay:.1f}s: {error.splitlines()[0]}"
+        )
+    else:
+        owned.update(status=STATUS_DEAD, **fields)
+        logger.error(f"Job {job.name} {job.id} is dead after {job.attempts} attempts: {error.splitlines()[0]}")
+    return False
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter so retries do not move in lockstep"""
+    delay = min(
+        settings.JOB_QUEUE_RETRY_BACKOFF_MAX,
+        settings.JOB_QUEUE_RETRY_BACKOFF * 2 ** (attempts - 1)
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+def make_worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class Worker:
+    """Claims and runs jobs until stopped (or, in burst mode, until the queue is empty)"""
+
+    def __init__(self, worker_id: str, poll_interval: Optional[float] = None,
+                 burst: bool = False, stop_event: Optional[threading.Event] = None):
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval or settings.JOB_QUEUE_POLL_INTERVAL
+        self.burst = burst
+        self.stop_event = stop_event or threading.Event()
+        self.processed = 0
+
+    def run(self):
+        logger.info(f"Job worker {self.worker_id} started")
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    job = claim_job(self.worker_id)
+                except Exception as e:
+                    # e.g. "database is locked" under heavy write load
+                    logger.warning(f"Job worker {self.worker_id} could not claim a job: {e}")
+                    job = None
+                if job is None:
+                    if self.burst:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                run_job(job)
+                self.processed += 1
+                close_old_connections()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_old_connections()
+        logger.info(f"Job worker {self.worker_id} stopped after {self.processed} jobs")
+        return self.processed
+
+
+def run_worker(index: int, poll_interval: Optional[float] = None, burst: bool = False) -> int:
+    """Process-pool entry point; Django is set up by the pool initializer"""
+    return Worker(make_worker_id(index), poll_interval=poll_interval, burst=burst).run()
@@ -0,0 +1,189 @@
+"""
+Compare read/write throughput of the stock sqlite3 backend and the tuned
+profile configured in settings.DATABASES['default'].
+Each profile gets a fresh database file seeded with the same rows, then
+reader and writer threads run request-sized units of work for a fixed time;
+connections are released after each unit the way Django does at the end of a
+request, so CONN_MAX_AGE is part of what is measured.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+
+STOCK_PROFILE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark SQLite throughput with stock settings and with the tuned backend profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Rows seeded per database')
+        parser.add_argument('--readers', type=int, default=8, help='Reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Writer threads')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration per profile')
+        parser.add_argument(
+            '--profiles', default='stock,tuned',
+            help='Comma-separated profiles to run (stock, tuned)'
+        )
+
+    def handle(self, *args, **options):
+        default = settings.DATABASES[DEFAULT_DB_ALIAS]
+        profiles = {
+            'stock': STOCK_PROFILE,
+            'tuned': {
+                'ENGINE': default['ENGINE'],
+                'CONN_MAX_AGE': default.get('CONN_MAX_AGE', 0),
+                'CONN_HEALTH_CHECKS': default.get('CONN_HEALTH_CHECKS', False),
+                'OPTIONS': default.get('OPTIONS', {}),
+            },
+        }
+        names = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = set(names) - set(profiles)
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(
+            f"{options['rows']} rows, {options['readers']} readers, {options['writers']} writers, "
+            f"{options['seconds']}s per profile"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            results = {}
+            for name in names:
+                alias = f"benchmark_{name}"
+                self._register(alias, {**profiles[name], 'NAME': os.path.join(directory, f"{name}.sqlite3")})
+                try:
+                    self._seed(alias, options['rows'])
+                    results[name] = self._run(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+        self.stdout.write(
+            f"{'profile':<8} {'reads/s':>10} {'writes/s':>10} {'read p95':>10} {'write p95':>10} {'locked':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<8} {result['reads_per_second']:>10.0f} {result['writes_per_second']:>10.0f} "
+                f"{result['read_p95_ms']:>8.1f}ms {result['write_p95_ms']:>8.1f}ms {result['locked']:>8}"
+            )
+        if 'stock' in results and 'tuned' in results:
+            stock, tuned = results['stock'], results['tuned']
+            self.stdout.write(self.style.SUCCESS(
+                f"tuned vs stock: reads x{tuned['reads_per_second'] / max(stock['reads_per_second'], 1):.2f}, "
+                f"writes x{tuned['writes_per_second'] / max(stock['writes_per_second'], 1):.2f}"
+            ))
+
+    def _register(self, alias, config):
+        configured = connections.configure_settings({
+            DEFAULT_DB_ALIAS: settings.DATABASES[DEFAULT_DB_ALIAS], alias: config
+        })
+        connections.settings[alias] = configured[alias]
+
+    def _seed(self, alias, rows):
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE benchmark_movies ('
+                'id INTEGER PRIMARY KEY, title TEXT NOT NULL, overview TEXT NOT NULL, '
+                'popularity REAL NOT NULL, vote_count INTEGER NOT NULL)'
+            )
+            cursor.execute('CREATE INDEX benchmark_movies_popularity ON benchmark_movies (popularity)')
+            cursor.executemany(
+                'INSERT INTO benchmark_movies (id, title, overview, popularity, vote_count) VALUES (%s, %s, %s, %s, %s)',
+                [
+                    (i, f"Movie {i}", 'An overview sentence. ' * 20, random.random() * 100, random.randint(0, 5000))
+                    for i in range(1, rows + 1)
+                ]
+            )
+        connections[alias].close()
+
+    def _run(self, alias, options):
+        rows = options['rows']
+        deadline = time.monotonic() + options['seconds']
+        lock = threading.Lock()
+        read_times, write_times = [], []
+        locked = [0]
+
+        def read_unit(cursor):
+            cursor.execute('SELECT title, popularity FROM benchmark_movies WHERE id = %s', [random.randint(1, rows)])
+            cursor.fetchone()
+            low = random.random() * 90
+            cursor.execute(
+                'SELECT id, title FROM benchmark_movies WHERE popularity BETWEEN %s AND %s '
+                'ORDER BY popularity DESC LIMIT 20', [low, low + 1]
+            )
+            cursor.fetchall()
+
+        def write_unit(cursor):
+            movie_id = random.randint(1, rows)
+            cursor.execute('SELECT vote_count FROM benchmark_movies WHERE id = %s', [movie_id])
+            vote_count = cursor.fetchone()[0]
+            cursor.execute(
+                'UPDATE benchmark_movies SET vote_count = %s, popularity = %s WHERE id = %s',
+                [vote_count + 1, random.random() * 100, movie_id]
+            )
+
+        def worker(unit, times, in_transaction):
+            connection = connections[alias]
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        if in_transaction:
+                            with transaction.atomic(using=alias), connection.cursor() as cursor:
+                                unit(cursor)
+                        else:
+                            with connection.cursor() as cursor:
+                                unit(cursor)
+                    except OperationalError:
+                        # "database is locked"
+                        with lock:
+                            locked[0] += 1
+                        continue
+                    finally:
+                        # End of "request"
+                        connection.close_if_unusable_or_obsolete()
+                    with lock:
+                        times.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(read_unit, read_times, False))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=(write_unit, write_times, True))
+            for _ in range(options['writers'])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        return {
+            'reads_per_second': len(read_times) / elapsed,
+            'writes_per_second': len(write_times) / elapsed,
+            'read_p95_ms': self._p95(read_times) * 1000,
+            'write_p95_ms': self._p95(write_times) * 1000,
+            'locked': locked[0],
+        }
+
+    @staticmethod
+    def _p95(times):
+        if len(times) < 2:
+            return times[0] if times else 0.0
+        return statistics.quantiles(times, n=20)[-1]
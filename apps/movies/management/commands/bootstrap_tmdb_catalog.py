@@ -0,0 +1,91 @@
+import gzip
+import json
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.movies.batch import BatchSyncRunner, Checkpoint
+from apps.movies.ratelimit import PRIORITY_BATCH
+from apps.movies.services import MovieDataService
+
+
+def iter_export_ids(path, min_popularity=0.0, include_adult=False, include_video=False):
+    """Stream movie IDs from a TMDB daily ID export (gzipped JSON lines)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as export:
+        for line in export:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not include_adult and record.get('adult'):
+                continue
+            if not include_video and record.get('video'):
+                continue
+            if (record.get('popularity') or 0) < min_popularity:
+                continue
+            if record.get('id'):
+                yield int(record['id'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Bootstrap the movie catalog from a TMDB daily ID export '
+        '(e.g. movie_ids_MM_DD_YYYY.json.gz), fetching in parallel and '
+        'writing in batches. Progress is checkpointed so a crashed run can resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('export_path', help='Path to the gzipped JSON-lines export file')
+        parser.add_argument('--min-popularity', type=float, default=1.0,
+                            help='Skip movies below this popularity (default: 1.0)')
+        parser.add_argument('--include-adult', action='store_true')
+        parser.add_argument('--include-video', action='store_true')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after this many IDs pass the filters')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Movies written per transaction')
+        parser.add_argument('--checkpoint', default=None,
+                            help='Checkpoint file (default: <export_path>.checkpoint.jsonl)')
+
+    def handle(self, *args, **options):
+        export_path = options['export_path']
+        try:
+            open(export_path, 'rb').close()
+        except OSError as e:
+            raise CommandError(f"Cannot read export file: {e}")
+
+        ids = iter_export_ids(
+            export_path,
+            min_popularity=options['min_popularity'],
+            include_adult=options['include_adult'],
+            include_video=options['include_video'],
+        )
+        if options['limit']:
+            ids = islice(ids, options['limit'])
+
+        checkpoint = Checkpoint(options['checkpoint'] or f"{export_path}.checkpoint.jsonl")
+        if checkpoint.completed:
+            self.stdout.write(f"Resuming: {len(checkpoint.completed)} IDs already done")
+
+        last_report = [time.monotonic()]
+
+        def progress(stats):
+            if time.monotonic() - last_report[0] >= 5:
+                last_report[0] = time.monotonic()
+                self.stdout.write(stats.summary())
+
+        runner = BatchSyncRunner(
+            MovieDataService(priority=PRIORITY_BATCH),
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint,
+            progress=progress,
+        )
+        stats = runner.run(ids)
+        self.stdout.write(self.style.SUCCESS(f"Bootstrap finished. {stats.summary()}"))
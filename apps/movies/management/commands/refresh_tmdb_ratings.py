@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.movies.models import SyncState
+from apps.movies.ratelimit import PRIORITY_BATCH
+from apps.movies.services import MovieDataService
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh popularity and vote counts of local movies that changed on TMDB '
+        'since the last run, using the /movie/changes feed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Movies looked up and updated per batch')
+        parser.add_argument('--reset', action='store_true',
+                            help='Forget the stored watermark and start from the initial lookback')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            SyncState.objects.filter(key=MovieDataService.CHANGES_STATE_KEY).delete()
+
+        stats = MovieDataService(priority=PRIORITY_BATCH).update_movie_ratings(
+            batch_size=options['batch_size']
+        )
+        if stats is None:
+            raise CommandError('Could not read the TMDB changes feed; watermark left unchanged')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ratings refreshed: {stats['updated']} updated of {stats['local']} local movies "
+            f"({stats['changed']} changed on TMDB, {stats['failed']} failed and queued for retry)"
+        ))
@@ -0,0 +1,72 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from apps.movies.jobs import Worker, make_worker_id, run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background job workers for the database-backed job queue. '
+        'Workers poll for due jobs until interrupted (or, with --burst, until '
+        'the queue is empty).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Run workers as threads of this process or as separate processes')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds an idle worker waits before polling again')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        self.stdout.write(f"Starting {workers} {options['pool']} workers")
+        if options['pool'] == 'process':
+            processed = self._run_processes(workers, options['poll_interval'], options['burst'])
+        else:
+            processed = self._run_threads(workers, options['poll_interval'], options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped after {processed} jobs"))
+
+    def _run_threads(self, workers, poll_interval, burst):
+        stop_event = threading.Event()
+        pool = [
+            Worker(make_worker_id(index), poll_interval=poll_interval, burst=burst, stop_event=stop_event)
+            for index in range(workers)
+        ]
+        threads = [
+            threading.Thread(target=worker.run, name=f"job-worker-{index}", daemon=True)
+            for index, worker in enumerate(pool)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers after their current job...')
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+        return sum(worker.processed for worker in pool)
+
+    def _run_processes(self, workers, poll_interval, burst):
+        # Spawned workers share nothing with this process; each sets Django up itself
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as executor:
+            futures = [executor.submit(run_worker, index, poll_interval, burst) for index in range(workers)]
+            try:
+                return sum(future.result() for future in futures)
+            except KeyboardInterrupt:
+                # Children received the interrupt too and stop on their own
+                self.stdout.write('Stopping workers...')
+                return sum(future.result() for future in futures if future.done() and not future.exception())
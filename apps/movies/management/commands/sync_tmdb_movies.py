@@ -0,0 +1,80 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.movies.batch import BatchSyncRunner, Checkpoint
+from apps.movies.ratelimit import PRIORITY_BATCH
+from apps.movies.services import MovieDataService
+
+
+def iter_ids(stream):
+    """Yield TMDB IDs from lines of whitespace/comma separated values; '#' starts a comment"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.split('#', 1)[0]
+        for token in line.replace(',', ' ').split():
+            try:
+                yield int(token)
+            except ValueError:
+                raise CommandError(f"Line {line_number}: '{token}' is not a TMDB ID")
+
+
+class Command(BaseCommand):
+    help = (
+        'Sync a list of TMDB movie IDs read from a file (or stdin), fetching in '
+        'parallel and writing in batches. With --checkpoint, a rerun skips IDs '
+        'that were already synced.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids_file', nargs='?', default='-',
+                            help="File with one or more IDs per line ('-' or omitted: stdin)")
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Run fetches on a thread pool or a process pool (default: thread)')
+        parser.add_argument('--max-in-flight', type=int, default=None,
+                            help='Most fetches outstanding at once (default: 2 x workers)')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Movies written per transaction')
+        parser.add_argument('--checkpoint', default=None,
+                            help='Checkpoint file (default: <ids_file>.checkpoint.jsonl, none for stdin)')
+
+    def handle(self, *args, **options):
+        ids_file = options['ids_file']
+        checkpoint_path = options['checkpoint']
+        if ids_file == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(ids_file, encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f"Cannot read IDs file: {e}")
+            checkpoint_path = checkpoint_path or f"{ids_file}.checkpoint.jsonl"
+
+        checkpoint = Checkpoint(checkpoint_path)
+        if checkpoint.completed:
+            self.stdout.write(f"Resuming: {len(checkpoint.completed)} IDs already done")
+
+        last_report = [time.monotonic()]
+
+        def progress(stats):
+            if time.monotonic() - last_report[0] >= 5:
+                last_report[0] = time.monotonic()
+                self.stdout.write(stats.summary())
+
+        runner = BatchSyncRunner(
+            MovieDataService(priority=PRIORITY_BATCH),
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            max_in_flight=options['max_in_flight'],
+            checkpoint=checkpoint,
+            progress=progress,
+            use_processes=options['pool'] == 'process',
+        )
+        try:
+            stats = runner.run(iter_ids(stream))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Sync finished. {stats.summary()}"))
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.movies.tmdb_standin import make_server
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local TMDB stand-in server that serves recorded fixtures for '
+        'movie/{id}, search/movie, company/{id} and genre/movie/list. '
+        'Point TMDB_BASE_URL at http://HOST:PORT/3 to use it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--fixtures', default=str(settings.TMDB_FIXTURE_DIR),
+            help='Directory of recorded fixtures (default: TMDB_FIXTURE_DIR)'
+        )
+        parser.add_argument(
+            '--latency-ms', type=float, default=0.0,
+            help='Mean latency injected into every response'
+        )
+        parser.add_argument(
+            '--jitter-ms', type=float, default=0.0,
+            help='Standard deviation of the injected latency'
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0.0,
+            help='Fraction of requests answered with 429/503 (0-1)'
+        )
+        parser.add_argument(
+            '--synthesize', action='store_true',
+            help='Generate deterministic payloads for requests without a fixture'
+        )
+
+    def handle(self, *args, **options):
+        server = make_server(
+            host=options['host'],
+            port=options['port'],
+            fixture_dir=options['fixtures'],
+            latency=options['latency_ms'] / 1000.0,
+            latency_jitter=options['jitter_ms'] / 1000.0,
+            error_rate=options['error_rate'],
+            synthesize_missing=options['synthesize'],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(
+            f"TMDB stand-in listening on http://{host}:{port}/3 "
+            f"(fixtures: {options['fixtures']}, latency: {options['latency_ms']}ms, "
+            f"error rate: {options['error_rate']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served {server.requests_served} requests")
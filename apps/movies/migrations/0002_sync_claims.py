@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:05
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncClaim',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('owner', models.CharField(max_length=200)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'sync_claims',
+                'indexes': [models.Index(fields=['expires_at'], name='sync_claims_expires_ea2c5f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:17
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_sync_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('dead', 'Dead')], default='pending', max_length=20)),
+                ('priority', models.IntegerField(default=0, help_text='Higher runs first')),
+                ('dedupe_key', models.CharField(blank=True, max_length=200, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=5)),
+                ('run_at', models.DateTimeField(help_text='Not claimed before this time')),
+                ('locked_by', models.CharField(blank=True, max_length=200)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('queued_seconds', models.FloatField(blank=True, help_text='Wait before the last attempt started', null=True)),
+                ('duration_seconds', models.FloatField(blank=True, help_text='Run time of the last attempt', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'background_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='background__status_773b2f_idx'), models.Index(fields=['name'], name='background__name_e86dfc_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('dedupe_key',), name='unique_active_job_dedupe_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# Schema as of this migration; search_index.py may evolve independently
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        title, original_title, overview, tagline,
+        content='movies',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts(rowid, title, original_title, overview, tagline)
+        VALUES (new.rowid, new.title, new.original_title, new.overview, new.tagline);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, original_title, overview, tagline)
+        VALUES ('delete', old.rowid, old.title, old.original_title, old.overview, old.tagline);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update
+    AFTER UPDATE OF title, original_title, overview, tagline ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, original_title, overview, tagline)
+        VALUES ('delete', old.rowid, old.title, old.original_title, old.overview, old.tagline);
+        INSERT INTO movies_fts(rowid, title, original_title, overview, tagline)
+        VALUES (new.rowid, new.title, new.original_title, new.overview, new.tagline);
+    END
+    """,
+    "INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS movies_fts_insert",
+    "DROP TRIGGER IF EXISTS movies_fts_delete",
+    "DROP TRIGGER IF EXISTS movies_fts_update",
+    "DROP TABLE IF EXISTS movies_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_background_jobs'),
+    ]
+
+    operations = [
+        # SQLite FTS5 index over movies (no-op on other databases)
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
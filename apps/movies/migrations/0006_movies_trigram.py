@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Schema as of this migration; search_index.py may evolve independently
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_trigram USING fts5(
+        title, original_title,
+        content='movies',
+        content_rowid='rowid',
+        tokenize='trigram'
+    )
+    """,
+    # Per-trigram document counts, to query only a title's rarest trigrams
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_trigram_vocab USING fts5vocab(movies_trigram, 'row')",
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_trigram_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_trigram(rowid, title, original_title)
+        VALUES (new.rowid, new.title, new.original_title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_trigram_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_trigram(movies_trigram, rowid, title, original_title)
+        VALUES ('delete', old.rowid, old.title, old.original_title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_trigram_update
+    AFTER UPDATE OF title, original_title ON movies BEGIN
+        INSERT INTO movies_trigram(movies_trigram, rowid, title, original_title)
+        VALUES ('delete', old.rowid, old.title, old.original_title);
+        INSERT INTO movies_trigram(rowid, title, original_title)
+        VALUES (new.rowid, new.title, new.original_title);
+    END
+    """,
+    "INSERT INTO movies_trigram(movies_trigram) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS movies_trigram_insert",
+    "DROP TRIGGER IF EXISTS movies_trigram_delete",
+    "DROP TRIGGER IF EXISTS movies_trigram_update",
+    "DROP TABLE IF EXISTS movies_trigram_vocab",
+    "DROP TABLE IF EXISTS movies_trigram",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_movies_fts'),
+    ]
+
+    operations = [
+        # SQLite FTS5 trigram index over movie titles (no-op on other databases)
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def create_catalog_version(apps, schema_editor):
+    # Touched on every movie write to invalidate cached search responses
+    SyncState = apps.get_model('movies', 'SyncState')
+    SyncState.objects.get_or_create(key='catalog_version')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_movies_trigram'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
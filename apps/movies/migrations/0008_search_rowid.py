@@ -0,0 +1,126 @@
+from django.db import migrations
+
+# Schema as of this migration; search_index.py may evolve independently.
+# The FTS indexes were keyed by the implicit rowid of `movies`, which VACUUM
+# renumbers (the table has a UUID primary key); key them by an explicit
+# integer column instead. The column is not a model field, so Django never
+# writes it back from a stale instance.
+INDEXES = {
+    'movies_fts': ['title', 'original_title', 'overview', 'tagline'],
+    'movies_trigram': ['title', 'original_title'],
+}
+
+
+def drop_index_sql():
+    statements = []
+    for table in INDEXES:
+        statements += [f"DROP TRIGGER IF EXISTS {table}_{event}" for event in ('insert', 'delete', 'update')]
+    return statements + [
+        "DROP TABLE IF EXISTS movies_trigram_vocab",
+        "DROP TABLE IF EXISTS movies_trigram",
+        "DROP TABLE IF EXISTS movies_fts",
+    ]
+
+
+def create_tables_sql(key):
+    return [
+        f"""
+        CREATE VIRTUAL TABLE movies_fts USING fts5(
+            title, original_title, overview, tagline,
+            content='movies',
+            content_rowid='{key}',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        f"""
+        CREATE VIRTUAL TABLE movies_trigram USING fts5(
+            title, original_title,
+            content='movies',
+            content_rowid='{key}',
+            tokenize='trigram'
+        )
+        """,
+        "CREATE VIRTUAL TABLE movies_trigram_vocab USING fts5vocab(movies_trigram, 'row')",
+    ]
+
+
+def triggers_sql(table, key):
+    columns = INDEXES[table]
+    names = ', '.join(columns)
+    new_values = ', '.join(f"new.{column}" for column in columns)
+    old_values = ', '.join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {table}(rowid, {names}) SELECT new.{key}, {new_values} WHERE new.{key} IS NOT NULL;"
+    delete = (
+        f"INSERT INTO {table}({table}, rowid, {names}) "
+        f"SELECT 'delete', old.{key}, {old_values} WHERE old.{key} IS NOT NULL;"
+    )
+    if key == 'rowid':
+        on_insert = f"CREATE TRIGGER {table}_insert AFTER INSERT ON movies BEGIN {insert} END"
+    else:
+        # Rows are indexed once movies_search_rowid_assign has given them a key
+        on_insert = f"CREATE TRIGGER {table}_insert AFTER UPDATE OF {key} ON movies BEGIN {delete} {insert} END"
+    return [
+        on_insert,
+        f"CREATE TRIGGER {table}_delete AFTER DELETE ON movies BEGIN {delete} END",
+        f"CREATE TRIGGER {table}_update AFTER UPDATE OF {names} ON movies BEGIN {delete} {insert} END",
+    ]
+
+
+def rebuild_sql():
+    return [f"INSERT INTO {table}({table}) VALUES ('rebuild')" for table in INDEXES]
+
+
+FORWARD_SQL = drop_index_sql() + [
+    # ensure_search_index() may have added the key already (post_migrate of a partial migrate)
+    "UPDATE movies SET search_rowid = rowid + (SELECT COALESCE(MAX(search_rowid), 0) FROM movies) "
+    "WHERE search_rowid IS NULL",
+    "CREATE UNIQUE INDEX IF NOT EXISTS movies_search_rowid ON movies(search_rowid)",
+    # Every inserted movie gets the next key
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_search_rowid_assign AFTER INSERT ON movies WHEN new.search_rowid IS NULL BEGIN
+        UPDATE movies SET search_rowid = (SELECT COALESCE(MAX(search_rowid), 0) + 1 FROM movies)
+        WHERE id = new.id;
+    END
+    """,
+    *create_tables_sql('search_rowid'),
+    *triggers_sql('movies_fts', 'search_rowid'),
+    *triggers_sql('movies_trigram', 'search_rowid'),
+    *rebuild_sql(),
+]
+
+REVERSE_SQL = drop_index_sql() + [
+    "DROP TRIGGER IF EXISTS movies_search_rowid_assign",
+    "DROP INDEX IF EXISTS movies_search_rowid",
+    "ALTER TABLE movies DROP COLUMN search_rowid",
+    *create_tables_sql('rowid'),
+    *triggers_sql('movies_fts', 'rowid'),
+    *triggers_sql('movies_trigram', 'rowid'),
+    *rebuild_sql(),
+]
+
+
+def run(statements, add_key=False):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            if add_key:
+                cursor.execute("SELECT 1 FROM pragma_table_info('movies') WHERE name = 'search_rowid'")
+                if cursor.fetchone() is None:
+                    cursor.execute("ALTER TABLE movies ADD COLUMN search_rowid INTEGER")
+            for sql in statements:
+                cursor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_catalog_version'),
+    ]
+
+    operations = [
+        # Key the SQLite FTS5 indexes by movies.search_rowid (no-op on other databases)
+        migrations.RunPython(run(FORWARD_SQL, add_key=True), run(REVERSE_SQL)),
+    ]
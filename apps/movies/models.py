@@ -278,3 +278,83 @@ class MovieCrew(models.Model):
 
     def __str__(self):
         return f"{self.person.name} - {self.job} on {self.movie.title}"
+
+
+class SyncClaim(models.Model):
+    """Cross-process claim so only one worker syncs a given key at a time"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=200)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sync_claims'
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.owner})"
+
+
+class SyncState(models.Model):
+    """Named bookmark (e.g. a changes-feed watermark) kept between sync runs"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.CharField(max_length=100, unique=True)
+    value = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sync_state'
+
+    def __str__(self):
+        return self.key
+
+
+class BackgroundJob(models.Model):
+    """Unit of work in the database-backed job queue (see apps.movies.jobs)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('dead', 'Dead'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    priority = models.IntegerField(default=0, help_text="Higher runs first")
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(help_text="Not claimed before this time")
+    locked_by = models.CharField(max_length=200, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    queued_seconds = models.FloatField(null=True, blank=True, help_text="Wait before the last attempt started")
+    duration_seconds = models.FloatField(null=True, blank=True, help_text="Run time of the last attempt")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'background_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+            models.Index(fields=['name']),
+        ]
+        constraints = [
+            # At most one queued or running job per dedupe key
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_job_dedupe_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
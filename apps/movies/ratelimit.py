@@ -0,0 +1,204 @@
+"""
+Host-wide token bucket rate limiter for TMDB calls.
+The bucket state lives in a small SQLite file so every worker process on the
+host draws from the same budget. Callers queue briefly up to a per-priority
+deadline and then fail fast; higher priority callers are served first because
+lower priorities must leave a reserve of tokens and yield to active waiters.
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 'high'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_LOW = 'low'
+PRIORITY_BATCH = 'batch'
+
+PRIORITY_RANKS = {
+    PRIORITY_HIGH: 0,
+    PRIORITY_NORMAL: 1,
+    PRIORITY_LOW: 2,
+    PRIORITY_BATCH: 3,
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token could not be acquired before the caller's deadline"""
+    pass
+
+
+class SharedTokenBucket:
+    """Token bucket shared by all processes through a SQLite file"""
+
+    # Longest single sleep while queued, so waiters notice freed capacity quickly
+    poll_interval = 0.05
+
+    def __init__(self, path: str, rate: float, burst: int,
+                 max_wait: Dict[str, float], reserve: Dict[str, float], name: str = 'tmdb'):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.name = name
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'acquired': 0, 'rejected': 0, 'waited_seconds': 0.0}
+        self._initialize()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the bucket file"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS waiters ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, '
+            'rank INTEGER NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'INSERT OR IGNORE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+            (self.name, float(self.burst), time.time())
+        )
+
+    def acquire(self, priority: str = PRIORITY_NORMAL, max_wait: Optional[float] = None):
+        """Take one token, waiting up to the priority's deadline before raising"""
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS[PRIORITY_NORMAL])
+        reserve = self.reserve.get(priority, 0)
+        if max_wait is None:
+            max_wait = self.max_wait.get(priority, 0)
+
+        started = time.time()
+        deadline = started + max_wait
+        waiter_id = None
+        try:
+            while True:
+                acquired, wait, waiter_id = self._try_acquire(rank, reserve, deadline, waiter_id)
+                now = time.time()
+                if acquired:
+                    self._record('acquired', now - started)
+                    return
+                if now >= deadline:
+                    self._record('rejected', now - started)
+                    raise RateLimitExceeded(
+                        f"TMDB rate limit: no token within {max_wait:.2f}s for {priority} priority"
+                    )
+                time.sleep(max(0.001, min(wait, self.poll_interval, deadline - now)))
+        finally:
+            if waiter_id is not None:
+                self._remove_waiter(waiter_id)
+
+    def _try_acquire(self, rank: int, reserve: float, deadline: float, waiter_id: Optional[int]):
+        """Refill and try to take a token in one write transaction"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, updated_at = conn.execute(
+                'SELECT tokens, updated_at FROM buckets WHERE name = ?', (self.name,)
+            ).fetchone()
+            tokens = min(float(self.burst), tokens + max(0.0, now - updated_at) * self.rate)
+
+            # Yield to higher priority callers that are currently queued
+            higher_waiting = conn.execute(
+                'SELECT COUNT(*) FROM waiters WHERE name = ? AND rank < ? AND expires_at > ?',
+                (self.name, rank, now)
+            ).fetchone()[0]
+
+            if not higher_waiting and tokens - 1 >= reserve:
+                conn.execute(
+                    'UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?',
+                    (tokens - 1, now, self.name)
+                )
+                if waiter_id is not None:
+                    conn.execute('DELETE FROM waiters WHERE id = ?', (waiter_id,))
+                conn.execute('COMMIT')
+                return True, 0.0, None
+
+            conn.execute(
+                'UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?',
+                (tokens, now, self.name)
+            )
+            if waiter_id is None:
+                waiter_id = conn.execute(
+                    'INSERT INTO waiters (name, rank, expires_at) VALUES (?, ?, ?)',
+                    (self.name, rank, deadline)
+                ).lastrowid
+                # Expired rows are left behind by crashed processes
+                conn.execute('DELETE FROM waiters WHERE expires_at < ?', (now - 60,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        wait = max(0.0, (reserve + 1 - tokens) / self.rate) if self.rate > 0 else self.poll_interval
+        return False, wait, waiter_id
+
+    def _remove_waiter(self, waiter_id: int):
+        try:
+            self._connection().execute('DELETE FROM waiters WHERE id = ?', (waiter_id,))
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to remove rate limit waiter: {e}")
+
+    def _record(self, outcome: str, waited: float):
+        with self._stats_lock:
+            self._stats[outcome] += 1
+            self._stats['waited_seconds'] += waited
+
+    def stats(self) -> Dict:
+        """Return this process's acquire/reject counters"""
+        with self._stats_lock:
+            return {
+                **self._stats,
+                'waited_seconds': round(self._stats['waited_seconds'], 3),
+                'rate': self.rate,
+                'burst': self.burst,
+            }
+
+
+_default_bucket = None
+_default_bucket_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[SharedTokenBucket]:
+    """Return the process-wide TMDB rate limiter, or None when disabled"""
+    global _default_bucket
+    if not settings.TMDB_RATE_LIMIT_ENABLED:
+        return None
+    if _default_bucket is None:
+        with _default_bucket_lock:
+            if _default_bucket is None:
+                _default_bucket = SharedTokenBucket(
+                    path=settings.TMDB_RATE_LIMIT_PATH or os.path.join(
+                        tempfile.gettempdir(), 'movieexplained_tmdb_ratelimit.sqlite3'
+                    ),
+                    rate=settings.TMDB_RATE_LIMIT_PER_SECOND,
+                    burst=settings.TMDB_RATE_LIMIT_BURST,
+                    max_wait=settings.TMDB_RATE_LIMIT_MAX_WAIT,
+                    reserve=settings.TMDB_RATE_LIMIT_RESERVE,
+                )
+    return _default_bucket
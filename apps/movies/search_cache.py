@@ -0,0 +1,103 @@
+"""
+Cache of movie search responses.
+Entries are keyed by the normalized query, the search options and a catalog
+version. The version is the timestamp of a SyncState row that is touched
+whenever synced or admin writes change movies, so every process (web, job
+workers, batch imports) invalidates the same entries without deleting keys;
+outdated entries simply age out. Responses without any result are cached
+with a shorter TTL, so repeated no-result queries stop reaching TMDB without
+hiding movies for long once they exist there.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .autocomplete import normalize
+from .models import SyncState
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'catalog_version'
+
+
+def catalog_version() -> str:
+    """Current catalog version (changes whenever movies are written)"""
+    updated_at = SyncState.objects.filter(key=CATALOG_VERSION_KEY).values_list('updated_at', flat=True).first()
+    return str(updated_at.timestamp()) if updated_at else '0'
+
+
+def bump_catalog_version():
+    """Invalidate cached search responses in every process"""
+    if not SyncState.objects.filter(key=CATALOG_VERSION_KEY).update(updated_at=timezone.now()):
+        SyncState.objects.get_or_create(key=CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version_on_commit():
+    """Bump once the current transaction commits (immediately outside one)"""
+    transaction.on_commit(bump_catalog_version)
+
+
+class SearchResponseCache:
+    """Versioned cache of serialized search responses in a Django cache alias"""
+
+    def __init__(self, alias: str, ttl: int, negative_ttl: int):
+        self.alias = alias
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'negative_stores': 0}
+
+    def build_key(self, query: str, **options) -> str:
+        """Key of a search: catalog version, normalized query and options"""
+        parts = [normalize(query)] + [f"{name}={options[name]}" for name in sorted(options)]
+        digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        return f"movies:search:{catalog_version()}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        data = caches[self.alias].get(key)
+        self._count('hits' if data is not None else 'misses')
+        return data
+
+    def set(self, key: str, data: Dict, negative: bool = False):
+        """Store a response; ``negative`` (no results anywhere) uses the shorter TTL"""
+        caches[self.alias].set(key, data, self.negative_ttl if negative else self.ttl)
+        self._count('negative_stores' if negative else 'stores')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'hit_rate': round(self._counters['hits'] / lookups, 3) if lookups else 0.0,
+            }
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchResponseCache]:
+    """Return the process-wide search cache, or None when disabled"""
+    global _search_cache
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchResponseCache(
+                    alias=settings.SEARCH_CACHE_ALIAS,
+                    ttl=settings.SEARCH_CACHE_TTL,
+                    negative_ttl=settings.SEARCH_CACHE_NEGATIVE_TTL,
+                )
+    return _search_cache
@@ -0,0 +1,302 @@
+"""
+Full-text and fuzzy search over movies with SQLite FTS5.
+`movies_fts` is an external-content FTS5 table over the title, original title,
+overview and tagline columns of `movies`, kept in sync by triggers. Queries are
+ranked with BM25 (title matches weigh most). `movies_trigram` indexes titles
+with the trigram tokenizer for typo-tolerant lookups scored by trigram
+similarity. On other databases search falls back to icontains (and fuzzy
+lookups find nothing).
+
+Both indexes are keyed by `movies.search_rowid`, an integer column owned by
+this module rather than the model: the implicit rowid of a table with a UUID
+primary key is renumbered by VACUUM, and Django would write a model field back
+from stale instances. A trigger gives every inserted movie the next key.
+Table rebuilds done by SQLite ALTERs in migrations drop the column and the
+triggers; ensure_search_index() runs after every migrate to restore them and
+reindex, and `manage.py rebuild_search_index` reindexes on demand.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, QuerySet
+
+from .models import Movie
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'movies_fts'
+FTS_COLUMNS = ['title', 'original_title', 'overview', 'tagline']
+# BM25 column weights, in FTS_COLUMNS order
+FTS_WEIGHTS = [10.0, 5.0, 1.0, 2.0]
+# Terms beyond this are ignored
+MAX_QUERY_TERMS = 8
+
+# Trigram index over titles for typo-tolerant lookups
+TRIGRAM_TABLE = 'movies_trigram'
+TRIGRAM_COLUMNS = ['title', 'original_title']
+
+INDEXES = {
+    FTS_TABLE: {
+        'columns': FTS_COLUMNS,
+        'options': "tokenize='unicode61 remove_diacritics 2', prefix='2 3'",
+    },
+    TRIGRAM_TABLE: {
+        'columns': TRIGRAM_COLUMNS,
+        'options': "tokenize='trigram'",
+        # Per-trigram document counts, to query only a title's rarest trigrams
+        'vocabulary': f"{TRIGRAM_TABLE}_vocab",
+    },
+}
+
+
+# Stable integer key of movies in the indexes (see module docstring)
+KEY_COLUMN = 'search_rowid'
+KEY_INDEX = 'movies_search_rowid'
+KEY_TRIGGER = 'movies_search_rowid_assign'
+
+KEY_TRIGGER_SQL = f"""
+    CREATE TRIGGER IF NOT EXISTS {KEY_TRIGGER} AFTER INSERT ON movies WHEN new.{KEY_COLUMN} IS NULL BEGIN
+        UPDATE movies SET {KEY_COLUMN} = (SELECT COALESCE(MAX({KEY_COLUMN}), 0) + 1 FROM movies)
+        WHERE id = new.id;
+    END
+"""
+
+
+def _create_table_sql(table: str) -> str:
+    index = INDEXES[table]
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{', '.join(index['columns'])}, content='movies', content_rowid='{KEY_COLUMN}', {index['options']})"
+    )
+
+
+def _triggers_sql(table: str) -> Dict[str, str]:
+    """
+    Triggers copying new rows, deletes and updates of the indexed columns into
+    ``table``. Rows are indexed once the key trigger has assigned their key.
+    """
+    columns = INDEXES[table]['columns']
+    names = ', '.join(columns)
+    new_values = ', '.join(f"new.{column}" for column in columns)
+    old_values = ', '.join(f"old.{column}" for column in columns)
+    insert = (
+        f"INSERT INTO {table}(rowid, {names}) "
+        f"SELECT new.{KEY_COLUMN}, {new_values} WHERE new.{KEY_COLUMN} IS NOT NULL;"
+    )
+    delete = (
+        f"INSERT INTO {table}({table}, rowid, {names}) "
+        f"SELECT 'delete', old.{KEY_COLUMN}, {old_values} WHERE old.{KEY_COLUMN} IS NOT NULL;"
+    )
+    return {
+        f"{table}_insert": (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER UPDATE OF {KEY_COLUMN} ON movies "
+            f"BEGIN {delete} {insert} END"
+        ),
+        f"{table}_delete": f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON movies BEGIN {delete} END",
+        f"{table}_update": (
+            f"CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {names} ON movies "
+            f"BEGIN {delete} {insert} END"
+        ),
+    }
+
+
+def _has_key_column(cursor) -> bool:
+    cursor.execute("SELECT 1 FROM pragma_table_info('movies') WHERE name = %s", [KEY_COLUMN])
+    return cursor.fetchone() is not None
+
+
+def _create_key(cursor):
+    """Add the key column, its index and trigger; rows without a key get one past the largest"""
+    if not _has_key_column(cursor):
+        cursor.execute(f"ALTER TABLE movies ADD COLUMN {KEY_COLUMN} INTEGER")
+    cursor.execute(
+        f"UPDATE movies SET {KEY_COLUMN} = rowid + (SELECT COALESCE(MAX({KEY_COLUMN}), 0) FROM movies) "
+        f"WHERE {KEY_COLUMN} IS NULL"
+    )
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {KEY_INDEX} ON movies({KEY_COLUMN})")
+    cursor.execute(KEY_TRIGGER_SQL)
+
+
+TERM = re.compile(r'\w+', re.UNICODE)
+# Query trigrams beyond this are ignored by fuzzy lookups
+MAX_QUERY_TRIGRAMS = 32
+
+
+def create_search_index(db_connection=None, rebuild: bool = True, tables: Optional[List[str]] = None):
+    """Create index tables and their triggers (if missing) and optionally reindex"""
+    db_connection = db_connection or connection
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        _create_key(cursor)
+        for table in tables or INDEXES:
+            cursor.execute(_create_table_sql(table))
+            if INDEXES[table].get('vocabulary'):
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEXES[table]['vocabulary']} "
+                    f"USING fts5vocab({table}, 'row')"
+                )
+            for sql in _triggers_sql(table).values():
+                cursor.execute(sql)
+            if rebuild:
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def drop_search_index(db_connection=None, tables: Optional[List[str]] = None):
+    db_connection = db_connection or connection
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        for table in tables or INDEXES:
+            for name in _triggers_sql(table):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            if INDEXES[table].get('vocabulary'):
+                cursor.execute(f"DROP TABLE IF EXISTS {INDEXES[table]['vocabulary']}")
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def ensure_search_index(db_connection=None) -> List[str]:
+    """
+    Recreate indexes that a table rebuild dropped (or whose triggers or key
+    column it dropped); returns the rebuilt tables.
+    """
+    db_connection = db_connection or connection
+    if db_connection.vendor != 'sqlite' or 'movies' not in db_connection.introspection.table_names():
+        return []
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger', 'index')")
+        existing = {row[0] for row in cursor.fetchall()}
+        key_intact = _has_key_column(cursor) and {KEY_INDEX, KEY_TRIGGER} <= existing
+    rebuilt = [
+        table for table in INDEXES
+        if not key_intact or not {table, *_triggers_sql(table)} <= existing
+    ]
+    if rebuilt:
+        logger.warning(f"Movie search indexes incomplete, rebuilding: {', '.join(rebuilt)}")
+        create_search_index(db_connection, rebuild=True, tables=rebuilt)
+    return rebuilt
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every term must match, the last one as a
+    prefix so partially typed words match. Returns None when there are no terms.
+    """
+    terms = TERM.findall(text or '')[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_movies(queryset: QuerySet, text: str) -> QuerySet:
+    """Filter a Movie queryset to matches of ``text``, ordered by relevance"""
+    if 'search_rank' in queryset.query.extra:
+        # Already searched (the filterset and the search filter share ?search=)
+        return queryset
+    if connection.vendor != 'sqlite':
+        return queryset.filter(
+            Q(title__icontains=text) |
+            Q(original_title__icontains=text) |
+            Q(overview__icontains=text) |
+            Q(tagline__icontains=text)
+        ).order_by('id')
+
+    match = fts_query(text)
+    if match is None:
+        return queryset.none()
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    return queryset.extra(
+        select={
+            'search_rank': f"bm25({FTS_TABLE}, {weights})",
+            'search_popularity': "COALESCE(movies.popularity_score, 0)",
+        },
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = movies.{KEY_COLUMN}", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+        # BM25 scores are negative; lower is more relevant. The id makes the order total.
+        order_by=['search_rank', '-search_popularity', 'id'],
+    )
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of each word padded as in pg_trgm ('  w', ' wo', 'wor', 'ord', 'rd ')"""
+    grams = set()
+    for word in TERM.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    """Share of trigrams two strings have in common (0..1)"""
+    a_grams, b_grams = trigrams(a), trigrams(b)
+    if not a_grams or not b_grams:
+        return 0.0
+    return len(a_grams & b_grams) / len(a_grams | b_grams)
+
+
+def _rarest_trigrams(grams: List[str]) -> List[str]:
+    """
+    Pick the query trigrams with the fewest titles, up to about
+    SEARCH_FUZZY_MAX_POSTINGS titles in total (but at least three trigrams).
+    Common trigrams ('the', 'ter') match much of the catalog and add little
+    to finding the right title; trigrams no title has are dropped.
+    """
+    if not grams:
+        return []
+    placeholders = ', '.join(['%s'] * len(grams))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT term, doc FROM {INDEXES[TRIGRAM_TABLE]['vocabulary']} "
+            f"WHERE term IN ({placeholders}) ORDER BY doc",
+            grams
+        )
+        counts = cursor.fetchall()
+
+    chosen, postings = [], 0
+    for gram, documents in counts:
+        if len(chosen) >= 3 and postings + documents > settings.SEARCH_FUZZY_MAX_POSTINGS:
+            break
+        chosen.append(gram)
+        postings += documents
+    return chosen
+
+
+def fuzzy_search_movies(text: str, limit: int = 10, min_similarity: Optional[float] = None) -> List[Tuple]:
+    """
+    Typo-tolerant title lookup: returns up to ``limit`` (movie, similarity)
+    pairs at or above ``min_similarity``, most similar first. Candidates are
+    the titles sharing the most of the rarest trigrams of ``text``.
+    """
+    if min_similarity is None:
+        min_similarity = settings.SEARCH_FUZZY_MIN_SIMILARITY
+    if connection.vendor != 'sqlite':
+        return []
+    words = [word for word in TERM.findall((text or '').lower()) if len(word) >= 3]
+    grams = sorted({word[i:i + 3] for word in words for i in range(len(word) - 2)})[:MAX_QUERY_TRIGRAMS]
+    grams = _rarest_trigrams(grams)
+    if not grams:
+        return []
+
+    match = ' OR '.join(f'"{gram}"' for gram in grams)
+    candidates = Movie.objects.extra(
+        where=[
+            f"movies.{KEY_COLUMN} IN (SELECT rowid FROM {TRIGRAM_TABLE} WHERE {TRIGRAM_TABLE} MATCH %s "
+            f"ORDER BY rank LIMIT %s)"
+        ],
+        params=[match, settings.SEARCH_FUZZY_CANDIDATES],
+    ).order_by()
+
+    scored = []
+    for movie in candidates:
+        score = max(similarity(text, movie.title), similarity(text, movie.original_title))
+        if score >= min_similarity:
+            scored.append((movie, round(score, 3)))
+    scored.sort(key=lambda pair: (-pair[1], -(pair[0].popularity_score or 0)))
+    return scored[:limit]
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from .write_queue import run_write
 from .models import (
     Movie, Genre, ProductionCompany, Person, 
-    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew
+    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew, BackgroundJob
 )
 
 
@@ -131,6 +132,13 @@ class MovieCreateUpdateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def create(self, validated_data):
+        # Through the single-writer queue when it is enabled
+        return run_write(self._create, validated_data)
+
+    def update(self, instance, validated_data):
+        return run_write(self._update, instance, validated_data)
+
+    def _create(self, validated_data):
         genre_ids = validated_data.pop('genre_ids', [])
         production_company_ids = validated_data.pop('production_company_ids', [])
         
@@ -156,7 +164,7 @@ class MovieCreateUpdateSerializer(serializers.ModelSerializer):
         
         return movie
 
-    def update(self, instance, validated_data):
+    def _update(self, instance, validated_data):
         genre_ids = validated_data.pop('genre_ids', None)
         production_company_ids = validated_data.pop('production_company_ids', None)
         
@@ -287,3 +295,16 @@ class PersonDetailSerializer(serializers.ModelSerializer):
             }
             for role in crew_roles
         ]
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """Serializer for BackgroundJob model"""
+
+    class Meta:
+        model = BackgroundJob
+        fields = [
+            'id', 'name', 'payload', 'status', 'attempts', 'max_attempts',
+            'run_at', 'last_error', 'result', 'queued_seconds', 'duration_seconds',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -4,16 +4,42 @@ This file contains TMDB API integration and movie data synchronization services.
 """
 
 import requests
+import json
 import logging
-from datetime import datetime
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from django.conf import settings
-from django.db import transaction
-from typing import Dict, List, Optional, Union
+from django.core import signing
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from typing import Dict, List, Optional, Tuple, Union
 
 from .models import (
     Movie, Genre, ProductionCompany, Person,
-    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew
+    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew, SyncState, BackgroundJob
 )
+from .ratelimit import (
+    get_rate_limiter, RateLimitExceeded,
+    PRIORITY_NORMAL, PRIORITY_LOW
+)
+from .circuit_breaker import get_tmdb_breaker, CircuitBreaker
+from .coalescing import tmdb_requests, movie_syncs, sync_claim, is_claimed, SingleFlightTimeout
+from .jobs import enqueue
+from .import_plan import MovieImportPlan, merge_rows
+from .search_cache import bump_catalog_version
+from .autocomplete import normalize
+from .search_index import fuzzy_search_movies, search_movies
+from .transaction_stats import write_transactions
+from .write_queue import get_write_queue, run_timed_write, run_write
+from .tmdb_cache import get_response_cache, CacheEntry, TMDBResponseCache
+from .tmdb_transport import get_transport, HTTPTransport, ReplayTransport
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +47,7 @@ logger = logging.getLogger(__name__)
 class TMDBService:
     """Service for TMDB API integration"""
     
-    def __init__(self):
+    def __init__(self, priority: str = PRIORITY_NORMAL, transport=None):
         self.api_key = settings.TMDB_API_KEY
         self.access_token = settings.TMDB_ACCESS_TOKEN
         self.base_url = settings.TMDB_BASE_URL
@@ -33,23 +59,201 @@ class TMDBService:
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json;charset=utf-8'
         }
+        self.timeout = (
+            settings.TMDB_HTTP_CONNECT_TIMEOUT,
+            settings.TMDB_HTTP_READ_TIMEOUT
+        )
+        # Network by default; record/replay transports serve fixtures for benchmarks
+        self.transport = transport or get_transport()
+        self.cache = get_response_cache()
+        # Replayed fixtures are local: they spend no TMDB quota and say nothing about its health
+        replay = isinstance(self.transport, ReplayTransport)
+        self.rate_limiter = None if replay else get_rate_limiter()
+        self.breaker = None if replay else get_tmdb_breaker()
+        # Rate limiter priority: admin syncs are served before opportunistic ones
+        self.priority = priority
+        # Optional time.monotonic() deadline bounding every request of this instance
+        self.deadline = None
+        # Set when a request was skipped or failed (circuit open, budget, throttling)
+        self.degraded = False
+        # Endpoints TMDB answered with 404 Not Found
+        self.not_found = set()
     
-    def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make a request to TMDB API"""
-        url = f"{self.base_url}/{endpoint}"
-        
+    def set_latency_budget(self, seconds: Optional[float]):
+        """Bound all further requests of this instance to a total latency budget"""
+        self.deadline = time.monotonic() + seconds if seconds else None
+    
+    def remaining_budget(self) -> Optional[float]:
+        """Seconds left before the deadline (None without a budget)"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+    
+    def is_available(self) -> bool:
+        """Return False while the TMDB circuit breaker is open"""
+        return self.breaker is None or self.breaker.state != CircuitBreaker.OPEN
+    
+    @staticmethod
+    def get_session(retries: bool = True) -> requests.Session:
+        """Return the process-wide pooled keep-alive session"""
+        return HTTPTransport.get_session(retries)
+    
+    @staticmethod
+    def close_session():
+        """Close the shared sessions and drop their pooled connections"""
+        HTTPTransport.close_sessions()
+    
+    def _make_request(self, endpoint: str, params: Dict = None, use_cache: bool = True) -> Optional[Dict]:
+        """
+        Make a request to TMDB API. With use_cache=False a cached response is
+        never served as is, not even as a fallback: it is only revalidated.
+        """
         # Add API key to params if not using access token
         if params is None:
             params = {}
         params['api_key'] = self.api_key
         
+        # Serve fresh entries from the cache; stale ones are revalidated below
+        request_key = TMDBResponseCache.build_key(endpoint, params)
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(request_key)
+            if entry is not None and entry.is_fresh and use_cache:
+                return entry.json()
+        
+        # Identical requests already in flight in this process share one response;
+        # budgeted callers wait for it no longer than their budget
+        try:
+            content = tmdb_requests.do(
+                request_key if use_cache else f"{request_key}#revalidate",
+                lambda: self._fetch_content(endpoint, params, request_key, entry, allow_stale=use_cache),
+                timeout=self.remaining_budget()
+            )
+        except SingleFlightTimeout:
+            logger.warning(f"Latency budget exhausted waiting for a coalesced TMDB request to {endpoint}")
+            self.degraded = True
+            content = entry.content if entry is not None and use_cache else None
+        if content is None:
+            return None
+        try:
+            return json.loads(content)
+        except ValueError as e:
+            logger.error(f"TMDB API returned invalid JSON for {endpoint}: {e}")
+            return None
+    
+    def _fetch_content(self, endpoint: str, params: Dict, cache_key: str,
+                       entry: Optional[CacheEntry], allow_stale: bool = True) -> Optional[bytes]:
+        """Fetch a response body from TMDB, revalidating a cached entry"""
+        url = f"{self.base_url}/{endpoint}"
+        headers = self.headers
+        if entry is not None and entry.can_revalidate:
+            headers = dict(self.headers)
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        
+        # Fail fast while TMDB is unhealthy or the caller's latency budget is spent
+        stale_content = entry.content if entry is not None and allow_stale else None
+        if not self.is_available():
+            logger.warning(f"TMDB circuit open; skipping request to {endpoint}")
+            self.degraded = True
+            return stale_content
+        timeout, max_wait = self.timeout, None
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"TMDB latency budget exhausted; skipping request to {endpoint}")
+                self.degraded = True
+                return stale_content
+            timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+            max_wait = remaining
+        
+        # Before taking a rate-limit token, so rejected calls do not spend one;
+        # in half-open state this admits the single trial call
+        if self.breaker is not None and not self.breaker.allow():
+            logger.warning(f"TMDB circuit open; skipping request to {endpoint}")
+            self.degraded = True
+            return stale_content
+        
+        if self.rate_limiter is not None:
+            try:
+                self.rate_limiter.acquire(self.priority, max_wait=max_wait)
+            except RateLimitExceeded as e:
+                logger.warning(f"{e}; skipping request to {endpoint}")
+                self.degraded = True
+                # The admitted call is not made; a half-open trial goes to the next caller
+                if self.breaker is not None:
+                    self.breaker.release()
+                # A stale cached body is better than nothing when we are throttled
+                return stale_content
+        
+        started = time.monotonic()
+        recorded = False
         try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            # Budgeted requests skip retries, which could blow through the deadline
+            response = self.transport.get(
+                endpoint, url, params, headers, timeout, retries=self.deadline is None
+            )
+            if response.status_code != 304 or entry is None:
+                response.raise_for_status()
+            self._record_outcome(started, failed=False)
+            recorded = True
         except requests.exceptions.RequestException as e:
+            status_code = getattr(e.response, 'status_code', None)
+            # Client errors such as 404 say nothing about TMDB's health
+            upstream_failure = status_code is None or status_code >= 500 or status_code == 429
+            self._record_outcome(started, failed=upstream_failure)
+            recorded = True
+            if upstream_failure:
+                self.degraded = True
+            elif status_code == 404:
+                self.not_found.add(endpoint)
             logger.error(f"TMDB API request failed: {e}")
-            return None
+            return stale_content if upstream_failure else None
+        finally:
+            # Any other error says nothing about TMDB, but must not leave a half-open trial in flight
+            if not recorded and self.breaker is not None:
+                self.breaker.release()
+        
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(cache_key, entry, self.cache.ttl_for(endpoint))
+            return entry.content
+        
+        if self.cache is not None:
+            self.cache.store(
+                cache_key,
+                response.content,
+                self.cache.ttl_for(endpoint),
+                etag=response.headers.get('ETag', ''),
+                last_modified=response.headers.get('Last-Modified', '')
+            )
+        return response.content
+    
+    def _record_outcome(self, started: float, failed: bool):
+        """Feed a request outcome to the circuit breaker"""
+        if self.breaker is None:
+            return
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(time.monotonic() - started)
+    
+    @classmethod
+    def breaker_stats(cls) -> Dict:
+        """Return circuit breaker state and counters (empty when disabled)"""
+        breaker = get_tmdb_breaker()
+        return breaker.stats() if breaker is not None else {}
+    
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        """Return response cache counters (empty when caching is disabled)"""
+        cache = get_response_cache()
+        return cache.stats() if cache is not None else {}
+    
+    @classmethod
+    def rate_limit_stats(cls) -> Dict:
+        """Return rate limiter counters for this process (empty when disabled)"""
+        limiter = get_rate_limiter()
+        return limiter.stats() if limiter is not None else {}
     
     def _build_image_url(self, path: str, size_type: str = 'poster') -> str:
         """Build full image URL from TMDB path"""
@@ -69,13 +273,29 @@ class TMDBService:
         }
         return self._make_request(endpoint, params)
     
-    def fetch_movie_data(self, tmdb_id: int) -> Optional[Dict]:
+    def fetch_movie_data(self, tmdb_id: int, use_cache: bool = True) -> Optional[Dict]:
         """Fetch detailed movie data from TMDB API"""
         endpoint = f'movie/{tmdb_id}'
         params = {
             'append_to_response': 'credits,videos,keywords,external_ids',
             'language': 'en-US'
         }
+        return self._make_request(endpoint, params, use_cache=use_cache)
+    
+    def fetch_movie_summary(self, tmdb_id: int, use_cache: bool = True) -> Optional[Dict]:
+        """Fetch movie details without appended resources (ratings refresh)"""
+        endpoint = f'movie/{tmdb_id}'
+        params = {'language': 'en-US'}
+        return self._make_request(endpoint, params, use_cache=use_cache)
+    
+    def fetch_movie_changes(self, start_date: str, end_date: str, page: int = 1) -> Optional[Dict]:
+        """Fetch one page of the movie changes feed (window of at most 14 days)"""
+        endpoint = 'movie/changes'
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'page': page
+        }
         return self._make_request(endpoint, params)
     
     def fetch_person_data(self, tmdb_id: int) -> Optional[Dict]:
@@ -102,8 +322,49 @@ class TMDBService:
 class MovieDataService:
     """Service for movie data management and TMDB synchronization"""
     
-    def __init__(self):
-        self.tmdb_service = TMDBService()
+    def __init__(self, priority: str = PRIORITY_NORMAL):
+        self.tmdb_service = TMDBService(priority=priority)
+        self.fetch_workers = settings.TMDB_FETCH_WORKERS
+        # Per-stage wall-clock timings (seconds) of the most recent sync
+        self.last_sync_timings = {}
+        # Rows inserted/updated/deleted by the most recent refresh of an existing movie
+        self.last_sync_changes = {}
+    
+    @contextmanager
+    def _timed_stage(self, stage: str):
+        """Record the wall-clock duration of a sync stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.last_sync_timings[stage] = time.perf_counter() - started
+    
+    def _fetch_company_details(self, companies: List[Dict], parallel: bool = True) -> List[Dict]:
+        """Fetch missing company details from TMDB concurrently"""
+        missing = [
+            company for company in companies
+            if 'logo_path' not in company and company.get('id')
+        ]
+        if not missing:
+            return companies
+        
+        if not parallel:
+            for company in missing:
+                additional_data = self.tmdb_service.fetch_production_company(company['id'])
+                if additional_data:
+                    company.update(additional_data)
+            return companies
+        
+        workers = max(1, min(self.fetch_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tmdb-fetch') as executor:
+            details = executor.map(
+                lambda company: self.tmdb_service.fetch_production_company(company['id']),
+                missing
+            )
+            for company, additional_data in zip(missing, details):
+                if additional_data:
+                    company.update(additional_data)
+        return companies
     
     def _parse_date(self, date_string: str) -> Optional[datetime]:
         """Parse date string from TMDB API"""
@@ -115,145 +376,458 @@ class MovieDataService:
             logger.warning(f"Failed to parse date: {date_string}")
             return None
     
-    def _get_or_create_genre(self, genre_data: Dict) -> Genre:
-        """Get or create genre from TMDB data"""
-        genre, created = Genre.objects.get_or_create(
-            name=genre_data['name'],
-            defaults={
-                'description': f"Genre: {genre_data['name']}"
-            }
-        )
-        if created:
-            logger.info(f"Created new genre: {genre.name}")
-        return genre
-    
-    def _get_or_create_production_company(self, company_data: Dict) -> ProductionCompany:
-        """Get or create production company from TMDB data"""
-        # Fetch additional company data if needed
-        if 'logo_path' not in company_data and company_data.get('id'):
-            additional_data = self.tmdb_service.fetch_production_company(company_data['id'])
-            if additional_data:
-                company_data.update(additional_data)
-        
-        company, created = ProductionCompany.objects.get_or_create(
-            name=company_data['name'],
-            defaults={
+    def _resolve_rows(self, model, key_field: str, rows: Dict) -> Dict:
+        """
+        Map each key to a row of ``model``, creating missing rows in bulk.
+        ``rows`` maps key values to the field values used when creating.
+        Costs one IN query, plus one bulk insert and one re-read when rows are missing.
+        """
+        if not rows:
+            return {}
+        resolved = {
+            getattr(instance, key_field): instance
+            for instance in model.objects.filter(**{f'{key_field}__in': list(rows)})
+        }
+        missing = [key for key in rows if key not in resolved]
+        if missing:
+            model.objects.bulk_create(
+                [model(**{key_field: key}, **rows[key]) for key in missing],
+                ignore_conflicts=True
+            )
+            # Re-read so rows inserted concurrently by another worker are picked up too
+            resolved.update(
+                (getattr(instance, key_field), instance)
+                for instance in model.objects.filter(**{f'{key_field}__in': missing})
+            )
+            logger.info(f"Created {len(missing)} new {model._meta.verbose_name_plural}")
+        return resolved
+    
+    def _resolve_genres(self, rows: Dict[str, Dict]) -> Dict[str, Genre]:
+        """Get or create genres, keyed by name"""
+        return self._resolve_rows(Genre, 'name', rows)
+    
+    def _resolve_production_companies(self, rows: Dict[str, Dict]) -> Dict[str, ProductionCompany]:
+        """Get or create production companies, keyed by name"""
+        return self._resolve_rows(ProductionCompany, 'name', rows)
+    
+    def _resolve_people(self, rows: Dict[int, Dict]) -> Dict[int, Person]:
+        """Get or create people, keyed by TMDB ID"""
+        return self._resolve_rows(Person, 'tmdb_id', rows)
+    
+    def _genre_rows(self, genres: List[Dict]) -> Dict[str, Dict]:
+        """Genre rows from TMDB data, keyed by name"""
+        return {
+            genre_data['name']: {'description': f"Genre: {genre_data['name']}"}
+            for genre_data in genres
+        }
+    
+    def _company_rows(self, companies: List[Dict]) -> Dict[str, Dict]:
+        """Production company rows from TMDB data, keyed by name"""
+        return {
+            company_data['name']: {
                 'logo_url': self.tmdb_service._build_image_url(
                     company_data.get('logo_path', ''), 'poster'
                 ) if company_data.get('logo_path') else '',
-                'origin_country': company_data.get('origin_country', '')
+                'origin_country': company_data.get('origin_country') or ''
             }
-        )
-        if created:
-            logger.info(f"Created new production company: {company.name}")
-        return company
-    
-    def _get_or_create_person(self, person_data: Dict) -> Person:
-        """Get or create person from TMDB data"""
-        person, created = Person.objects.get_or_create(
-            tmdb_id=person_data['id'],
-            defaults={
+            for company_data in companies
+        }
+    
+    def _people_rows(self, people: List[Dict]) -> Dict[int, Dict]:
+        """Person rows from TMDB cast/crew data, keyed by TMDB ID"""
+        rows = {}
+        for person_data in people:
+            rows.setdefault(person_data['id'], {
                 'name': person_data['name'],
-                'profile_image_url': self.tmdb_service._build_image_url(
-                    person_data.get('profile_path', ''), 'profile'
-                ) if person_data.get('profile_path') else ''
-            }
-        )
-        if created:
-            logger.info(f"Created new person: {person.name}")
-        return person
+                'profile_image_url': self._profile_url(person_data)
+            })
+        return rows
     
-    @transaction.atomic
-    def sync_movie_from_tmdb(self, tmdb_id: int) -> Optional[Movie]:
+    def _profile_url(self, person_data: Dict) -> str:
+        return self.tmdb_service._build_image_url(
+            person_data.get('profile_path', ''), 'profile'
+        ) if person_data.get('profile_path') else ''
+    
+    def sync_movie_from_tmdb(self, tmdb_id: int, update_existing: bool = False) -> Optional[Movie]:
         """Sync movie data from TMDB and create/update database record"""
         logger.info(f"Syncing movie with TMDB ID: {tmdb_id}")
+        self.last_sync_timings = {}
+        self.last_sync_changes = {}
         
         # Check if movie already exists
         existing_movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
         if existing_movie:
+            if update_existing:
+                return self._refresh_movie(existing_movie)
             logger.info(f"Movie already exists: {existing_movie.title}")
             return existing_movie
         
-        # Fetch movie data from TMDB
-        movie_data = self.tmdb_service.fetch_movie_data(tmdb_id)
-        if not movie_data:
-            logger.error(f"Failed to fetch movie data for TMDB ID: {tmdb_id}")
-            return None
-        
+        # Concurrent syncs of the same movie in this process share one result
         try:
-            # Create movie object
-            movie = Movie.objects.create(
-                tmdb_id=tmdb_id,
-                title=movie_data.get('title', ''),
-                original_title=movie_data.get('original_title', ''),
-                overview=movie_data.get('overview', ''),
-                tagline=movie_data.get('tagline', ''),
-                release_date=self._parse_date(movie_data.get('release_date')),
-                runtime=movie_data.get('runtime'),
-                budget=movie_data.get('budget', 0) if movie_data.get('budget') else None,
-                revenue=movie_data.get('revenue', 0) if movie_data.get('revenue') else None,
-                status=self._map_tmdb_status(movie_data.get('status', 'Released')),
-                adult=movie_data.get('adult', False),
-                popularity_score=movie_data.get('popularity'),
-                vote_average=movie_data.get('vote_average'),
-                vote_count=movie_data.get('vote_count'),
-                poster_url=self.tmdb_service._build_image_url(
-                    movie_data.get('poster_path', ''), 'poster'
-                ) if movie_data.get('poster_path') else '',
-                backdrop_url=self.tmdb_service._build_image_url(
-                    movie_data.get('backdrop_path', ''), 'backdrop'
-                ) if movie_data.get('backdrop_path') else '',
-                imdb_id=movie_data.get('external_ids', {}).get('imdb_id') if movie_data.get('external_ids') else None
+            return movie_syncs.do(
+                f"movie:{tmdb_id}",
+                lambda: self._sync_movie_claimed(tmdb_id),
+                timeout=self.tmdb_service.remaining_budget()
             )
+        except SingleFlightTimeout:
+            logger.warning(f"Latency budget exhausted waiting for the sync of movie {tmdb_id}")
+            self.tmdb_service.degraded = True
+            return Movie.objects.filter(tmdb_id=tmdb_id).first()
+    
+    def _sync_movie_claimed(self, tmdb_id: int) -> Optional[Movie]:
+        """Sync a movie while holding its cross-process claim"""
+        claim_key = f"movie:{tmdb_id}"
+        with sync_claim(claim_key, settings.TMDB_SYNC_CLAIM_TTL) as claimed:
+            if not claimed:
+                logger.info(f"Movie {tmdb_id} is being synced by another worker, waiting")
+                return self._wait_for_movie(tmdb_id, claim_key)
             
-            # Add genres
-            if movie_data.get('genres'):
-                for genre_data in movie_data['genres']:
-                    genre = self._get_or_create_genre(genre_data)
-                    MovieGenre.objects.create(movie=movie, genre=genre)
-            
-            # Add production companies
-            if movie_data.get('production_companies'):
-                for company_data in movie_data['production_companies']:
-                    company = self._get_or_create_production_company(company_data)
-                    MovieProductionCompany.objects.create(movie=movie, company=company)
+            # Another worker may have finished between our check and the claim
+            existing_movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
+            if existing_movie:
+                return existing_movie
+            return self._sync_new_movie(tmdb_id)
+    
+    def _refresh_movie(self, movie: Movie) -> Optional[Movie]:
+        """Re-fetch a stored movie and write only what changed on TMDB"""
+        started = time.perf_counter()
+        with sync_claim(f"movie:{movie.tmdb_id}", settings.TMDB_SYNC_CLAIM_TTL) as claimed:
+            if not claimed:
+                logger.info(f"Movie {movie.tmdb_id} is being synced by another worker, skipping refresh")
+                return movie
             
-            # Add cast and crew if available
-            credits = movie_data.get('credits', {})
+            # An explicit refresh must not be answered from the response cache
+            plan = self._fetch_plan_timed(movie.tmdb_id, use_cache=False)
+            if plan is None:
+                return None
             
-            # Add cast
-            if credits.get('cast'):
-                for i, cast_data in enumerate(credits['cast'][:20]):  # Limit to top 20 cast
-                    person = self._get_or_create_person(cast_data)
-                    MovieCast.objects.create(
-                        movie=movie,
-                        person=person,
-                        character_name=cast_data.get('character', ''),
-                        cast_order=cast_data.get('order', i)
+            try:
+                with self._timed_stage('write'):
+                    self.last_sync_changes, self.last_sync_timings['transaction'] = self._write_in_transaction(
+                        'refresh_movie', self._update_movie_from_plan, movie, plan
                     )
+            except Exception as e:
+                logger.error(f"Error refreshing movie {movie.tmdb_id}: {str(e)}")
+                return None
+            if self.last_sync_changes['rows_touched']:
+                bump_catalog_version()
+        
+        self.last_sync_timings['total'] = time.perf_counter() - started
+        logger.info(
+            f"Refreshed movie: {movie.title}, {self.last_sync_changes['rows_touched']} rows touched "
+            f"(timings: {self._format_timings()})"
+        )
+        return movie
+    
+    def _wait_for_movie(self, tmdb_id: int, claim_key: str) -> Optional[Movie]:
+        """Wait for another worker's sync of the movie and reuse its result"""
+        deadline = time.monotonic() + settings.TMDB_SYNC_CLAIM_WAIT
+        # A latency-budgeted caller (search) must not outwait its budget
+        if self.tmdb_service.deadline is not None:
+            deadline = min(deadline, self.tmdb_service.deadline)
+        while time.monotonic() < deadline:
+            movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
+            if movie:
+                return movie
+            if not is_claimed(claim_key):
+                # The other worker gave up without creating the movie
+                break
+            time.sleep(min(0.2, max(0.0, deadline - time.monotonic())))
+        return Movie.objects.filter(tmdb_id=tmdb_id).first()
+    
+    def _sync_new_movie(self, tmdb_id: int) -> Optional[Movie]:
+        """Fetch a movie that is not stored locally yet and write it"""
+        started = time.perf_counter()
+        
+        # Network-only phase: nothing is written until the plan is complete
+        plan = self._fetch_plan_timed(tmdb_id)
+        if plan is None:
+            return None
+        
+        try:
+            with self._timed_stage('write'):
+                movie, self.last_sync_timings['transaction'] = self._write_in_transaction(
+                    'sync_movie', self._create_movie, plan
+                )
+            bump_catalog_version()
+            self.last_sync_timings['total'] = time.perf_counter() - started
             
-            # Add crew
-            if credits.get('crew'):
-                # Focus on key crew members (Director, Producer, Writer, etc.)
-                key_jobs = ['Director', 'Producer', 'Executive Producer', 'Screenplay', 'Writer', 
-                           'Director of Photography', 'Original Music Composer', 'Editor']
-                for crew_data in credits['crew']:
-                    if crew_data.get('job') in key_jobs:
-                        person = self._get_or_create_person(crew_data)
-                        MovieCrew.objects.create(
-                            movie=movie,
-                            person=person,
-                            job=crew_data.get('job', ''),
-                            department=crew_data.get('department', '')
-                        )
-            
-            logger.info(f"Successfully synced movie: {movie.title}")
+            logger.info(
+                f"Successfully synced movie: {movie.title} "
+                f"(timings: {self._format_timings()})"
+            )
             return movie
             
+        except IntegrityError:
+            # Lost a race on the unique tmdb_id despite the claim (e.g. it expired)
+            logger.info(f"Movie {tmdb_id} was created concurrently, reusing it")
+            return Movie.objects.filter(tmdb_id=tmdb_id).first()
         except Exception as e:
             logger.error(f"Error syncing movie {tmdb_id}: {str(e)}")
             return None
     
+    def _fetch_plan_timed(self, tmdb_id: int, use_cache: bool = True) -> Optional[MovieImportPlan]:
+        """Fetch phase of a single sync, recording per-stage timings"""
+        # Credits are appended to the same response
+        with self._timed_stage('fetch_movie'):
+            movie_data = self.tmdb_service.fetch_movie_data(tmdb_id, use_cache=use_cache)
+        if not movie_data:
+            logger.error(f"Failed to fetch movie data for TMDB ID: {tmdb_id}")
+            return None
+        
+        # Fetch every dependent resource in parallel before writing anything
+        with self._timed_stage('fetch_companies'):
+            self._fetch_company_details(movie_data.get('production_companies') or [])
+        with self._timed_stage('plan'):
+            return self.build_import_plan(tmdb_id, movie_data)
+    
+    def fetch_import_plan(self, tmdb_id: int, parallel: bool = True) -> Optional[MovieImportPlan]:
+        """Fetch a movie and its dependent resources and plan its import, without touching the database"""
+        movie_data = self.tmdb_service.fetch_movie_data(tmdb_id)
+        if not movie_data:
+            return None
+        self._fetch_company_details(movie_data.get('production_companies') or [], parallel=parallel)
+        return self.build_import_plan(tmdb_id, movie_data)
+    
+    def _write_in_transaction(self, label: str, fn, *args):
+        """
+        Run a write phase in a timed transaction (through the single-writer
+        queue when enabled); returns its result and the transaction hold time.
+        """
+        return run_timed_write(label, fn, *args)
+    
+    def write_import_plans(self, plans: Dict[int, MovieImportPlan]) -> Tuple[Dict[int, Movie], Dict[int, str]]:
+        """Write a batch of import plans in one transaction"""
+        (movies, errors), _ = run_timed_write('batch_write', self._write_import_plans, plans)
+        if movies:
+            bump_catalog_version()
+        return movies, errors
+    
+    def _write_import_plans(self, plans: Dict[int, MovieImportPlan]) -> Tuple[Dict[int, Movie], Dict[int, str]]:
+        movies, errors = {}, {}
+        try:
+            with transaction.atomic():
+                return self._create_movies(list(plans.values())), errors
+        except Exception as e:
+            logger.warning(f"Batch write of {len(plans)} movies failed ({e}), writing one by one")
+        
+        for tmdb_id, plan in plans.items():
+            try:
+                # Savepoint per movie so one bad plan does not sink the batch
+                with transaction.atomic():
+                    movies[tmdb_id] = self._create_movie(plan)
+            except Exception as e:
+                logger.error(f"Error writing movie {tmdb_id}: {str(e)}")
+                errors[tmdb_id] = str(e)
+        return movies, errors
+    
+    @staticmethod
+    def transaction_stats() -> Dict:
+        """Return hold-time statistics of this process's sync write transactions"""
+        return write_transactions.stats()
+    
+    @staticmethod
+    def write_queue_stats() -> Optional[Dict]:
+        """Return the single-writer queue's counters, or None when it is disabled"""
+        write_queue = get_write_queue()
+        return write_queue.stats() if write_queue else None
+    
+    def _format_timings(self) -> str:
+        """Format the last sync's stage timings for logging"""
+        return ', '.join(
+            f"{stage}={duration * 1000:.0f}ms"
+            for stage, duration in self.last_sync_timings.items()
+        )
+    
+    # Crew jobs worth storing (Director, Producer, Writer, etc.)
+    KEY_CREW_JOBS = [
+        'Director', 'Producer', 'Executive Producer', 'Screenplay', 'Writer',
+        'Director of Photography', 'Original Music Composer', 'Editor'
+    ]
+    # Number of top-billed cast members stored per movie
+    MAX_CAST = 20
+    
+    def build_import_plan(self, tmdb_id: int, movie_data: Dict) -> MovieImportPlan:
+        """Turn a fetched TMDB payload (with company details) into an import plan"""
+        credits = movie_data.get('credits') or {}
+        cast = (credits.get('cast') or [])[:self.MAX_CAST]
+        crew = [
+            crew_data for crew_data in (credits.get('crew') or [])
+            if crew_data.get('job') in self.KEY_CREW_JOBS
+        ]
+        
+        plan = MovieImportPlan(
+            tmdb_id=tmdb_id,
+            movie=self._movie_fields(movie_data),
+            genres=self._genre_rows(movie_data.get('genres') or []),
+            companies=self._company_rows(movie_data.get('production_companies') or []),
+            people=self._people_rows(cast + crew),
+        )
+        for i, cast_data in enumerate(cast):
+            # First billing wins when TMDB lists a person twice
+            plan.cast.setdefault(cast_data['id'], {
+                'character_name': cast_data.get('character') or '',
+                'cast_order': cast_data.get('order', i)
+            })
+        for crew_data in crew:
+            plan.crew.setdefault((crew_data['id'], crew_data.get('job', '')), {
+                'department': crew_data.get('department', '')
+            })
+        return plan
+    
+    def _movie_fields(self, movie_data: Dict) -> Dict:
+        """Movie column values from TMDB data"""
+        return {
+            'title': movie_data.get('title', ''),
+            'original_title': movie_data.get('original_title', ''),
+            'overview': movie_data.get('overview', ''),
+            'tagline': movie_data.get('tagline', ''),
+            'release_date': self._parse_date(movie_data.get('release_date')),
+            'runtime': movie_data.get('runtime'),
+            'budget': movie_data.get('budget', 0) if movie_data.get('budget') else None,
+            'revenue': movie_data.get('revenue', 0) if movie_data.get('revenue') else None,
+            'status': self._map_tmdb_status(movie_data.get('status', 'Released')),
+            'adult': movie_data.get('adult', False),
+            'popularity_score': movie_data.get('popularity'),
+            'vote_average': movie_data.get('vote_average'),
+            'vote_count': movie_data.get('vote_count'),
+            'poster_url': self.tmdb_service._build_image_url(
+                movie_data.get('poster_path', ''), 'poster'
+            ) if movie_data.get('poster_path') else '',
+            'backdrop_url': self.tmdb_service._build_image_url(
+                movie_data.get('backdrop_path', ''), 'backdrop'
+            ) if movie_data.get('backdrop_path') else '',
+            'imdb_id': movie_data.get('external_ids', {}).get('imdb_id') if movie_data.get('external_ids') else None
+        }
+    
+    # Movie columns populated from TMDB (see _movie_fields)
+    MOVIE_SYNC_FIELDS = [
+        'title', 'original_title', 'overview', 'tagline', 'release_date', 'runtime',
+        'budget', 'revenue', 'status', 'adult', 'popularity_score', 'vote_average',
+        'vote_count', 'poster_url', 'backdrop_url', 'imdb_id'
+    ]
+    
+    def _update_movie_from_data(self, movie: Movie, movie_data: Dict) -> Dict:
+        """Bring a stored movie in line with a fetched TMDB payload"""
+        return self._update_movie_from_plan(movie, self.build_import_plan(movie.tmdb_id, movie_data))
+    
+    def _update_movie_from_plan(self, movie: Movie, plan: MovieImportPlan) -> Dict:
+        """
+        Bring a stored movie in line with an import plan, writing only the
+        columns and through-table rows that differ. Returns per-table counts
+        of inserted, updated and deleted rows.
+        """
+        changes = {}
+        changed_fields = [
+            field for field in self.MOVIE_SYNC_FIELDS
+            if getattr(movie, field) != plan.movie[field]
+        ]
+        if changed_fields:
+            for field in changed_fields:
+                setattr(movie, field, plan.movie[field])
+            movie.save(update_fields=changed_fields + ['updated_at'])
+        changes['movie_fields'] = changed_fields
+        
+        genres = self._resolve_genres(plan.genres)
+        companies = self._resolve_production_companies(plan.companies)
+        people = self._resolve_people(plan.people)
+        
+        changes['genres'] = self._sync_links(
+            MovieGenre, movie, 'genre_id',
+            {genre.id: {} for genre in genres.values()}
+        )
+        changes['production_companies'] = self._sync_links(
+            MovieProductionCompany, movie, 'company_id',
+            {company.id: {} for company in companies.values()}
+        )
+        changes['cast'] = self._sync_links(
+            MovieCast, movie, 'person_id',
+            {people[person_tmdb_id].id: values for person_tmdb_id, values in plan.cast.items()}
+        )
+        changes['crew'] = self._sync_links(
+            MovieCrew, movie, ('person_id', 'job'),
+            {(people[person_tmdb_id].id, job): values for (person_tmdb_id, job), values in plan.crew.items()}
+        )
+        
+        changes['rows_touched'] = (1 if changed_fields else 0) + sum(
+            sum(counts.values()) for key, counts in changes.items() if isinstance(counts, dict)
+        )
+        return changes
+    
+    def _sync_links(self, model, movie: Movie, key_fields, wanted: Dict) -> Dict[str, int]:
+        """
+        Diff a movie's through-table rows against the wanted ones (key -> extra
+        column values) and insert, update or delete only the differences.
+        """
+        key_fields = (key_fields,) if isinstance(key_fields, str) else key_fields
+        value_fields = sorted({field for values in wanted.values() for field in values})
+        
+        def key_of(row):
+            values = tuple(getattr(row, field) for field in key_fields)
+            return values[0] if len(values) == 1 else values
+        
+        existing = {
+            key_of(row): row
+            for row in model.objects.filter(movie=movie).only('id', *key_fields, *value_fields).order_by()
+        }
+        
+        to_create, to_update = [], []
+        for key, values in wanted.items():
+            row = existing.get(key)
+            if row is None:
+                key_values = key if isinstance(key, tuple) else (key,)
+                to_create.append(model(movie=movie, **dict(zip(key_fields, key_values)), **values))
+            elif any(getattr(row, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(row, field, value)
+                to_update.append(row)
+        stale_ids = [row.id for key, row in existing.items() if key not in wanted]
+        
+        if to_create:
+            model.objects.bulk_create(to_create)
+        if to_update:
+            model.objects.bulk_update(to_update, value_fields)
+        if stale_ids:
+            model.objects.filter(id__in=stale_ids).delete()
+        return {'added': len(to_create), 'updated': len(to_update), 'removed': len(stale_ids)}
+    
+    def _create_movie(self, plan: MovieImportPlan) -> Movie:
+        """Create the movie and its related rows from an import plan"""
+        return self._create_movies([plan])[plan.tmdb_id]
+    
+    def _create_movies(self, plans: List[MovieImportPlan]) -> Dict[int, Movie]:
+        """
+        Create movies and their related rows with set-based statements.
+        Genres, companies and people are resolved with one IN query each
+        (missing ones are bulk inserted), and every through-table row is
+        inserted with one bulk statement per table, however large the batch.
+        """
+        movies = {plan.tmdb_id: Movie(tmdb_id=plan.tmdb_id, **plan.movie) for plan in plans}
+        Movie.objects.bulk_create(list(movies.values()))
+        
+        genres = self._resolve_genres(merge_rows(plans, 'genres'))
+        companies = self._resolve_production_companies(merge_rows(plans, 'companies'))
+        people = self._resolve_people(merge_rows(plans, 'people'))
+        
+        movie_genres, movie_companies, movie_cast, movie_crew = [], [], [], []
+        for plan in plans:
+            movie = movies[plan.tmdb_id]
+            for name in plan.genres:
+                movie_genres.append(MovieGenre(movie=movie, genre=genres[name]))
+            for name in plan.companies:
+                movie_companies.append(MovieProductionCompany(movie=movie, company=companies[name]))
+            for person_tmdb_id, values in plan.cast.items():
+                movie_cast.append(MovieCast(movie=movie, person=people[person_tmdb_id], **values))
+            for (person_tmdb_id, job), values in plan.crew.items():
+                movie_crew.append(MovieCrew(movie=movie, person=people[person_tmdb_id], job=job, **values))
+        
+        MovieGenre.objects.bulk_create(movie_genres, ignore_conflicts=True)
+        MovieProductionCompany.objects.bulk_create(movie_companies, ignore_conflicts=True)
+        MovieCast.objects.bulk_create(movie_cast, ignore_conflicts=True)
+        MovieCrew.objects.bulk_create(movie_crew, ignore_conflicts=True)
+        
+        return movies
+    
     def _map_tmdb_status(self, tmdb_status: str) -> str:
         """Map TMDB status to our model choices"""
         status_mapping = {
@@ -275,22 +849,28 @@ class MovieDataService:
             logger.warning(f"No search results found for query: {query}")
             return []
         
-        synced_movies = []
-        for movie_data in search_results['results'][:max_results]:
-            tmdb_id = movie_data.get('id')
-            if tmdb_id:
-                # Check if already exists
-                existing_movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
-                if existing_movie:
-                    synced_movies.append(existing_movie)
-                else:
-                    synced_movie = self.sync_movie_from_tmdb(tmdb_id)
-                    if synced_movie:
-                        synced_movies.append(synced_movie)
-        
+        synced_movies = self.sync_search_results(search_results['results'], max_results)
         logger.info(f"Synced {len(synced_movies)} movies for query: {query}")
         return synced_movies
     
+    def sync_search_results(self, results: List[Dict], max_results: int = 10,
+                            existing: Optional[Dict[int, Movie]] = None) -> List[Movie]:
+        """
+        Sync the TMDB search hits not stored locally yet; returns the movies of
+        the first ``max_results`` hits in order. ``existing`` maps tmdb_id to
+        movies already looked up (otherwise one IN query does it).
+        """
+        tmdb_ids = [movie_data['id'] for movie_data in results[:max_results] if movie_data.get('id')]
+        if existing is None:
+            existing = Movie.objects.in_bulk(tmdb_ids, field_name='tmdb_id')
+        
+        synced_movies = []
+        for tmdb_id in tmdb_ids:
+            movie = existing.get(tmdb_id) or self.sync_movie_from_tmdb(tmdb_id)
+            if movie:
+                synced_movies.append(movie)
+        return synced_movies
+    
     def sync_genres_from_tmdb(self) -> List[Genre]:
         """Sync genre list from TMDB"""
         logger.info("Syncing genres from TMDB")
@@ -300,20 +880,126 @@ class MovieDataService:
             logger.warning("No genres found in TMDB response")
             return []
         
-        synced_genres = []
-        for genre_info in genre_data['genres']:
-            genre = self._get_or_create_genre(genre_info)
-            synced_genres.append(genre)
+        genres = run_write(self._resolve_genres, self._genre_rows(genre_data['genres']))
+        bump_catalog_version()
+        synced_genres = [genres[genre_info['name']] for genre_info in genre_data['genres']]
         
         logger.info(f"Synced {len(synced_genres)} genres from TMDB")
         return synced_genres
     
-    @staticmethod
-    def update_movie_ratings():
-        """Update movie ratings from external sources"""
-        # TODO: Implement rating update logic for existing movies
-        logger.info("Movie ratings update not yet implemented")
-        pass
+    # Fields refreshed from the changes feed and the TMDB keys they come from
+    RATING_FIELDS = {
+        'popularity_score': 'popularity',
+        'vote_average': 'vote_average',
+        'vote_count': 'vote_count',
+    }
+    CHANGES_STATE_KEY = 'tmdb_movie_changes'
+    # Longest date range TMDB accepts for one changes query
+    CHANGES_MAX_WINDOW = timedelta(days=14)
+    
+    def update_movie_ratings(self, batch_size: int = 500) -> Optional[Dict]:
+        """Refresh ratings of local movies that changed on TMDB since the last run"""
+        state, _ = SyncState.objects.get_or_create(key=self.CHANGES_STATE_KEY)
+        run_started = timezone.now()
+        since = self._changes_watermark(state, run_started)
+        logger.info(f"Updating movie ratings from TMDB changes since {since.date()}")
+        
+        changed_ids = self._fetch_changed_ids(since, run_started)
+        if changed_ids is None:
+            # The watermark stays put so the next run reads the same window again
+            logger.error("Could not read the TMDB changes feed; ratings not updated")
+            return None
+        # Movies whose detail fetch failed last time are retried
+        changed_ids.update(state.value.get('retry_ids', []))
+        
+        stats = {'changed': len(changed_ids), 'local': 0, 'updated': 0, 'failed': 0}
+        failed_ids = []
+        changed_ids = sorted(changed_ids)
+        for start in range(0, len(changed_ids), batch_size):
+            movies = list(
+                Movie.objects.filter(tmdb_id__in=changed_ids[start:start + batch_size])
+                .only('id', 'tmdb_id', *self.RATING_FIELDS)
+            )
+            stats['local'] += len(movies)
+            updated, failed = self._refresh_ratings(movies)
+            stats['updated'] += updated
+            failed_ids.extend(failed)
+        stats['failed'] = len(failed_ids)
+        
+        state.value = {
+            'watermark': run_started.isoformat(),
+            'retry_ids': failed_ids,
+        }
+        state.save()
+        
+        logger.info(
+            f"Movie ratings updated: {stats['updated']} of {stats['local']} local movies "
+            f"({stats['changed']} changed on TMDB, {stats['failed']} failed)"
+        )
+        return stats
+    
+    def _changes_watermark(self, state: SyncState, now: datetime) -> datetime:
+        """Return where the changes feed should be read from"""
+        watermark = state.value.get('watermark')
+        if watermark:
+            return datetime.fromisoformat(watermark)
+        return now - timedelta(days=settings.TMDB_CHANGES_INITIAL_LOOKBACK_DAYS)
+    
+    def _fetch_changed_ids(self, since: datetime, until: datetime) -> Optional[set]:
+        """Collect IDs from every page of the changes feed, in windows of up to 14 days"""
+        changed_ids = set()
+        window_start = since
+        while window_start < until:
+            window_end = min(window_start + self.CHANGES_MAX_WINDOW, until)
+            page, total_pages = 1, 1
+            while page <= total_pages:
+                data = self.tmdb_service.fetch_movie_changes(
+                    window_start.date().isoformat(), window_end.date().isoformat(), page
+                )
+                if data is None:
+                    return None
+                changed_ids.update(
+                    result['id'] for result in data.get('results', [])
+                    if result.get('id') and not result.get('adult')
+                )
+                total_pages = data.get('total_pages') or 1
+                page += 1
+            window_start = window_end
+        return changed_ids
+    
+    def _refresh_ratings(self, movies: List[Movie]) -> Tuple[int, List[int]]:
+        """Fetch current ratings concurrently and bulk_update the movies that differ"""
+        if not movies:
+            return 0, []
+        workers = max(1, min(self.fetch_workers, len(movies)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tmdb-ratings') as executor:
+            details = list(executor.map(
+                # The changes feed says these moved on: a cached body may predate that
+                lambda movie: self.tmdb_service.fetch_movie_summary(movie.tmdb_id, use_cache=False),
+                movies
+            ))
+        
+        now = timezone.now()
+        changed, failed = [], []
+        for movie, movie_data in zip(movies, details):
+            if not movie_data:
+                failed.append(movie.tmdb_id)
+                continue
+            dirty = False
+            for field, tmdb_key in self.RATING_FIELDS.items():
+                value = movie_data.get(tmdb_key)
+                if value is not None and getattr(movie, field) != value:
+                    setattr(movie, field, value)
+                    dirty = True
+            if dirty:
+                # bulk_update does not apply auto_now
+                movie.updated_at = now
+                changed.append(movie)
+        
+        if changed:
+            run_write(Movie.objects.bulk_update, changed, [*self.RATING_FIELDS, 'updated_at'])
+            bump_catalog_version()
+        return len(changed), failed
     
     @staticmethod
     def generate_movie_recommendations(movie_id):
@@ -323,53 +1009,450 @@ class MovieDataService:
         pass
 
 
+def _timed(fn, *args) -> Tuple:
+    """Call ``fn`` and return its result with the seconds it took"""
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
+
+def get_search_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool running the TMDB half of searches"""
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(
+                    max_workers=settings.TMDB_SEARCH_WORKERS, thread_name_prefix='tmdb-search'
+                )
+    return _search_executor
+
+
 class MovieSearchService:
     """Service for enhanced movie search functionality"""
     
     def __init__(self):
-        self.movie_data_service = MovieDataService()
+        # Syncs triggered by searches are opportunistic and yield to admin syncs
+        self.movie_data_service = MovieDataService(priority=PRIORITY_LOW)
         self.tmdb_service = TMDBService()
     
-    def comprehensive_search(self, query: str, include_tmdb: bool = True) -> Dict:
-        """Perform comprehensive movie search combining local and TMDB data"""
+    # Reciprocal rank fusion offset: keeps a single top rank from dominating the merge
+    MERGE_RANK_OFFSET = 60
+    
+    def comprehensive_search(self, query: str, include_tmdb: bool = True,
+                             latency_budget: Optional[float] = None,
+                             page_size: Optional[int] = None) -> Dict:
+        """
+        Search local movies and TMDB concurrently and merge both into one
+        ranked list. TMDB is queried once per search; its hits are matched to
+        stored movies with a single IN lookup and only missing ones are synced.
+        result['next'] holds the cursor state of the following page (search_page).
+        """
         logger.info(f"Performing comprehensive search for: {query}")
+        started = time.perf_counter()
+        page_size = page_size or settings.SEARCH_PAGE_SIZE
         
-        # Search local database first
-        from django.db.models import Q
-        local_movies = Movie.objects.filter(
-            Q(title__icontains=query) |
-            Q(original_title__icontains=query) |
-            Q(overview__icontains=query)
-        ).select_related().prefetch_related('genres', 'production_companies')[:10]
+        # All TMDB calls made by this search share one latency budget
+        if latency_budget is None:
+            latency_budget = settings.TMDB_SEARCH_LATENCY_BUDGET
+        self.tmdb_service.set_latency_budget(latency_budget)
+        self.movie_data_service.tmdb_service.deadline = self.tmdb_service.deadline
         
-        result = {
-            'query': query,
-            'local_results': list(local_movies),
-            'tmdb_results': [],
-            'synced_movies': []
-        }
+        result = self._new_result(query)
         
-        # If we have local results and not including TMDB, return early
-        if local_movies.exists() and not include_tmdb:
-            logger.info(f"Found {local_movies.count()} local results for: {query}")
-            return result
-        
-        # Search TMDB if requested
+        # The TMDB lookup runs on a search thread while the local one runs here
+        tmdb_search = None
         if include_tmdb:
-            tmdb_results = self.tmdb_service.search_movies(query)
-            if tmdb_results and tmdb_results.get('results'):
-                result['tmdb_results'] = tmdb_results['results'][:10]
-                
-                # If no local results, sync some movies from TMDB
-                if not local_movies.exists():
-                    logger.info(f"No local results found, syncing from TMDB for: {query}")
-                    synced_movies = self.movie_data_service.search_and_sync_movies(query, max_results=5)
-                    result['synced_movies'] = synced_movies
+            if self.tmdb_service.is_available():
+                tmdb_search = get_search_executor().submit(_timed, self.tmdb_service.search_movies, query)
+            else:
+                # Serve local-only results straight away while TMDB is unhealthy
+                logger.warning(f"TMDB unavailable, returning local results only for: {query}")
+                result['degraded'] = True
+        
+        # Full-text index, best matches first
+        state = self.first_page_state(include_tmdb)
+        result['local_results'], seconds = _timed(self._next_local_matches, query, state, page_size)
+        result['timings']['local_ms'] = round(seconds * 1000, 1)
+        
+        # No full-text hits: look for misspelled titles we already have
+        if not result['local_results']:
+            fuzzy, seconds = _timed(fuzzy_search_movies, query, page_size)
+            result['timings']['fuzzy_ms'] = round(seconds * 1000, 1)
+            if fuzzy:
+                result['local_results'] = [movie for movie, _ in fuzzy]
+                result['fuzzy_matches'] = {str(movie.id): score for movie, score in fuzzy}
+                prefetch_related_objects(result['local_results'], 'genres', 'production_companies')
+                if fuzzy[0][1] >= settings.SEARCH_FUZZY_SERVE_SIMILARITY:
+                    # Not waited for; its response still lands in the TMDB cache
+                    logger.info(f"Serving {len(fuzzy)} fuzzy local results for: {query}")
+                    tmdb_search = None
         
+        # TMDB hits not fetched here are read from the first result page later on
+        tmdb_hits, tmdb_position = [], [1, 0] if include_tmdb else None
+        if tmdb_search is not None:
+            try:
+                tmdb_response, seconds = tmdb_search.result(timeout=latency_budget or None)
+                result['timings']['tmdb_ms'] = round(seconds * 1000, 1)
+                if tmdb_response:
+                    tmdb_hits = (tmdb_response.get('results') or [])[:page_size]
+                    tmdb_position = self._tmdb_position(1, len(tmdb_hits), tmdb_response)
+            except FuturesTimeoutError:
+                logger.warning(f"TMDB search exceeded the latency budget for: {query}")
+                result['degraded'] = True
+        
+        merge_started = time.perf_counter()
+        stored = self._merge_results(result, tmdb_hits)
+        result['timings']['merge_ms'] = round((time.perf_counter() - merge_started) * 1000, 1)
+        
+        # If no local results, sync some movies from TMDB
+        if tmdb_hits and not result['local_results']:
+            if settings.TMDB_SYNC_IN_BACKGROUND:
+                result['queued_syncs'] = self._queue_syncs([
+                    movie_data['id'] for movie_data in tmdb_hits[:5]
+                    if movie_data.get('id') and movie_data['id'] not in stored
+                ])
+            else:
+                logger.info(f"No local results found, syncing from TMDB for: {query}")
+                result['synced_movies'], seconds = _timed(
+                    self.movie_data_service.sync_search_results, tmdb_hits, 5, stored
+                )
+                result['timings']['sync_ms'] = round(seconds * 1000, 1)
+                # Synced hits are local movies now
+                synced = {movie.tmdb_id: movie for movie in result['synced_movies']}
+                for entry in result['merged']:
+                    if entry['movie'] is None and entry['tmdb']['id'] in synced:
+                        entry['movie'] = synced[entry['tmdb']['id']]
+                result['tmdb_results'] = [
+                    movie_data for movie_data in result['tmdb_results'] if movie_data['id'] not in synced
+                ]
+        
+        # Later pages continue after the last local match and the last TMDB hit
+        # served; stored movies shown on this page are not repeated
+        result['next'] = self._next_state(query, {
+            'local': state['local'],
+            'local_seen': len(result['local_results']),
+            'tmdb': tmdb_position,
+            'tmdb_seen': len(tmdb_hits),
+            'skip': [entry['movie'].tmdb_id for entry in result['merged'] if entry['movie'] and entry['movie'].tmdb_id],
+        })
+        
+        result['degraded'] = (
+            result['degraded'] or self.tmdb_service.degraded or self.movie_data_service.tmdb_service.degraded
+        )
+        result['timings']['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
         logger.info(f"Search completed for: {query}. Local: {len(result['local_results'])}, "
-                   f"TMDB: {len(result['tmdb_results'])}, Synced: {len(result['synced_movies'])}")
+                   f"TMDB: {len(result['tmdb_results'])}, Synced: {len(result['synced_movies'])}, "
+                   f"Queued: {len(result['queued_syncs'])}, {result['timings']['total_ms']}ms")
+        return result
+    
+    def _merge_results(self, result: Dict, tmdb_hits: List[Dict]) -> Dict[int, Movie]:
+        """
+        Fuse the local and TMDB rankings into result['merged'] (reciprocal rank
+        fusion, so movies both sources found rise to the top). TMDB hits already
+        stored locally count as local movies; the rest become
+        result['tmdb_results']. Returns the stored hits by tmdb_id.
+        """
+        stored = {movie.tmdb_id: movie for movie in result['local_results'] if movie.tmdb_id}
+        missing = [movie_data['id'] for movie_data in tmdb_hits if movie_data.get('id') not in stored]
+        if missing:
+            found = Movie.objects.in_bulk(missing, field_name='tmdb_id')
+            prefetch_related_objects(list(found.values()), 'genres', 'production_companies')
+            stored.update(found)
+        
+        entries = {}
+        for rank, movie in enumerate(result['local_results'], start=1):
+            entries[movie.id] = {
+                'source': 'local', 'movie': movie, 'tmdb': None,
+                'score': 1 / (self.MERGE_RANK_OFFSET + rank),
+            }
+        for rank, movie_data in enumerate(tmdb_hits, start=1):
+            if not movie_data.get('id'):
+                continue
+            movie = stored.get(movie_data['id'])
+            key = movie.id if movie else f"tmdb:{movie_data['id']}"
+            entry = entries.setdefault(key, {'source': 'tmdb', 'movie': movie, 'tmdb': None, 'score': 0.0})
+            if entry['tmdb'] is not None:
+                continue
+            if entry['source'] == 'local':
+                entry['source'] = 'both'
+            entry['tmdb'] = movie_data
+            entry['score'] += 1 / (self.MERGE_RANK_OFFSET + rank)
+        
+        result['merged'] = sorted(entries.values(), key=lambda entry: -entry['score'])
+        result['tmdb_results'] = [
+            movie_data for movie_data in tmdb_hits
+            if movie_data.get('id') and movie_data['id'] not in stored
+        ]
+        return stored
+    
+    def search_page(self, query: str, state: Dict, page_size: Optional[int] = None,
+                    latency_budget: Optional[float] = None) -> Dict:
+        """
+        Serve a page after the first: local matches continue from the cursor's
+        snapshot of the relevance order, and once they run out the page is
+        filled with TMDB hits, fetching further TMDB result pages only then.
+        Entries keep stream order (local matches first).
+        """
+        logger.info(f"Serving search page for: {query}")
+        started = time.perf_counter()
+        page_size = page_size or settings.SEARCH_PAGE_SIZE
+        if latency_budget is None:
+            latency_budget = settings.TMDB_SEARCH_LATENCY_BUDGET
+        self.tmdb_service.set_latency_budget(latency_budget)
+        
+        state = dict(state)
+        result = self._new_result(query)
+        
+        if state['local'] is not None:
+            result['local_results'], seconds = _timed(self._next_local_matches, query, state, page_size)
+            result['timings']['local_ms'] = round(seconds * 1000, 1)
+        
+        tmdb_hits, stored = [], {}
+        remaining = page_size - len(result['local_results'])
+        if remaining and state['tmdb'] is not None:
+            if self.tmdb_service.is_available():
+                (tmdb_hits, stored), seconds = _timed(self._next_tmdb_hits, query, state, remaining)
+                result['timings']['tmdb_ms'] = round(seconds * 1000, 1)
+            else:
+                result['degraded'] = True
+        
+        result['merged'] = [
+            {'source': 'local', 'movie': movie, 'tmdb': None, 'score': 1 / (self.MERGE_RANK_OFFSET + rank)}
+            for rank, movie in enumerate(result['local_results'], start=state['local_seen'] + 1)
+        ] + [
+            {
+                'source': 'tmdb', 'movie': stored.get(movie_data['id']), 'tmdb': movie_data,
+                'score': 1 / (self.MERGE_RANK_OFFSET + rank),
+            }
+            for rank, movie_data in tmdb_hits
+        ]
+        result['tmdb_results'] = [movie_data for _, movie_data in tmdb_hits if movie_data['id'] not in stored]
+        state['local_seen'] += len(result['local_results'])
+        result['next'] = self._next_state(query, state)
+        
+        result['degraded'] = result['degraded'] or self.tmdb_service.degraded
+        result['timings']['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
         return result
     
+    def _next_local_matches(self, query: str, state: Dict, page_size: int) -> List[Movie]:
+        """
+        Read up to ``page_size`` local matches from the cursor's position and
+        advance it. The first page ranks the matches once and keeps their ids
+        (up to SEARCH_SNAPSHOT_MAX_RESULTS) in the cache under a key carried by
+        the cursor; later pages read that snapshot instead of re-ranking, as
+        BM25 scores move whenever movies are written. Movies in the cursor's
+        skip list (already served as TMDB hits) are left out.
+        """
+        if not state['local']:
+            ranked = [
+                movie_id.hex for movie_id in
+                search_movies(Movie.objects.all(), query).values_list('id', flat=True)[
+                    :settings.SEARCH_SNAPSHOT_MAX_RESULTS
+                ]
+            ]
+            snapshot, offset = None, 0
+        else:
+            snapshot, offset = state['local']['snapshot'], state['local']['offset']
+            ranked = caches[settings.SEARCH_CACHE_ALIAS].get(snapshot) or []
+
+        # Skipped movies are the only ones a window can lose (besides deleted ones)
+        window = ranked[offset:offset + page_size + len(state['skip'])]
+        movies = {
+            movie.id.hex: movie
+            for movie in Movie.objects.filter(id__in=window).exclude(tmdb_id__in=state['skip'])
+            .select_related().prefetch_related('genres', 'production_companies')
+        }
+        page, consumed = [], 0
+        for movie_id in window:
+            if len(page) == page_size:
+                break
+            consumed += 1
+            if movie_id in movies:
+                page.append(movies[movie_id])
+        offset += consumed
+
+        if offset >= len(ranked):
+            state['local'] = None
+        else:
+            if snapshot is None:
+                snapshot = f"movies:search:snapshot:{uuid.uuid4().hex}"
+                caches[settings.SEARCH_CACHE_ALIAS].set(snapshot, ranked, settings.SEARCH_CURSOR_MAX_AGE)
+            state['local'] = {'snapshot': snapshot, 'offset': offset}
+        return page
+    
+    def _next_tmdb_hits(self, query: str, state: Dict, limit: int) -> Tuple[List[Tuple[int, Dict]], Dict[int, Movie]]:
+        """
+        Read TMDB hits from the cursor's position until ``limit`` new ones are
+        found, fetching at most SEARCH_MAX_TMDB_PAGES_PER_REQUEST result pages,
+        and advance the cursor. Hits already served as local matches are
+        skipped. Returns (absolute rank, hit) pairs and the stored hits by tmdb_id.
+        """
+        hits, stored = [], {}
+        for _ in range(settings.SEARCH_MAX_TMDB_PAGES_PER_REQUEST):
+            page, offset = state['tmdb']
+            response = self.tmdb_service.search_movies(query, page=page)
+            if not response:
+                # Failed or over budget: the cursor stays put so the next request retries
+                break
+            page_hits = (response.get('results') or [])[offset:]
+            tmdb_ids = [movie_data['id'] for movie_data in page_hits if movie_data.get('id')]
+            found = Movie.objects.in_bulk(tmdb_ids, field_name='tmdb_id') if tmdb_ids else {}
+            served = set(state['skip'])
+            if found:
+                served.update(search_movies(
+                    Movie.objects.filter(tmdb_id__in=list(found)), query
+                ).values_list('tmdb_id', flat=True))
+            
+            for movie_data in page_hits:
+                offset += 1
+                state['tmdb_seen'] += 1
+                tmdb_id = movie_data.get('id')
+                if not tmdb_id or tmdb_id in served:
+                    continue
+                hits.append((state['tmdb_seen'], movie_data))
+                if tmdb_id in found:
+                    stored[tmdb_id] = found[tmdb_id]
+                if len(hits) == limit:
+                    break
+            state['tmdb'] = self._tmdb_position(page, offset, response)
+            if state['tmdb'] is None or len(hits) == limit:
+                break
+        if stored:
+            prefetch_related_objects(list(stored.values()), 'genres', 'production_companies')
+        return hits, stored
+    
+    @staticmethod
+    def _tmdb_position(page: int, offset: int, response: Dict) -> Optional[List[int]]:
+        """Position after ``offset`` hits of TMDB result page ``page`` (None past the last page)"""
+        if offset < len(response.get('results') or []):
+            return [page, offset]
+        if page < (response.get('total_pages') or 0):
+            return [page + 1, 0]
+        return None
+    
+    @staticmethod
+    def _next_state(query: str, state: Dict) -> Optional[Dict]:
+        """Cursor state of the next page, or None when both sources are exhausted"""
+        if state['local'] is None and state['tmdb'] is None:
+            return None
+        return {**state, 'q': normalize(query)}
+    
+    @staticmethod
+    def _new_result(query: str) -> Dict:
+        return {
+            'query': query,
+            'local_results': [],
+            'fuzzy_matches': {},
+            'tmdb_results': [],
+            'merged': [],
+            'synced_movies': [],
+            'queued_syncs': [],
+            'timings': {},
+            'next': None,
+            'degraded': False
+        }
+    
+    # Salt of the signed cursors of paginated searches
+    CURSOR_SALT = 'movies.search.cursor'
+    
+    def first_page_state(self, include_tmdb: bool) -> Dict:
+        """Cursor state of a search's first page (local matches from the top)"""
+        return {'local': [], 'local_seen': 0, 'tmdb': [1, 0] if include_tmdb else None, 'tmdb_seen': 0, 'skip': []}
+    
+    def make_cursor(self, state: Dict) -> str:
+        """Sign a page's cursor state so clients can request the next page"""
+        return signing.dumps(state, salt=self.CURSOR_SALT, compress=True)
+    
+    def read_cursor(self, cursor: str, query: str) -> Optional[Dict]:
+        """
+        Return the state of a cursor, or None if invalid, expired, issued for
+        another query or its snapshot of local matches was evicted
+        """
+        try:
+            state = signing.loads(cursor, salt=self.CURSOR_SALT, max_age=settings.SEARCH_CURSOR_MAX_AGE)
+        except signing.BadSignature:
+            return None
+        if state.get('q') != normalize(query):
+            return None
+        if state['local'] and caches[settings.SEARCH_CACHE_ALIAS].get(state['local']['snapshot']) is None:
+            return None
+        return state
+    
+    def _queue_syncs(self, tmdb_ids: List[int]) -> List[int]:
+        """Queue background syncs for search hits not stored locally yet"""
+        for tmdb_id in tmdb_ids:
+            enqueue('movies.sync_movie', {'tmdb_id': tmdb_id}, dedupe_key=f"sync_movie:{tmdb_id}")
+        return tmdb_ids
+    
+    # Salt of the signed tokens handed out for deferred search syncs
+    SYNC_TOKEN_SALT = 'movies.search.deferred_sync'
+    
+    def summarize_tmdb_result(self, movie_data: Dict) -> Dict:
+        """Reduce a TMDB search hit to the fields a result list needs"""
+        return {
+            'tmdb_id': movie_data.get('id'),
+            'title': movie_data.get('title', ''),
+            'original_title': movie_data.get('original_title', ''),
+            'release_date': movie_data.get('release_date') or None,
+            'overview': movie_data.get('overview', ''),
+            'poster_url': self.tmdb_service._build_image_url(
+                movie_data.get('poster_path', ''), 'poster'
+            ) if movie_data.get('poster_path') else '',
+            'popularity_score': movie_data.get('popularity'),
+            'vote_average': movie_data.get('vote_average'),
+            'vote_count': movie_data.get('vote_count'),
+        }
+    
+    def make_sync_token(self, tmdb_ids: List[int]) -> str:
+        """Sign the IDs of a search's queued syncs so clients can poll for them"""
+        return signing.dumps(
+            {'ids': tmdb_ids, 'queued_at': timezone.now().timestamp()},
+            salt=self.SYNC_TOKEN_SALT, compress=True
+        )
+    
+    def get_synced_results(self, token: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Return the movies of a deferred sync that are stored so far, waiting up
+        to ``wait`` seconds for the rest. Returns None for an invalid or expired token.
+        """
+        try:
+            data = signing.loads(token, salt=self.SYNC_TOKEN_SALT, max_age=settings.SEARCH_SYNC_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            return None
+        tmdb_ids = data['ids']
+        queued_at = datetime.fromtimestamp(data['queued_at'], tz=timezone.get_current_timezone())
+        
+        # NaN would never reach the deadline
+        wait = wait if math.isfinite(wait) else 0
+        deadline = time.monotonic() + min(max(wait, 0), settings.SEARCH_SYNC_MAX_WAIT)
+        while True:
+            movies = {
+                movie.tmdb_id: movie
+                for movie in Movie.objects.filter(tmdb_id__in=tmdb_ids).prefetch_related('genres')
+            }
+            # Syncs that gave up (dead jobs) will not produce a movie
+            failed = set(
+                int(key.rsplit(':', 1)[1]) for key in BackgroundJob.objects.filter(
+                    dedupe_key__in=[f"sync_movie:{tmdb_id}" for tmdb_id in tmdb_ids if tmdb_id not in movies],
+                    status='dead', finished_at__gte=queued_at
+                ).values_list('dedupe_key', flat=True)
+            )
+            pending = [tmdb_id for tmdb_id in tmdb_ids if tmdb_id not in movies and tmdb_id not in failed]
+            if not pending or time.monotonic() >= deadline:
+                break
+            time.sleep(settings.SEARCH_SYNC_POLL_INTERVAL)
+        
+        return {
+            'complete': not pending,
+            'movies': [movies[tmdb_id] for tmdb_id in tmdb_ids if tmdb_id in movies],
+            'pending_tmdb_ids': pending,
+            'failed_tmdb_ids': sorted(failed),
+        }
+    
     def get_trending_movies(self) -> List[Movie]:
         """Get trending movies based on popularity and recent additions"""
         # TODO: Implement more sophisticated trending algorithm
@@ -1,38 +1,59 @@
 """
-Celery tasks for movies app.
-This file will contain asynchronous tasks for movie data processing.
+Background tasks for movies app.
+Each function is a job handler for the database-backed queue in jobs.py;
+queue one with jobs.enqueue('<name>', {...kwargs}) and run `manage.py run_workers`.
+Handlers return a JSON-serializable result and raise to request a retry.
 """
 
-# TODO: Implement Celery tasks when Celery is configured
-
-# Example task structure (commented out until Celery is set up):
-
-# from celery import shared_task
-# from .services import TMDBService, MovieDataService
-
-# @shared_task
-# def sync_movie_data_from_tmdb(tmdb_id):
-#     """Async task to sync movie data from TMDB"""
-#     service = TMDBService()
-#     return service.fetch_movie_data(tmdb_id)
-
-# @shared_task  
-# def update_all_movie_ratings():
-#     """Async task to update all movie ratings"""
-#     return MovieDataService.update_movie_ratings()
-
-# @shared_task
-# def generate_movie_recommendations_batch():
-#     """Async task to generate recommendations for all movies"""
-#     # TODO: Implement batch recommendation generation
-#     pass
-
-# @shared_task
-# def cleanup_old_movie_data():
-#     """Async task to cleanup old or unused movie data"""
-#     # TODO: Implement cleanup logic
-#     pass
-
-def placeholder_task():
-    """Placeholder function until Celery is configured"""
-    pass
+from .batch import BatchSyncRunner
+from .jobs import job, PermanentJobError
+from .ratelimit import PRIORITY_NORMAL, PRIORITY_BATCH
+from .services import MovieDataService
+
+
+@job('movies.sync_movie')
+def sync_movie(tmdb_id, refresh=False, priority=PRIORITY_NORMAL):
+    """Sync (or refresh) one movie from TMDB"""
+    service = MovieDataService(priority=priority)
+    movie = service.sync_movie_from_tmdb(int(tmdb_id), update_existing=refresh)
+    if movie is None:
+        if f"movie/{int(tmdb_id)}" in service.tmdb_service.not_found:
+            # Retrying cannot make a movie TMDB does not have appear
+            raise PermanentJobError(f"Movie not found on TMDB: {tmdb_id}")
+        raise RuntimeError(f"Failed to sync movie with TMDB ID: {tmdb_id}")
+    return {
+        'movie_id': str(movie.id),
+        'title': movie.title,
+        'timings': service.last_sync_timings,
+        'changes': service.last_sync_changes,
+    }
+
+
+@job('movies.sync_movies', lease_seconds=3600)
+def sync_movies(tmdb_ids, workers=8, batch_size=50):
+    """Sync a list of movies through the batch pipeline"""
+    if not tmdb_ids:
+        raise PermanentJobError('No TMDB IDs given')
+    runner = BatchSyncRunner(
+        MovieDataService(priority=PRIORITY_BATCH), workers=workers, batch_size=batch_size
+    )
+    stats = runner.run(int(tmdb_id) for tmdb_id in tmdb_ids)
+    return {**stats.counts, 'seconds': round(stats.elapsed, 3)}
+
+
+@job('movies.sync_genres')
+def sync_genres():
+    """Sync the genre list from TMDB"""
+    genres = MovieDataService(priority=PRIORITY_NORMAL).sync_genres_from_tmdb()
+    if not genres:
+        raise RuntimeError('No genres synced from TMDB')
+    return {'genres': len(genres)}
+
+
+@job('movies.update_movie_ratings', lease_seconds=3600)
+def update_movie_ratings():
+    """Refresh ratings of movies changed on TMDB since the last run"""
+    stats = MovieDataService(priority=PRIORITY_BATCH).update_movie_ratings()
+    if stats is None:
+        raise RuntimeError('Could not read the TMDB changes feed')
+    return stats
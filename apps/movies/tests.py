@@ -1,3 +1,1621 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import F, QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import (
+    Movie, Genre, ProductionCompany, Person,
+    MovieGenre, MovieProductionCompany, MovieCast, MovieCrew, BackgroundJob, SyncClaim, SyncState
+)
+from . import jobs
+from .admin import BackgroundJobAdmin
+from .autocomplete import TitleIndex
+from .circuit_breaker import CircuitBreaker
+from .coalescing import SingleFlight, SingleFlightTimeout, is_claimed, sync_claim, tmdb_requests
+from .facets import get_facets
+from .ratelimit import PRIORITY_HIGH, PRIORITY_LOW, RateLimitExceeded, SharedTokenBucket
+from .search_index import ensure_search_index, fuzzy_search_movies, search_movies
+from .services import MovieDataService, MovieSearchService, TMDBService
+from .tmdb_cache import TMDBResponseCache
+from .tmdb_standin import make_server
+from .tmdb_transport import (
+    NOT_FOUND_BODY, FixtureStore, HTTPTransport, RecordingTransport, ReplayTransport, build_response
+)
+from .transaction_stats import TransactionStats
+from .write_queue import WriteQueue, WriteQueueTimeout, run_timed_write
+
+
+def make_movie_payload(tmdb_id, cast_size=5):
+    """Build a TMDB-shaped movie payload with the given number of cast members"""
+    return {
+        'id': tmdb_id,
+        'title': f'Movie {tmdb_id}',
+        'original_title': f'Movie {tmdb_id}',
+        'overview': 'Overview',
+        'release_date': '2020-05-01',
+        'runtime': 120,
+        'status': 'Released',
+        'popularity': 12.5,
+        'vote_average': 7.1,
+        'vote_count': 1500,
+        'genres': [{'id': 18, 'name': 'Drama'}, {'id': 53, 'name': 'Thriller'}],
+        'production_companies': [
+            {'id': 1, 'name': 'Studio One', 'logo_path': '/one.png', 'origin_country': 'US'},
+            {'id': 2, 'name': 'Studio Two', 'logo_path': None, 'origin_country': 'GB'},
+        ],
+        'credits': {
+            'cast': [
+                {'id': 1000 + i, 'name': f'Actor {i}', 'character': f'Role {i}', 'order': i}
+                for i in range(cast_size)
+            ],
+            'crew': [
+                {'id': 900, 'name': 'Director', 'job': 'Director', 'department': 'Directing'},
+                {'id': 901, 'name': 'Writer', 'job': 'Screenplay', 'department': 'Writing'},
+                # Not a key job, must be skipped
+                {'id': 902, 'name': 'Grip', 'job': 'Key Grip', 'department': 'Crew'},
+                # Same person credited twice with different jobs
+                {'id': 900, 'name': 'Director', 'job': 'Writer', 'department': 'Writing'},
+            ],
+        },
+        'external_ids': {'imdb_id': f'tt{tmdb_id:07d}'},
+    }
+
+
+def write_payloads(service, payloads):
+    """Plan and write TMDB payloads the way the batch pipeline does"""
+    return service.write_import_plans({
+        tmdb_id: service.build_import_plan(tmdb_id, payload)
+        for tmdb_id, payload in payloads.items()
+    })
+
+
+class FakeTransport:
+    """
+    Serves canned TMDB responses by endpoint and records every request. A
+    response is a body, a (status, body[, headers]) tuple, or a callable of
+    (params, headers) returning either.
+    """
+
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.requests = []
+        self.retries = []
+
+    def get(self, endpoint, url, params, headers, timeout, retries=True):
+        self.requests.append((endpoint, dict(params), dict(headers)))
+        self.retries.append(retries)
+        response = self.responses.get(endpoint, (404, NOT_FOUND_BODY))
+        if callable(response):
+            response = response(params, headers)
+        if not isinstance(response, tuple):
+            response = (200, response)
+        return build_response(url, *response)
+
+    def endpoints(self):
+        return [endpoint for endpoint, _, _ in self.requests]
+
+
+def make_offline_service(service, transport, cache=True):
+    """Point a TMDBService at a fake transport, with a private cache and no limiter or breaker"""
+    service.transport = transport
+    service.cache = TMDBResponseCache(
+        max_entries=100, max_bytes=1024 * 1024, ttls={'movie/*': 3600},
+        default_ttl=60, stale_grace=3600
+    ) if cache else None
+    service.rate_limiter = None
+    service.breaker = None
+    return service
+
+
+class TMDBHTTPTransportTests(TestCase):
+    """Tests for the pooled session's retry configuration"""
+
+    def retry_of(self, session):
+        return session.get_adapter(settings.TMDB_BASE_URL).max_retries
+
+    @override_settings(
+        TMDB_HTTP_MAX_RETRIES=4, TMDB_HTTP_BACKOFF_FACTOR=0.25, TMDB_HTTP_BACKOFF_MAX=8,
+        TMDB_HTTP_POOL_MAXSIZE=12,
+    )
+    def test_session_retries_transient_failures_with_backoff(self):
+        session = HTTPTransport._build_session()
+        self.addCleanup(session.close)
+        retry = self.retry_of(session)
+
+        self.assertEqual((retry.total, retry.connect, retry.read, retry.status), (4, 4, 4, 4))
+        self.assertEqual(set(retry.status_forcelist), {429, 500, 502, 503, 504})
+        self.assertEqual(retry.allowed_methods, frozenset(['GET', 'HEAD']))
+        self.assertEqual((retry.backoff_factor, retry.backoff_max), (0.25, 8))
+        self.assertTrue(retry.respect_retry_after_header)
+        # The last response is returned instead of raising, so callers see its status
+        self.assertFalse(retry.raise_on_status)
+        self.assertEqual(session.get_adapter(settings.TMDB_BASE_URL)._pool_maxsize, 12)
+
+    def test_session_without_retries(self):
+        session = HTTPTransport._build_session(retries=False)
+        self.addCleanup(session.close)
+        self.assertEqual(self.retry_of(session).total, 0)
+
+    def test_sessions_are_shared_per_retry_mode(self):
+        self.addCleanup(HTTPTransport.close_sessions)
+        self.assertIs(HTTPTransport.get_session(), HTTPTransport.get_session(True))
+        self.assertIs(TMDBService.get_session(), HTTPTransport.get_session())
+        self.assertIsNot(HTTPTransport.get_session(True), HTTPTransport.get_session(False))
+
+    def test_budgeted_requests_are_not_retried(self):
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/1': {'id': 1}}), cache=False)
+        tmdb.fetch_movie_data(1)
+        tmdb.set_latency_budget(5)
+        tmdb.fetch_movie_data(1)
+        self.assertEqual(tmdb.transport.retries, [True, False])
+
+
+class CompanyFanOutTests(TestCase):
+    """Missing production company details are fetched concurrently before the write"""
+
+    LOGOS = {1: '/one.png', 2: '/two.png'}
+
+    def setUp(self):
+        self.service = MovieDataService()
+        self.payload = make_movie_payload(700)
+        self.payload['production_companies'] = [
+            {'id': 1, 'name': 'Studio One'}, {'id': 2, 'name': 'Studio Two'}, {'id': 3, 'name': 'Studio Three'},
+        ]
+        self.arrived = threading.Barrier(2, timeout=2)
+        self.concurrent = []
+        tmdb = self.service.tmdb_service
+        for patcher in [
+            mock.patch.object(tmdb, 'fetch_movie_data', return_value=self.payload),
+            mock.patch.object(tmdb, 'fetch_production_company', side_effect=self.fetch_company),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fetch_company(self, company_id):
+        if company_id not in self.LOGOS:
+            return None
+        # Two fetches must be in flight at once to pass the barrier
+        try:
+            self.arrived.wait()
+            self.concurrent.append(company_id)
+        except threading.BrokenBarrierError:
+            pass
+        return {'id': company_id, 'logo_path': self.LOGOS[company_id], 'origin_country': 'US'}
+
+    def test_company_details_are_fetched_concurrently(self):
+        movie = self.service.sync_movie_from_tmdb(700)
+
+        self.assertEqual(sorted(self.concurrent), [1, 2])
+        self.assertEqual(
+            dict(movie.production_companies.values_list('name', 'logo_url')),
+            {
+                'Studio One': 'https://image.tmdb.org/t/p/w500/one.png',
+                'Studio Two': 'https://image.tmdb.org/t/p/w500/two.png',
+                # Its fetch failed; the movie is still written with what the movie payload had
+                'Studio Three': '',
+            }
+        )
+        self.assertIn('fetch_companies', self.service.last_sync_timings)
+
+    def test_known_company_details_are_not_fetched(self):
+        self.payload['production_companies'] = [{'id': 1, 'name': 'Studio One', 'logo_path': None}]
+        self.service.sync_movie_from_tmdb(700)
+        self.service.tmdb_service.fetch_production_company.assert_not_called()
+
+
+class TMDBResponseCacheTests(TestCase):
+    """Tests for per-endpoint TTLs, LRU bounds and conditional revalidation"""
+
+    def make_cache(self, **options):
+        return TMDBResponseCache(**{
+            'max_entries': 3, 'max_bytes': 1024, 'ttls': {'movie/changes': 600, 'movie/*': 3600},
+            'default_ttl': 60, 'stale_grace': 3600, **options,
+        })
+
+    def test_ttl_per_endpoint(self):
+        cache = self.make_cache()
+        # Exact entries win over patterns that also match
+        self.assertEqual(cache.ttl_for('movie/changes'), 600)
+        self.assertEqual(cache.ttl_for('/movie/550/'), 3600)
+        self.assertEqual(cache.ttl_for('search/movie'), 60)
+
+    def test_entries_expire_after_their_ttl(self):
+        cache = self.make_cache()
+        cache.store('movie/550?', b'{}', 3600)
+        cache.store('search/movie?', b'{}', 0)
+        self.assertTrue(cache.lookup('movie/550?').is_fresh)
+        self.assertIsNone(cache.lookup('search/movie?'))
+
+        with mock.patch('apps.movies.tmdb_cache.time.time', return_value=time.time() + 3601):
+            self.assertFalse(cache.lookup('movie/550?').is_fresh)
+        self.assertEqual(
+            {name: cache.stats()[name] for name in ('hits', 'misses', 'stale')},
+            {'hits': 1, 'misses': 1, 'stale': 1}
+        )
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.make_cache()
+        for key in 'abc':
+            cache.store(key, b'{}', 60)
+        cache.lookup('a')
+        cache.store('d', b'{}', 60)
+        self.assertIsNone(cache.lookup('b'))
+        self.assertEqual(set(cache._entries), {'a', 'c', 'd'})
+
+        # The byte bound holds too; bodies larger than it are not cached at all
+        cache.store('e', b'x' * 1023, 60)
+        self.assertEqual(list(cache._entries), ['e'])
+        cache.store('f', b'x' * 2000, 60)
+        self.assertIsNone(cache.lookup('f'))
+        self.assertEqual(cache.stats()['evictions'], 4)
+
+    def test_persistent_alias_survives_a_new_process(self):
+        caches['default'].clear()
+        self.make_cache(persistent_alias='default').store('movie/550?', b'{"id": 550}', 3600)
+        entry = self.make_cache(persistent_alias='default').lookup('movie/550?')
+        self.assertEqual(entry.json(), {'id': 550})
+
+    def test_stale_entry_is_revalidated_with_its_etag(self):
+        def respond(params, headers):
+            if headers.get('If-None-Match') == '"v1"':
+                return (304, None, {'ETag': '"v1"'})
+            return (200, {'id': 550, 'title': 'Fight Club'}, {'ETag': '"v1"'})
+
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/550': respond}))
+        self.assertEqual(tmdb.fetch_movie_data(550)['title'], 'Fight Club')
+        # Fresh: served without a request
+        self.assertEqual(tmdb.fetch_movie_data(550)['title'], 'Fight Club')
+        self.assertEqual(len(tmdb.transport.requests), 1)
+
+        for entry in tmdb.cache._entries.values():
+            entry.expires_at = 0
+        self.assertEqual(tmdb.fetch_movie_data(550)['title'], 'Fight Club')
+        self.assertEqual(tmdb.transport.requests[1][2]['If-None-Match'], '"v1"')
+        self.assertEqual(tmdb.cache.stats()['revalidated'], 1)
+        self.assertTrue(next(iter(tmdb.cache._entries.values())).is_fresh)
+
+
+class TokenBucketTests(TestCase):
+    """Tests for the host-wide TMDB token bucket and its priorities"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ratelimit.sqlite3')
+
+    def make_bucket(self, rate=0.001, burst=3, max_wait=0.0):
+        return SharedTokenBucket(
+            self.path, rate=rate, burst=burst,
+            max_wait={PRIORITY_HIGH: max_wait, PRIORITY_LOW: max_wait},
+            reserve={PRIORITY_HIGH: 0, PRIORITY_LOW: 2},
+        )
+
+    def test_lower_priorities_leave_a_reserve(self):
+        bucket = self.make_bucket()
+        bucket.acquire(PRIORITY_LOW)
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire(PRIORITY_LOW)
+        # The reserve is still there for high priority callers
+        bucket.acquire(PRIORITY_HIGH)
+        bucket.acquire(PRIORITY_HIGH)
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire(PRIORITY_HIGH)
+        self.assertEqual((bucket.stats()['acquired'], bucket.stats()['rejected']), (3, 2))
+
+    def test_queued_higher_priority_callers_go_first(self):
+        bucket = self.make_bucket(burst=10)
+        conn = bucket._connection()
+        waiter_id = conn.execute(
+            'INSERT INTO waiters (name, rank, expires_at) VALUES (?, 0, ?)', (bucket.name, time.time() + 60)
+        ).lastrowid
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire(PRIORITY_LOW)
+
+        bucket._remove_waiter(waiter_id)
+        bucket.acquire(PRIORITY_LOW)
+
+    def test_tokens_refill_while_callers_queue(self):
+        bucket = self.make_bucket(rate=20, burst=1, max_wait=1.0)
+        bucket.acquire(PRIORITY_HIGH)
+        started = time.monotonic()
+        bucket.acquire(PRIORITY_HIGH)
+        self.assertGreater(time.monotonic() - started, 0.02)
+        self.assertGreater(bucket.stats()['waited_seconds'], 0)
+
+    def test_processes_share_one_bucket(self):
+        first, second = self.make_bucket(), self.make_bucket()
+        first.acquire(PRIORITY_HIGH)
+        second.acquire(PRIORITY_HIGH)
+        first.acquire(PRIORITY_HIGH)
+        with self.assertRaises(RateLimitExceeded):
+            second.acquire(PRIORITY_HIGH)
+
+    def test_throttled_request_degrades_instead_of_failing(self):
+        tmdb = make_offline_service(TMDBService(priority=PRIORITY_LOW), FakeTransport({'movie/1': {'id': 1}}))
+        tmdb.rate_limiter = self.make_bucket(burst=2)
+
+        self.assertIsNone(tmdb.fetch_movie_data(1))
+        self.assertTrue(tmdb.degraded)
+        self.assertEqual(tmdb.transport.requests, [])
+
+
+class CircuitBreakerTests(TestCase):
+    """Tests for breaker state transitions and how TMDBService reacts to them"""
+
+    def make_breaker(self, **options):
+        return CircuitBreaker(**{
+            'name': 'test', 'window': 4, 'min_calls': 4, 'failure_rate': 0.5,
+            'slow_call_seconds': 1.0, 'reset_timeout': 30, **options,
+        })
+
+    def open_breaker(self, breaker):
+        for _ in range(breaker.min_calls):
+            breaker.record_failure()
+
+    def test_opens_once_enough_calls_are_bad(self):
+        breaker = self.make_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        # Below min_calls the ratio is not judged yet
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        # Slow successes count as bad calls
+        breaker.record_success(2.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        stats = breaker.stats()
+        self.assertEqual((stats['opened'], stats['failures'], stats['slow_calls'], stats['rejected']), (1, 2, 1, 1))
+
+    def test_mostly_good_calls_keep_it_closed(self):
+        breaker = self.make_breaker()
+        for _ in range(10):
+            for _ in range(3):
+                breaker.record_success(0.1)
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_closes_or_reopens(self):
+        breaker = self.make_breaker()
+        self.open_breaker(breaker)
+        opened_at = time.monotonic()
+
+        with mock.patch('apps.movies.circuit_breaker.time.monotonic', return_value=opened_at + 31):
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            # Only one trial call at a time
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        with mock.patch('apps.movies.circuit_breaker.time.monotonic', return_value=opened_at + 62):
+            self.assertTrue(breaker.allow())
+            breaker.record_success(0.1)
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+            self.assertTrue(breaker.allow())
+
+    def test_upstream_failures_open_the_circuit_but_client_errors_do_not(self):
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/1': (500, {})}), cache=False)
+        tmdb.breaker = self.make_breaker()
+        for _ in range(4):
+            self.assertIsNone(tmdb.fetch_movie_data(2))
+        self.assertEqual(tmdb.breaker.state, CircuitBreaker.CLOSED)
+        self.assertFalse(tmdb.degraded)
+
+        for _ in range(4):
+            self.assertIsNone(tmdb.fetch_movie_data(1))
+        self.assertEqual(tmdb.breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(tmdb.degraded)
+
+    def test_open_circuit_serves_stale_responses_without_calling_tmdb(self):
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/1': {'id': 1}}))
+        tmdb.breaker = self.make_breaker()
+        tmdb.fetch_movie_data(1)
+        for entry in tmdb.cache._entries.values():
+            entry.expires_at = 0
+        self.open_breaker(tmdb.breaker)
+
+        self.assertEqual(tmdb.fetch_movie_data(1), {'id': 1})
+        self.assertIsNone(tmdb.fetch_movie_data(2))
+        self.assertEqual(len(tmdb.transport.requests), 1)
+        self.assertTrue(tmdb.degraded)
+
+    def half_open_breaker(self):
+        breaker = self.make_breaker(reset_timeout=0)
+        self.open_breaker(breaker)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        return breaker
+
+    def test_rejected_calls_do_not_spend_rate_limit_tokens(self):
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/1': {'id': 1}}), cache=False)
+        tmdb.breaker = self.half_open_breaker()
+        tmdb.rate_limiter = mock.Mock()
+        # Another caller's trial is in flight, so this call is rejected
+        self.assertTrue(tmdb.breaker.allow())
+        self.assertIsNone(tmdb.fetch_movie_data(1))
+        tmdb.rate_limiter.acquire.assert_not_called()
+        self.assertEqual(tmdb.transport.requests, [])
+
+    def test_throttled_trial_call_is_released(self):
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/1': {'id': 1}}), cache=False)
+        tmdb.breaker = self.half_open_breaker()
+        tmdb.rate_limiter = mock.Mock(**{'acquire.side_effect': RateLimitExceeded('no token')})
+        self.assertIsNone(tmdb.fetch_movie_data(1))
+        # The next caller gets the trial
+        self.assertTrue(tmdb.breaker.allow())
+
+    def test_unexpected_error_releases_the_trial_call(self):
+        transport = FakeTransport({'movie/1': lambda params, headers: 1 / 0})
+        tmdb = make_offline_service(TMDBService(), transport, cache=False)
+        tmdb.breaker = self.half_open_breaker()
+        with self.assertRaises(ZeroDivisionError):
+            tmdb.fetch_movie_data(1)
+        self.assertEqual(tmdb.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(tmdb.breaker.allow())
+
+    def test_exhausted_latency_budget_skips_tmdb(self):
+        tmdb = make_offline_service(TMDBService(), FakeTransport({'movie/1': {'id': 1}}))
+        tmdb.set_latency_budget(0.001)
+        time.sleep(0.002)
+        self.assertIsNone(tmdb.fetch_movie_data(1))
+        self.assertTrue(tmdb.degraded)
+        self.assertEqual(tmdb.transport.requests, [])
+
+
+class TMDBRecordReplayTests(TestCase):
+    """Tests for recording TMDB responses as fixtures and replaying them offline"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fixture_dir = directory.name
+
+    def record(self, endpoint, params, status, body, headers=None):
+        response = build_response(f'https://tmdb.test/3/{endpoint}', status, body, headers)
+        with mock.patch.object(HTTPTransport, 'get', return_value=response):
+            return RecordingTransport(self.fixture_dir).get(endpoint, response.url, params, {}, (1, 1))
+
+    def test_fixture_names_ignore_credentials_and_param_order(self):
+        store = FixtureStore(self.fixture_dir)
+        self.assertEqual(
+            store.path_for('search/movie', {'query': 'heat', 'page': 1, 'api_key': 'secret'}),
+            store.path_for('/search/movie/', {'page': '1', 'query': 'heat'})
+        )
+        self.assertTrue(store.path_for('genre/movie/list').endswith('genre__movie__list.json'))
+
+    def test_recorded_responses_replay_offline(self):
+        self.record('movie/550', {'language': 'en-US', 'api_key': 'secret'}, 200, {'id': 550}, {'ETag': '"v1"'})
+        self.record('movie/551', {}, 500, {})
+        self.assertEqual(sorted(os.listdir(self.fixture_dir)), [os.path.basename(
+            FixtureStore(self.fixture_dir).path_for('movie/550', {'language': 'en-US'})
+        )])
+        with open(FixtureStore(self.fixture_dir).path_for('movie/550', {'language': 'en-US'})) as fixture:
+            self.assertNotIn('secret', fixture.read())
+
+        replay = ReplayTransport(self.fixture_dir)
+        response = replay.get('movie/550', 'url', {'language': 'en-US'}, {}, (1, 1))
+        self.assertEqual((response.status_code, response.json()), (200, {'id': 550}))
+        self.assertEqual(response.headers['ETag'], '"v1"')
+        revalidated = replay.get('movie/550', 'url', {'language': 'en-US'}, {'If-None-Match': '"v1"'}, (1, 1))
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(replay.get('movie/551', 'url', {}, {}, (1, 1)).status_code, 404)
+
+    def test_endpoint_wide_fixture_answers_any_params(self):
+        self.record('genre/movie/list', {}, 200, {'genres': []})
+        response = ReplayTransport(self.fixture_dir).get('genre/movie/list', 'url', {'language': 'fr'}, {}, (1, 1))
+        self.assertEqual(response.json(), {'genres': []})
+
+    def test_stand_in_serves_fixtures_recorded_through_tmdb_service(self):
+        body = {'page': 1, 'results': [{'id': 949, 'title': 'Heat'}], 'total_pages': 1}
+        response = build_response('https://tmdb.test/3/search/movie', 200, body)
+        with mock.patch.object(HTTPTransport, 'get', return_value=response):
+            make_offline_service(TMDBService(), RecordingTransport(self.fixture_dir), cache=False).search_movies('heat')
+
+        server = make_server(port=0, fixture_dir=self.fixture_dir)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        tmdb = make_offline_service(TMDBService(), HTTPTransport(), cache=False)
+        tmdb.base_url = 'http://{}:{}/3'.format(*server.server_address[:2])
+        # include_adult=False was recorded from a bool but reaches the stand-in as the string 'False'
+        self.assertEqual(tmdb.search_movies('heat'), body)
+
+    def test_replay_skips_the_rate_limiter_and_circuit_breaker(self):
+        self.record('movie/550', {}, 200, {'id': 550})
+        limiter, breaker = mock.Mock(), mock.Mock()
+        with (
+            mock.patch('apps.movies.services.get_rate_limiter', return_value=limiter),
+            mock.patch('apps.movies.services.get_tmdb_breaker', return_value=breaker),
+        ):
+            tmdb = TMDBService(transport=ReplayTransport(self.fixture_dir))
+            self.assertIs(TMDBService(transport=FakeTransport()).rate_limiter, limiter)
+        tmdb.cache = None
+
+        self.assertEqual(tmdb.fetch_movie_data(550), {'id': 550})
+        self.assertIsNone(tmdb.rate_limiter)
+        self.assertIsNone(tmdb.breaker)
+        limiter.acquire.assert_not_called()
+        breaker.allow.assert_not_called()
+
+
+@override_settings(TMDB_CACHE_ENABLED=False, TMDB_RATE_LIMIT_ENABLED=False, TMDB_BREAKER_ENABLED=False)
+class BootstrapCatalogCommandTests(TestCase):
+    """Tests for the streaming catalog bootstrap and its checkpoint"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.export_path = os.path.join(directory.name, 'movie_ids_01_01_2026.json.gz')
+        with gzip.open(self.export_path, 'wt', encoding='utf-8') as export:
+            for record in [
+                {'id': 1, 'popularity': 5.0}, {'id': 2, 'popularity': 3.0}, {'id': 3, 'popularity': 2.0},
+                {'id': 4, 'popularity': 9.0, 'adult': True}, {'id': 5, 'popularity': 9.0, 'video': True},
+                {'id': 6, 'popularity': 0.2},
+            ]:
+                export.write(json.dumps(record) + '\n')
+            export.write('\n{"id": 7, "popul\n')
+        self.transport = FakeTransport({'movie/1': make_movie_payload(1), 'movie/2': make_movie_payload(2)})
+        patcher = mock.patch('apps.movies.services.get_transport', return_value=self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bootstrap(self, *args):
+        out = StringIO()
+        call_command(
+            'bootstrap_tmdb_catalog', self.export_path, '--workers', '2', '--batch-size', '2', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def checkpoint(self):
+        with open(f'{self.export_path}.checkpoint.jsonl') as log:
+            return [(record['tmdb_id'], record['status']) for record in map(json.loads, log)]
+
+    def test_filters_the_export_and_checkpoints_every_outcome(self):
+        output = self.bootstrap()
+
+        self.assertEqual(set(Movie.objects.values_list('tmdb_id', flat=True)), {1, 2})
+        self.assertEqual(sorted(self.checkpoint()), [(1, 'synced'), (2, 'synced'), (3, 'failed')])
+        self.assertIn('2 synced, 0 already present, 1 failed', output)
+
+    def test_resumed_run_only_retries_what_is_not_done(self):
+        self.bootstrap()
+        # A crash can leave a torn last line behind
+        with open(f'{self.export_path}.checkpoint.jsonl', 'a') as log:
+            log.write('{"tmdb_id": 2, "sta')
+        self.transport.responses['movie/3'] = make_movie_payload(3)
+        self.transport.requests.clear()
+
+        output = self.bootstrap()
+
+        self.assertIn('Resuming: 2 IDs already done', output)
+        self.assertIn('1 synced, 0 already present, 0 failed, 2 skipped', output)
+        self.assertEqual(self.transport.endpoints(), ['movie/3'])
+        self.assertEqual(Movie.objects.count(), 3)
+
+    def test_limit_and_popularity_threshold(self):
+        self.bootstrap('--min-popularity', '2.5', '--limit', '1')
+        self.assertEqual(self.transport.endpoints(), ['movie/1'])
+
+
+@override_settings(TMDB_CACHE_ENABLED=False, TMDB_RATE_LIMIT_ENABLED=False, TMDB_BREAKER_ENABLED=False)
+class SyncMoviesCommandTests(TestCase):
+    """Tests for the resumable sync_tmdb_movies command"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.ids_path = os.path.join(directory.name, 'ids.txt')
+        self.write_ids('# weekly list\n10, 11 12\n\n10  # repeated\n')
+        self.transport = FakeTransport({f'movie/{tmdb_id}': make_movie_payload(tmdb_id) for tmdb_id in (10, 11)})
+        patcher = mock.patch('apps.movies.services.get_transport', return_value=self.transport)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_ids(self, text):
+        with open(self.ids_path, 'w') as ids_file:
+            ids_file.write(text)
+
+    def sync(self, *args):
+        out = StringIO()
+        call_command(
+            'sync_tmdb_movies', self.ids_path, '--workers', '2', '--batch-size', '2', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_rerun_resumes_from_the_checkpoint(self):
+        self.assertIn('2 synced, 0 already present, 1 failed', self.sync())
+        self.assertTrue(os.path.exists(f'{self.ids_path}.checkpoint.jsonl'))
+
+        self.transport.responses['movie/12'] = make_movie_payload(12)
+        self.transport.requests.clear()
+        output = self.sync()
+
+        self.assertIn('Resuming: 2 IDs already done', output)
+        self.assertIn('1 synced, 0 already present, 0 failed, 2 skipped', output)
+        self.assertEqual(self.transport.endpoints(), ['movie/12'])
+
+    def test_movies_stored_locally_are_not_fetched(self):
+        write_payloads(MovieDataService(), {11: make_movie_payload(11)})
+        checkpoint = os.path.join(os.path.dirname(self.ids_path), 'custom.jsonl')
+
+        self.assertIn('1 synced, 1 already present, 1 failed', self.sync('--checkpoint', checkpoint))
+        self.assertNotIn('movie/11', self.transport.endpoints())
+        with open(checkpoint) as log:
+            self.assertIn({'tmdb_id': 11, 'status': 'exists'}, [json.loads(line) for line in log])
+
+    def test_invalid_id_is_reported_with_its_line(self):
+        self.write_ids('10\n11 tt0137523\n')
+        with self.assertRaisesMessage(CommandError, "Line 2: 'tt0137523' is not a TMDB ID"):
+            self.sync()
+
+
+class MovieWritePhaseTests(TestCase):
+    """Tests for the set-based write phase of MovieDataService"""
+
+    def setUp(self):
+        self.service = MovieDataService()
+
+    def test_write_creates_movie_and_relations(self):
+        movies, errors = write_payloads(self.service, {550: make_movie_payload(550)})
+
+        self.assertEqual(errors, {})
+        movie = movies[550]
+        self.assertEqual(Movie.objects.get(tmdb_id=550).title, 'Movie 550')
+        self.assertEqual(set(movie.genres.values_list('name', flat=True)), {'Drama', 'Thriller'})
+        self.assertEqual(movie.production_companies.count(), 2)
+        self.assertEqual(MovieCast.objects.filter(movie=movie).count(), 5)
+        self.assertEqual(
+            set(MovieCrew.objects.filter(movie=movie).values_list('person__tmdb_id', 'job')),
+            {(900, 'Director'), (901, 'Screenplay'), (900, 'Writer')}
+        )
+        self.assertEqual(
+            ProductionCompany.objects.get(name='Studio One').logo_url,
+            'https://image.tmdb.org/t/p/w500/one.png'
+        )
+
+    def test_write_statement_count_is_constant(self):
+        # Movie insert + (IN query, bulk insert, re-read) for genres, companies and
+        # people + 4 through-table bulk inserts, plus the two savepoint pairs and
+        # the catalog version bump
+        with self.assertNumQueries(19):
+            write_payloads(self.service, {550: make_movie_payload(550, cast_size=3)})
+
+        # Referenced rows now exist, so no inserts or re-reads for them; a larger
+        # cast does not add statements
+        with self.assertNumQueries(13):
+            write_payloads(self.service, {551: make_movie_payload(551, cast_size=3)})
+
+    def test_batch_write_statement_count_does_not_grow_with_batch_size(self):
+        # Kept below the backend's per-statement parameter limit, past which
+        # bulk_create splits one insert into several
+        payloads = {tmdb_id: make_movie_payload(tmdb_id, cast_size=10) for tmdb_id in range(1, 11)}
+        with self.assertNumQueries(19):
+            movies, errors = write_payloads(self.service, payloads)
+
+        self.assertEqual(len(movies), 10)
+        self.assertEqual(errors, {})
+        self.assertEqual(Genre.objects.count(), 2)
+        self.assertEqual(Person.objects.count(), 12)
+        self.assertEqual(MovieGenre.objects.count(), 20)
+        self.assertEqual(MovieProductionCompany.objects.count(), 20)
+        self.assertEqual(MovieCast.objects.count(), 100)
+
+    def test_batch_write_falls_back_to_per_movie_writes(self):
+        write_payloads(self.service, {550: make_movie_payload(550)})
+
+        # 550 violates the unique tmdb_id; 600 must still be written
+        movies, errors = write_payloads(self.service, {
+            550: make_movie_payload(550),
+            600: make_movie_payload(600),
+        })
+
+        self.assertEqual(list(movies), [600])
+        self.assertIn(550, errors)
+        self.assertEqual(Movie.objects.filter(tmdb_id=600).count(), 1)
+        self.assertEqual(MovieCast.objects.filter(movie__tmdb_id=600).count(), 5)
+
+
+class MovieRefreshTests(TestCase):
+    """Tests for refreshing a stored movie with field-level diffing"""
+
+    def setUp(self):
+        self.service = MovieDataService()
+        movies, _ = write_payloads(self.service, {550: make_movie_payload(550)})
+        self.movie = movies[550]
+
+    def test_unchanged_payload_touches_no_rows(self):
+        movie = Movie.objects.get(tmdb_id=550)
+        # Three lookups for referenced rows and one read per through table, no writes
+        with self.assertNumQueries(7):
+            changes = self.service._update_movie_from_data(movie, make_movie_payload(550))
+
+        self.assertEqual(changes['movie_fields'], [])
+        self.assertEqual(changes['rows_touched'], 0)
+
+    def test_changed_payload_writes_only_differences(self):
+        payload = make_movie_payload(550)
+        payload['vote_count'] = 2000
+        payload['genres'] = [{'id': 18, 'name': 'Drama'}, {'id': 35, 'name': 'Comedy'}]
+        payload['credits']['cast'][0]['character'] = 'New Role'
+        del payload['credits']['cast'][4]
+        payload['credits']['cast'].append({'id': 2000, 'name': 'Newcomer', 'character': 'Extra', 'order': 9})
+
+        cast_ids = set(MovieCast.objects.filter(movie=self.movie).values_list('id', flat=True))
+        changes = self.service._update_movie_from_data(Movie.objects.get(tmdb_id=550), payload)
+
+        self.assertEqual(changes['movie_fields'], ['vote_count'])
+        self.assertEqual(changes['genres'], {'added': 1, 'updated': 0, 'removed': 1})
+        self.assertEqual(changes['production_companies'], {'added': 0, 'updated': 0, 'removed': 0})
+        self.assertEqual(changes['cast'], {'added': 1, 'updated': 1, 'removed': 1})
+        self.assertEqual(changes['crew'], {'added': 0, 'updated': 0, 'removed': 0})
+        self.assertEqual(changes['rows_touched'], 6)
+
+        self.assertEqual(Movie.objects.get(tmdb_id=550).vote_count, 2000)
+        self.assertEqual(set(self.movie.genres.values_list('name', flat=True)), {'Drama', 'Comedy'})
+        # Unchanged cast rows are kept, not recreated
+        remaining = set(MovieCast.objects.filter(movie=self.movie).values_list('id', flat=True))
+        self.assertEqual(len(cast_ids & remaining), 4)
+        self.assertEqual(
+            MovieCast.objects.get(movie=self.movie, person__tmdb_id=1000).character_name, 'New Role'
+        )
+
+    def test_refresh_bypasses_cached_movie_data(self):
+        payload = make_movie_payload(550)
+        payload['production_companies'] = []
+        tmdb = make_offline_service(self.service.tmdb_service, FakeTransport())
+        tmdb.cache.store(
+            TMDBResponseCache.build_key('movie/550', {
+                'append_to_response': 'credits,videos,keywords,external_ids', 'language': 'en-US'
+            }),
+            json.dumps(payload).encode(), 3600
+        )
+        tmdb.transport.responses['movie/550'] = {**payload, 'vote_count': 2000}
+
+        # A plain sync of a new movie may use the cached body; a refresh may not
+        self.assertEqual(tmdb.fetch_movie_data(550)['vote_count'], 1500)
+        self.service.sync_movie_from_tmdb(550, update_existing=True)
+
+        self.assertEqual(tmdb.transport.endpoints(), ['movie/550'])
+        self.assertEqual(self.service.last_sync_changes['movie_fields'], ['vote_count'])
+        self.assertEqual(Movie.objects.get(tmdb_id=550).vote_count, 2000)
+
+
+class ImportPlanTests(TestCase):
+    """Tests for building import plans without database access"""
+
+    def test_plan_is_built_without_queries(self):
+        service = MovieDataService()
+        with self.assertNumQueries(0):
+            plan = service.build_import_plan(550, make_movie_payload(550))
+
+        self.assertEqual(plan.title, 'Movie 550')
+        self.assertEqual(list(plan.genres), ['Drama', 'Thriller'])
+        self.assertEqual(len(plan.cast), 5)
+        # Key Grip is skipped; the director's second job is a separate crew row
+        self.assertEqual(set(plan.crew), {(900, 'Director'), (901, 'Screenplay'), (900, 'Writer')})
+        self.assertEqual(set(plan.people), {1000, 1001, 1002, 1003, 1004, 900, 901})
+
+
+class MovieSearchIndexTests(TestCase):
+    """The FTS index follows the movies table and ranks title matches first"""
+
+    def setUp(self):
+        self.in_overview = Movie.objects.create(title='Silent Night', overview='A heist in space')
+        self.in_title = Movie.objects.create(title='Space Heist', overview='Crooks go to orbit')
+
+    def test_ranks_title_matches_first(self):
+        results = list(search_movies(Movie.objects.all(), 'space heist'))
+        self.assertEqual(results, [self.in_title, self.in_overview])
+
+    def test_last_term_matches_as_prefix(self):
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'silent ni')), [self.in_overview])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.title = 'Orbit Job'
+        self.in_title.save()
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'orbit job')), [self.in_title])
+        self.in_overview.delete()
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'heist')), [])
+
+    def test_list_endpoint_search_is_ranked(self):
+        response = self.client.get('/api/v1/movies/', {'search': 'space heist'})
+        titles = [movie['title'] for movie in response.json()['results']]
+        self.assertEqual(titles, ['Space Heist', 'Silent Night'])
+
+    def test_index_survives_renumbered_rowids(self):
+        # VACUUM may renumber the implicit rowid of a table with a UUID primary key
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE movies SET rowid = rowid + 1000")
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'space heist')), [self.in_title, self.in_overview])
+        self.assertEqual(fuzzy_search_movies('Silent Nigth')[0][0], self.in_overview)
+        added = Movie.objects.create(title='Space Oddity')
+        self.in_title.delete()
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'space')), [added, self.in_overview])
+
+    def test_ensure_search_index_restores_a_dropped_key_column(self):
+        # What a table rebuild by a migration leaves behind
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'movies'")
+            for (name,) in cursor.fetchall():
+                cursor.execute(f"DROP TRIGGER {name}")
+            cursor.execute("DROP INDEX movies_search_rowid")
+            cursor.execute("ALTER TABLE movies DROP COLUMN search_rowid")
+        self.assertEqual(ensure_search_index(), ['movies_fts', 'movies_trigram'])
+        self.assertEqual(ensure_search_index(), [])
+        added = Movie.objects.create(title='Orbit Job')
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'space heist')), [self.in_title, self.in_overview])
+        self.assertEqual(list(search_movies(Movie.objects.all(), 'orbit job')), [added])
+
+
+class FuzzyTitleSearchTests(TestCase):
+    """Misspelled titles are found through the trigram index"""
+
+    def setUp(self):
+        self.interstellar = Movie.objects.create(title='Interstellar', original_title='Interstellar')
+        self.godfather = Movie.objects.create(title='The Godfather', original_title='The Godfather')
+
+    def test_finds_misspelled_titles(self):
+        matches = fuzzy_search_movies('Intersteller')
+        self.assertEqual(matches[0][0], self.interstellar)
+        self.assertGreater(matches[0][1], 0.5)
+        self.assertEqual(fuzzy_search_movies('Godfathr')[0][0], self.godfather)
+
+    def test_close_local_match_is_served_without_waiting_for_tmdb(self):
+        service = MovieSearchService()
+        tmdb_released = threading.Event()
+        with mock.patch.object(service.tmdb_service, 'search_movies',
+                               side_effect=lambda query: tmdb_released.wait(5)):
+            result = service.comprehensive_search('Godfathr')
+        tmdb_released.set()
+        self.assertEqual(result['tmdb_results'], [])
+        self.assertEqual(result['local_results'], [self.godfather])
+        self.assertIn(str(self.godfather.id), result['fuzzy_matches'])
+
+
+class FederatedSearchTests(TestCase):
+    """One TMDB search per query, merged with local matches by tmdb_id"""
+
+    def setUp(self):
+        self.heist = Movie.objects.create(title='Space Heist', tmdb_id=101)
+        self.stored = Movie.objects.create(title='Orbital Job', tmdb_id=102)
+        self.service = MovieSearchService()
+
+    def test_merges_local_and_tmdb_hits(self):
+        hits = {'results': [{'id': 102}, {'id': 101}, {'id': 103}]}
+        with mock.patch.object(self.service.tmdb_service, 'search_movies', return_value=hits) as search_tmdb:
+            result = self.service.comprehensive_search('space heist')
+        search_tmdb.assert_called_once_with('space heist')
+        self.assertEqual(
+            [(entry['source'], entry['movie']) for entry in result['merged']],
+            [('both', self.heist), ('tmdb', self.stored), ('tmdb', None)]
+        )
+        self.assertEqual(result['tmdb_results'], [{'id': 103}])
+        self.assertIn('tmdb_ms', result['timings'])
+
+    @override_settings(TMDB_SYNC_IN_BACKGROUND=False)
+    def test_inline_sync_reuses_the_search_hits(self):
+        hits = {'results': [{'id': 102}, {'id': 104}]}
+        nebula = Movie(title='Nebula', tmdb_id=104)
+        data_service = self.service.movie_data_service
+        with mock.patch.object(self.service.tmdb_service, 'search_movies', return_value=hits), \
+                mock.patch.object(data_service.tmdb_service, 'search_movies') as second_search, \
+                mock.patch.object(data_service, 'sync_movie_from_tmdb', return_value=nebula) as sync:
+            result = self.service.comprehensive_search('nebula')
+        second_search.assert_not_called()
+        sync.assert_called_once_with(104)
+        self.assertEqual(result['synced_movies'], [self.stored, nebula])
+
+    @override_settings(TMDB_SYNC_IN_BACKGROUND=True)
+    def test_background_sync_queues_missing_hits(self):
+        hits = {'results': [{'id': 102}, {'id': 104}]}
+        data_service = self.service.movie_data_service
+        with mock.patch.object(self.service.tmdb_service, 'search_movies', return_value=hits), \
+                mock.patch.object(data_service, 'sync_movie_from_tmdb') as sync:
+            result = self.service.comprehensive_search('nebula')
+        sync.assert_not_called()
+        self.assertEqual(result['queued_syncs'], [104])
+        self.assertTrue(BackgroundJob.objects.filter(dedupe_key='sync_movie:104', status='pending').exists())
+
+
+class DeferredSearchSyncTests(TestCase):
+    """Polling the movies of a search's queued syncs with a signed token"""
+
+    def setUp(self):
+        self.service = MovieSearchService()
+        self.token = self.service.make_sync_token([501, 502, 503])
+        self.synced = Movie.objects.create(title='Synced', tmdb_id=501)
+
+    def poll(self, **params):
+        return self.client.get('/api/v1/movies/search_results/', {'token': self.token, **params})
+
+    def test_token_round_trip(self):
+        data = self.poll().json()
+        self.assertFalse(data['complete'])
+        self.assertEqual([movie['tmdb_id'] for movie in data['results']], [501])
+        self.assertEqual(data['pending_tmdb_ids'], [502, 503])
+        self.assertEqual(self.client.get('/api/v1/movies/search_results/', {'token': 'forged'}).status_code, 400)
+
+    def test_dead_jobs_are_reported_as_failed(self):
+        BackgroundJob.objects.create(
+            name='movies.sync_movie', dedupe_key='sync_movie:502', status='dead',
+            run_at=timezone.now(), finished_at=timezone.now() + timedelta(seconds=1)
+        )
+        data = self.poll().json()
+        self.assertEqual(data['failed_tmdb_ids'], [502])
+        self.assertEqual(data['pending_tmdb_ids'], [503])
+
+    @override_settings(SEARCH_SYNC_MAX_WAIT=0.2, SEARCH_SYNC_POLL_INTERVAL=0.05)
+    def test_wait_is_clamped(self):
+        started = time.monotonic()
+        self.assertEqual(self.poll(wait=3600).status_code, 200)
+        self.assertLess(time.monotonic() - started, 2)
+        for wait in ('nan', 'inf', '-inf', 'soon'):
+            self.assertEqual(self.poll(wait=wait).status_code, 400)
+
+
+class PaginatedSearchTests(TestCase):
+    """Search pages follow a cursor; TMDB pages are fetched only past the local matches"""
+
+    def setUp(self):
+        caches[settings.SEARCH_CACHE_ALIAS].clear()
+        for i in range(7):
+            Movie.objects.create(title=f'Star Voyage {i}', tmdb_id=200 + i, popularity_score=i % 3 or None)
+        self.service = MovieSearchService()
+
+    def test_local_pages_follow_the_cursor(self):
+        titles, url = [], '/api/v1/movies/search/?q=star&sync_missing=false&page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            titles += [movie['title'] for movie in data['results']]
+            url = data['next']
+        self.assertEqual(sorted(titles), sorted(Movie.objects.values_list('title', flat=True)))
+
+    def test_later_pages_read_the_relevance_snapshot(self):
+        first = self.service.search_page('star voyage', self.service.first_page_state(include_tmdb=False), page_size=3)
+        # Writes between pages shift BM25 scores; the pages neither repeat nor skip movies
+        Movie.objects.create(title='Star Star Voyage', tmdb_id=300)
+        for i in range(20):
+            Movie.objects.create(title=f'Star Dust {i}', overview='voyage')
+        second = self.service.search_page('star voyage', first['next'], page_size=3)
+        third = self.service.search_page('star voyage', second['next'], page_size=3)
+        served = [movie.tmdb_id for page in (first, second, third) for movie in page['local_results']]
+        self.assertEqual(sorted(served), list(range(200, 207)))
+        self.assertIsNone(third['next'])
+
+    def test_cursor_with_an_evicted_snapshot_is_rejected(self):
+        url = '/api/v1/movies/search/?q=star&sync_missing=false&page_size=3'
+        next_url = self.client.get(url).json()['next']
+        caches[settings.SEARCH_CACHE_ALIAS].clear()
+        self.assertEqual(self.client.get(next_url).status_code, 400)
+
+    def test_tmdb_pages_are_fetched_lazily(self):
+        pages = {
+            1: {'results': [{'id': 201}, {'id': 300}, {'id': 301}], 'total_pages': 2},
+            2: {'results': [{'id': 302}], 'total_pages': 2},
+        }
+        with mock.patch.object(self.service.tmdb_service, 'search_movies',
+                               side_effect=lambda query, page=1: pages[page]) as search_tmdb:
+            first = self.service.comprehensive_search('star voyage', page_size=2)
+            second = self.service.search_page('star voyage', first['next'], page_size=4)
+            self.assertEqual(search_tmdb.call_count, 1)
+            third = self.service.search_page('star voyage', second['next'], page_size=4)
+        self.assertEqual(len(second['local_results']), 4)
+        # 201 was served as a local match; the rest continues where page one stopped
+        self.assertEqual([movie_data['id'] for movie_data in third['tmdb_results']], [301, 302])
+        self.assertEqual([call.kwargs.get('page', 1) for call in search_tmdb.call_args_list], [1, 1, 2])
+        self.assertIsNone(third['next'])
+
+
+class MovieFacetTests(TestCase):
+    """Facet counts of the filtered list; catalog counts cached per catalog version"""
+
+    def setUp(self):
+        # Shared between tests, and every test starts at the same catalog version
+        caches[settings.FACET_CACHE_ALIAS].clear()
+        drama = Genre.objects.create(name='Drama')
+        comedy = Genre.objects.create(name='Comedy')
+        for year, genres in ((1994, [drama]), (1999, [drama, comedy]), (2004, [comedy])):
+            movie = Movie.objects.create(title=f'Film {year}', release_date=f'{year}-06-01')
+            for genre in genres:
+                MovieGenre.objects.create(movie=movie, genre=genre)
+
+    def facets(self, **params):
+        return self.client.get('/api/v1/movies/', params).json()['facets']
+
+    def test_counts_cover_the_filtered_set(self):
+        facets = self.facets(facets='genre,decade,year', genre='drama')
+        self.assertEqual([(genre['name'], genre['count']) for genre in facets['genre']], [('Drama', 2), ('Comedy', 1)])
+        self.assertEqual(facets['decade'], [{'value': 1990, 'count': 2}])
+        self.assertEqual([year['value'] for year in facets['year']], [1999, 1994])
+        self.assertEqual(self.client.get('/api/v1/movies/', {'facets': 'budget'}).status_code, 400)
+
+    def test_catalog_counts_are_cached_until_movies_change(self):
+        self.assertEqual(
+            self.facets(facets='status'), {'status': [{'value': 'released', 'label': 'Released', 'count': 3}]}
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(get_facets(Movie.objects.all(), ['status'])['status'][0]['count'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Movie.objects.create(title='Film 2010')
+        self.assertEqual(self.facets(facets='status')['status'][0]['count'], 4)
+
+
+class KeysetPaginationTests(TestCase):
+    """?cursor= pages follow the sort key and id, with NULLs last and no COUNT"""
+
+    def setUp(self):
+        for i in range(45):
+            Movie.objects.create(
+                title=f'Movie {i}', popularity_score=[None, 1.0, 2.0][i % 3], vote_average=[None, 6.5][i % 2]
+            )
+
+    def walk(self, ordering):
+        ids, url = [], f'/api/v1/movies/?ordering={ordering}&cursor='
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(url).json()
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+            ids += [movie['id'] for movie in data['results']]
+            url = data['next']
+        return ids
+
+    def test_pages_cover_nullable_orderings_once(self):
+        for ordering, expected in (
+            ('-popularity_score,vote_average', [F('popularity_score').desc(nulls_last=True),
+                                                F('vote_average').asc(nulls_last=True), 'id']),
+            ('created_at', ['created_at', 'id']),
+        ):
+            self.assertEqual(
+                self.walk(ordering),
+                [str(pk) for pk in Movie.objects.order_by(*expected).values_list('id', flat=True)]
+            )
+
+    def test_rejects_foreign_cursors(self):
+        first = self.client.get('/api/v1/movies/?ordering=title&cursor=').json()
+        cursor = first['next'].split('cursor=')[1].split('&')[0]
+        response = self.client.get(f'/api/v1/movies/?ordering=-title&cursor={cursor}')
+        self.assertEqual(response.status_code, 404)
+
+
+class TitleAutocompleteTests(TestCase):
+    """Prefix suggestions ranked by popularity and kept current incrementally"""
+
+    def setUp(self):
+        self.index = TitleIndex()
+        self.godfather = Movie.objects.create(title='The Godfather', popularity_score=80)
+        self.godzilla = Movie.objects.create(title='Godzilla', popularity_score=95)
+        Movie.objects.create(title='Amélie', original_title="Le Fabuleux Destin d'Amélie Poulain")
+        self.index.rebuild()
+
+    def test_matches_word_prefixes_by_popularity(self):
+        titles = [movie['title'] for movie in self.index.suggest('God')]
+        self.assertEqual(titles, ['Godzilla', 'The Godfather'])
+        self.assertEqual([movie['title'] for movie in self.index.suggest('godf')], ['The Godfather'])
+        self.assertEqual([movie['title'] for movie in self.index.suggest('fabuleux dest')], ['Amélie'])
+        self.assertEqual([movie['title'] for movie in self.index.suggest('AMEL')], ['Amélie'])
+
+    def test_applies_saves_and_deletes(self):
+        self.godfather.popularity_score = 99
+        self.godfather.save()
+        self.index.update(self.godfather)
+        self.assertEqual(self.index.suggest('god')[0]['title'], 'The Godfather')
+        self.index.remove(self.godzilla.id)
+        self.assertEqual([movie['title'] for movie in self.index.suggest('god')], ['The Godfather'])
+
+    def test_reconciles_deletions_made_elsewhere_by_id(self):
+        # Same count as the index, so only comparing IDs notices the delete
+        Movie.objects.filter(pk=self.godzilla.pk).delete()
+        Movie.objects.create(title='Gods and Monsters', popularity_score=10)
+        Movie.objects.filter(title='Gods and Monsters').update(updated_at=timezone.now() - timedelta(days=1))
+
+        self.index.refresh(reconcile=True)
+        self.assertEqual(
+            [movie['title'] for movie in self.index.suggest('god')], ['The Godfather', 'Gods and Monsters']
+        )
+        self.assertEqual(self.index.stats()['movies'], 3)
+
+    @override_settings(AUTOCOMPLETE_REFRESH_SECONDS=0)
+    def test_polls_on_a_background_thread(self):
+        release, polled = threading.Event(), threading.Event()
+
+        def refresh(reconcile):
+            release.wait(5)
+            polled.set()
+
+        with mock.patch.object(self.index, 'refresh', side_effect=refresh):
+            # Answered while the poll is still running
+            self.assertEqual(self.index.suggest('godz')[0]['title'], 'Godzilla')
+            release.set()
+            self.assertTrue(polled.wait(5))
+
+    def test_refresh_keeps_changes_made_while_it_queried(self):
+        Movie.objects.filter(pk=self.godzilla.pk).update(popularity_score=1)
+        values_list = QuerySet.values_list
+
+        def save_meanwhile(queryset, *fields, **kwargs):
+            # This process saves the movie after the refresh read its changed rows
+            self.godzilla.popularity_score = 50
+            self.index.update(self.godzilla)
+            return values_list(queryset, *fields, **kwargs)
+
+        with mock.patch.object(QuerySet, 'values_list', autospec=True, side_effect=save_meanwhile):
+            self.index.refresh(reconcile=True)
+        self.assertEqual(self.index.suggest('godz')[0]['popularity_score'], 50)
+
+    def test_endpoint(self):
+        with mock.patch('apps.movies.views.get_title_index', return_value=self.index):
+            response = self.client.get('/api/v1/movies/autocomplete/', {'q': 'godz', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([movie['id'] for movie in response.json()['results']], [str(self.godzilla.id)])
+
+
+class SearchResponseCacheTests(TestCase):
+    """Search responses are cached until the catalog version changes"""
+
+    def setUp(self):
+        # Shared between tests, and every test starts at the same catalog version
+        caches[settings.SEARCH_CACHE_ALIAS].clear()
+        Movie.objects.create(title='Space Heist', overview='Crooks go to orbit')
+
+    def search(self, query='space heist'):
+        return self.client.get('/api/v1/movies/search/', {'q': query, 'sync_missing': 'false'})
+
+    def test_repeated_query_is_served_from_cache(self):
+        self.search()
+        with mock.patch('apps.movies.views.MovieSearchService') as search_service:
+            response = self.search('  SPACE  heist! ')
+        search_service.assert_not_called()
+        self.assertEqual(response.json()['results'][0]['title'], 'Space Heist')
+
+    def test_movie_write_invalidates_cached_responses(self):
+        self.assertEqual(len(self.search().json()['results']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Movie.objects.create(title='Space Heist 2')
+        self.assertEqual(len(self.search().json()['results']), 2)
+
+
+class WriteQueueTests(TransactionTestCase):
+    """Tests for the single-writer queue (the writer thread needs its own connection)"""
+
+    def setUp(self):
+        handle, lock_path = tempfile.mkstemp(suffix='.write.lock')
+        os.close(handle)
+        self.addCleanup(os.remove, lock_path)
+        self.queue = WriteQueue(lock_path, group_window=0.2, timeout=2)
+
+    def submit_in_thread(self, fn, results, key):
+        def run():
+            try:
+                results[key] = self.queue.submit(fn)
+            except Exception as e:
+                results[key] = e
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_writes_run_in_submission_order_in_one_group(self):
+        order, results, threads = [], {}, []
+        for i in range(5):
+            threads.append(self.submit_in_thread(lambda i=i: order.append(i) or i, results, i))
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertEqual(results, {i: i for i in range(5)})
+        self.assertEqual(self.queue.stats()['commits'], 1)
+
+    def test_failing_write_raises_and_does_not_sink_its_group(self):
+        def fail():
+            Genre.objects.create(name='Rolled back')
+            raise ValueError('boom')
+
+        results = {}
+        threads = [
+            self.submit_in_thread(fail, results, 'fail'),
+            self.submit_in_thread(lambda: Genre.objects.create(name='Kept').name, results, 'ok'),
+        ]
+        for thread in threads:
+            thread.join()
+
+        self.assertIsInstance(results['fail'], ValueError)
+        self.assertEqual(results['ok'], 'Kept')
+        self.assertEqual(list(Genre.objects.values_list('name', flat=True)), ['Kept'])
+        stats = self.queue.stats()
+        self.assertEqual((stats['commits'], stats['writes'], stats['failed_writes']), (1, 1, 1))
+
+    def test_timed_out_write_is_cancelled_before_it_runs(self):
+        self.queue.timeout = 0.1
+        self.queue.group_window = 0
+        release, ran = threading.Event(), []
+        blocker = self.submit_in_thread(lambda: release.wait(5), {}, 'blocker')
+        time.sleep(0.05)
+
+        with self.assertRaisesMessage(WriteQueueTimeout, 'cancelled'):
+            self.queue.submit(lambda: ran.append(True))
+        release.set()
+        blocker.join()
+        self.assertEqual(self.queue.submit(lambda: 'next'), 'next')
+        self.assertEqual(ran, [])
+
+    def test_timed_out_write_already_running_waits_for_its_commit(self):
+        self.queue.timeout = 0.1
+        self.queue.group_window = 0
+
+        def slow():
+            time.sleep(0.15)
+            return Genre.objects.create(name='Slow').name
+
+        self.assertEqual(self.queue.submit(slow), 'Slow')
+        self.assertTrue(Genre.objects.filter(name='Slow').exists())
+
+    def test_submit_from_the_writer_thread_runs_inline(self):
+        def outer():
+            self.assertTrue(self.queue.on_writer_thread())
+            # Queuing here would wait on the thread that has to run it
+            return self.queue.submit(lambda: threading.current_thread().name)
+
+        self.assertFalse(self.queue.on_writer_thread())
+        self.assertEqual(self.queue.submit(outer), 'sqlite-writer')
+
+
+    def test_queued_writes_report_their_group_transaction(self):
+        stats = TransactionStats()
+
+        def slow():
+            time.sleep(0.1)
+            return 'slow'
+
+        results = {}
+        def run(key, fn):
+            results[key] = run_timed_write('sync_movie', fn)
+        with mock.patch('apps.movies.write_queue.get_write_queue', return_value=self.queue), \
+                mock.patch('apps.movies.transaction_stats.write_transactions', stats):
+            threads = [threading.Thread(target=run, args=args) for args in (('slow', slow), ('fast', lambda: 'fast'))]
+            for thread in threads:
+                thread.start()
+                time.sleep(0.01)
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual((results['slow'][0], results['fast'][0]), ('slow', 'fast'))
+        # Both writes were held up by the group's transaction, not just their own savepoints
+        self.assertEqual(results['slow'][1], results['fast'][1])
+        self.assertGreaterEqual(results['fast'][1], 0.1)
+        self.assertEqual(list(stats.stats()), ['write_queue'])
+        self.assertEqual(stats.stats()['write_queue']['count'], 1)
+
+
+class JobQueueTests(TestCase):
+    """Tests for enqueueing, claiming, retrying and dead-lettering background jobs"""
+
+    def setUp(self):
+        self.calls = []
+        jobs.job('tests.echo')(lambda **payload: self.calls.append(payload) or payload)
+        jobs.job('tests.fail')(self.fail_job)
+        self.addCleanup(jobs._handlers.pop, 'tests.echo')
+        self.addCleanup(jobs._handlers.pop, 'tests.fail')
+
+    def fail_job(self, permanent=False):
+        raise (jobs.PermanentJobError if permanent else RuntimeError)('nope')
+
+    def claim_and_run(self):
+        job = jobs.claim_job('worker-1')
+        jobs.run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_claim_takes_the_highest_priority_due_job_once(self):
+        jobs.enqueue('tests.echo', {'n': 1})
+        jobs.enqueue('tests.echo', {'n': 3}, delay=60)
+        urgent = jobs.enqueue('tests.echo', {'n': 2}, priority=5)
+
+        job = jobs.claim_job('worker-1')
+        self.assertEqual(job.pk, urgent.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('running', 1, 'worker-1'))
+        self.assertEqual(jobs.claim_job('worker-2').payload, {'n': 1})
+        # The rest is not due yet
+        self.assertIsNone(jobs.claim_job('worker-3'))
+
+    def test_expired_lease_is_claimed_again(self):
+        job = jobs.enqueue('tests.echo', {'n': 1})
+        jobs.claim_job('worker-1')
+        BackgroundJob.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        job = jobs.claim_job('worker-2')
+        self.assertEqual((job.locked_by, job.attempts), ('worker-2', 2))
+
+    def test_successful_job_records_its_result(self):
+        jobs.enqueue('tests.echo', {'n': 1})
+        job = self.claim_and_run()
+        self.assertEqual((job.status, job.result), ('succeeded', {'n': 1}))
+        self.assertEqual(self.calls, [{'n': 1}])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        jobs.enqueue('tests.fail', max_attempts=3)
+        before = timezone.now()
+        with mock.patch('apps.movies.jobs.random.uniform', return_value=1.0):
+            job = self.claim_and_run()
+
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('RuntimeError: nope', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=5))
+        self.assertIsNone(jobs.claim_job('worker-1'))
+
+    @override_settings(JOB_QUEUE_RETRY_BACKOFF=5, JOB_QUEUE_RETRY_BACKOFF_MAX=30)
+    def test_retry_delay_doubles_within_jitter_and_cap(self):
+        for attempts, base in [(1, 5), (2, 10), (3, 20), (4, 30), (10, 30)]:
+            delay = jobs.retry_delay(attempts)
+            self.assertTrue(base * 0.8 <= delay <= base * 1.2, (attempts, delay))
+
+    def test_job_is_dead_after_its_last_attempt(self):
+        job = jobs.enqueue('tests.fail', max_attempts=2)
+        for attempt in range(2):
+            BackgroundJob.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            job = self.claim_and_run()
+        self.assertEqual((job.status, job.attempts), ('dead', 2))
+
+    def test_permanent_error_is_not_retried(self):
+        jobs.enqueue('tests.fail', {'permanent': True})
+        job = self.claim_and_run()
+        self.assertEqual((job.status, job.attempts), ('dead', 1))
+
+    def test_duplicate_enqueue_promotes_the_pending_job(self):
+        queued = jobs.enqueue('tests.echo', {'n': 1}, dedupe_key='echo')
+        self.assertEqual(jobs.enqueue('tests.echo', {'n': 0}, dedupe_key='echo').payload, {'n': 1})
+
+        job = jobs.enqueue('tests.echo', {'n': 2}, priority=10, dedupe_key='echo')
+        self.assertEqual(job.pk, queued.pk)
+        self.assertEqual((job.priority, job.payload), (10, {'n': 2}))
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_enqueue_retries_when_the_racing_job_already_finished(self):
+        # Another enqueue of the key won the insert, and its job finished
+        # before this one looked it up, so there is nothing to return
+        create = BackgroundJob.objects.create
+        attempts = iter([mock.Mock(side_effect=IntegrityError('UNIQUE constraint failed')), create])
+        with mock.patch.object(BackgroundJob.objects, 'create', side_effect=lambda **kwargs: next(attempts)(**kwargs)):
+            job = jobs.enqueue('tests.echo', {'n': 1}, dedupe_key='echo')
+
+        self.assertEqual((job.status, job.payload, job.dedupe_key), ('pending', {'n': 1}, 'echo'))
+
+    def test_requeue_skips_dead_jobs_whose_key_is_active(self):
+        now = timezone.now()
+        for name, key, status in [('active', 'k1', 'pending'), ('shadowed', 'k1', 'dead'),
+                                  ('older', 'k2', 'dead'), ('newer', 'k2', 'dead'), ('unkeyed', None, 'dead')]:
+            BackgroundJob.objects.create(
+                name='tests.echo', payload={'n': name}, dedupe_key=key, status=status, run_at=now,
+                finished_at=now + timedelta(seconds=1 if name == 'newer' else 0)
+            )
+        job_admin = BackgroundJobAdmin(BackgroundJob, admin.site)
+        with mock.patch.object(job_admin, 'message_user') as message_user:
+            job_admin.requeue_jobs(None, BackgroundJob.objects.all())
+
+        pending = BackgroundJob.objects.filter(status='pending').values_list('payload', flat=True)
+        self.assertEqual(sorted(payload['n'] for payload in pending), ['active', 'newer', 'unkeyed'])
+        self.assertIn('Skipped 2', message_user.call_args.args[1])
+
+    def test_sync_of_a_movie_missing_on_tmdb_is_not_retried(self):
+        service = MovieDataService()
+        make_offline_service(service.tmdb_service, FakeTransport())
+        jobs.enqueue('movies.sync_movie', {'tmdb_id': 404})
+        with mock.patch('apps.movies.tasks.MovieDataService', return_value=service):
+            job = self.claim_and_run()
+        self.assertEqual((job.status, job.attempts), ('dead', 1))
+        self.assertIn('PermanentJobError: Movie not found on TMDB: 404', job.last_error)
+
+    def test_admin_refresh_gets_its_own_job(self):
+        jobs.enqueue('movies.sync_movie', {'tmdb_id': 550}, dedupe_key='sync_movie:550')
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser(
+            email='admin@example.com', username='admin', password='secret'
+        ))
+
+        response = client.post(
+            '/api/v1/movies/sync_from_tmdb/', {'tmdb_id': 550, 'refresh': 'true', 'background': 'true'}
+        )
+        self.assertEqual(response.status_code, 202)
+        job = BackgroundJob.objects.get(pk=response.json()['job']['id'])
+        self.assertEqual(job.dedupe_key, 'sync_movie:550:refresh')
+        self.assertEqual(job.payload, {'tmdb_id': 550, 'refresh': True, 'priority': 'high'})
+        self.assertEqual(BackgroundJob.objects.count(), 2)
+
+
+class MovieRatingsRefreshTests(TestCase):
+    """Tests for the changes-feed driven ratings refresh"""
+
+    def setUp(self):
+        self.service = MovieDataService()
+        write_payloads(self.service, {550: make_movie_payload(550)})
+        self.transport = FakeTransport({
+            'movie/changes': {'results': [{'id': 550}, {'id': 999}, {'id': 551, 'adult': True}], 'total_pages': 1},
+            'movie/550': {'id': 550, 'vote_average': 8.4, 'vote_count': 2100, 'popularity': 30.0},
+        })
+        make_offline_service(self.service.tmdb_service, self.transport)
+
+    def watermark(self):
+        return SyncState.objects.get(key=MovieDataService.CHANGES_STATE_KEY).value['watermark']
+
+    def test_changed_movies_get_current_ratings_despite_cached_details(self):
+        tmdb = self.service.tmdb_service
+        tmdb.cache.store(
+            TMDBResponseCache.build_key('movie/550', {'language': 'en-US'}),
+            b'{"id": 550, "vote_average": 7.1, "vote_count": 1500, "popularity": 12.5}', 3600
+        )
+
+        stats = self.service.update_movie_ratings()
+
+        self.assertEqual(stats, {'changed': 2, 'local': 1, 'updated': 1, 'failed': 0})
+        movie = Movie.objects.get(tmdb_id=550)
+        self.assertEqual((movie.vote_average, movie.vote_count), (8.4, 2100))
+        self.assertEqual(self.transport.endpoints(), ['movie/changes', 'movie/550'])
+
+    def test_feed_is_read_in_windows_from_the_watermark(self):
+        since = timezone.now() - timedelta(days=30)
+        SyncState.objects.create(key=MovieDataService.CHANGES_STATE_KEY, value={'watermark': since.isoformat()})
+
+        self.service.update_movie_ratings()
+
+        windows = [
+            (params['start_date'], params['end_date'])
+            for endpoint, params, _ in self.transport.requests if endpoint == 'movie/changes'
+        ]
+        self.assertEqual(len(windows), 3)
+        self.assertEqual(windows[0][0], since.date().isoformat())
+        self.assertEqual(windows[0][1], windows[1][0])
+        self.assertGreater(self.watermark(), since.isoformat())
+
+    def test_unreadable_feed_keeps_the_watermark(self):
+        SyncState.objects.create(
+            key=MovieDataService.CHANGES_STATE_KEY, value={'watermark': '2026-01-01T00:00:00+00:00'}
+        )
+        self.transport.responses['movie/changes'] = (500, {})
+
+        self.assertIsNone(self.service.update_movie_ratings())
+        self.assertEqual(self.watermark(), '2026-01-01T00:00:00+00:00')
+
+    def test_failed_detail_fetch_is_retried_next_run(self):
+        self.service.tmdb_service.cache.store(
+            TMDBResponseCache.build_key('movie/550', {'language': 'en-US'}), b'{"id": 550}', 3600
+        )
+        self.transport.responses['movie/550'] = (500, {})
+        self.assertEqual(self.service.update_movie_ratings()['failed'], 1)
+
+        self.transport.responses['movie/changes'] = {'results': [], 'total_pages': 1}
+        self.transport.responses['movie/550'] = {'id': 550, 'vote_average': 8.4}
+        self.assertEqual(self.service.update_movie_ratings()['updated'], 1)
+        self.assertEqual(SyncState.objects.get(key=MovieDataService.CHANGES_STATE_KEY).value['retry_ids'], [])
+
+
+class CoalescingTests(TestCase):
+    """Tests for in-process call coalescing and cross-process sync claims"""
+
+    def run_followers(self, flight, fn, count=3):
+        """Start a leader and ``count`` followers on one key; return their outcomes once released"""
+        release, outcomes = threading.Event(), []
+
+        def call():
+            try:
+                outcomes.append(flight.do('key', fn(release)))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count + 1)]
+        threads[0].start()
+        while not flight.in_flight():
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        while flight.coalesced < count:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_calls_share_one_result(self):
+        flight, calls = SingleFlight(), []
+
+        def fn(release):
+            def leader():
+                calls.append(1)
+                release.wait(5)
+                return {'value': 42}
+            return leader
+
+        outcomes = self.run_followers(flight, fn)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [{'value': 42}] * 4)
+        self.assertEqual(flight.in_flight(), 0)
+        # Finished calls are not reused
+        self.assertEqual(flight.do('key', lambda: 'again'), 'again')
+
+    def test_leader_exception_reaches_every_follower(self):
+        flight = SingleFlight()
+
+        def fn(release):
+            def leader():
+                release.wait(5)
+                raise ValueError('TMDB down')
+            return leader
+
+        outcomes = self.run_followers(flight, fn)
+        self.assertEqual(len(outcomes), 4)
+        self.assertTrue(all(isinstance(outcome, ValueError) for outcome in outcomes))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_follower_gives_up_after_its_timeout(self):
+        flight, release = SingleFlight(), threading.Event()
+        leader = threading.Thread(target=flight.do, args=('key', lambda: release.wait(5)))
+        leader.start()
+        self.addCleanup(leader.join)
+        self.addCleanup(release.set)
+        while not flight.in_flight():
+            time.sleep(0.001)
+
+        started = time.monotonic()
+        with self.assertRaises(SingleFlightTimeout):
+            flight.do('key', lambda: 'never run', timeout=0.1)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(flight.in_flight(), 1)
+
+    def test_budgeted_request_behind_a_slow_one_serves_stale_content(self):
+        service = make_offline_service(TMDBService(), FakeTransport(), cache=True)
+        request_key = TMDBResponseCache.build_key('movie/550', {'api_key': service.api_key})
+        service.cache.store(request_key, b'{"id": 550, "title": "Stale"}', ttl=60)
+        service.cache.lookup(request_key).expires_at = time.time() - 1
+        service.set_latency_budget(0.1)
+
+        release = threading.Event()
+        leader = threading.Thread(target=tmdb_requests.do, args=(request_key, lambda: release.wait(5)))
+        leader.start()
+        self.addCleanup(leader.join)
+        self.addCleanup(release.set)
+        while not tmdb_requests.in_flight():
+            time.sleep(0.001)
+
+        self.assertEqual(service._make_request('movie/550'), {'id': 550, 'title': 'Stale'})
+        self.assertTrue(service.degraded)
+
+    def test_claim_is_exclusive_and_released(self):
+        with sync_claim('movie:550', ttl=60) as claimed:
+            self.assertTrue(claimed)
+            self.assertTrue(is_claimed('movie:550'))
+            with sync_claim('movie:550', ttl=60) as other:
+                self.assertFalse(other)
+            # The loser must not release the holder's claim
+            self.assertTrue(is_claimed('movie:550'))
+        self.assertFalse(SyncClaim.objects.exists())
+
+    def test_expired_claim_is_taken_over(self):
+        SyncClaim.objects.create(key='movie:550', owner='crashed', expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(is_claimed('movie:550'))
+        with sync_claim('movie:550', ttl=60) as claimed:
+            self.assertTrue(claimed)
+            self.assertNotEqual(SyncClaim.objects.get(key='movie:550').owner, 'crashed')
+
+    @override_settings(TMDB_SYNC_CLAIM_WAIT=15)
+    def test_waiting_for_another_sync_respects_the_latency_budget(self):
+        SyncClaim.objects.create(key='movie:550', owner='other', expires_at=timezone.now() + timedelta(seconds=60))
+        service = MovieDataService()
+        service.tmdb_service.set_latency_budget(0.3)
+
+        started = time.monotonic()
+        self.assertIsNone(service._sync_movie_claimed(550))
+        self.assertLess(time.monotonic() - started, 1)
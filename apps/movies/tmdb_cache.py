@@ -0,0 +1,218 @@
+"""
+Response cache for TMDB API calls.
+Keeps a size-bounded LRU of raw response bodies in process memory, optionally
+backed by a Django cache alias so entries survive restarts and are shared
+between workers. Stale entries are kept for a grace period so they can be
+revalidated with ETag/Last-Modified instead of downloading the full body again.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """A cached TMDB response body with its validators"""
+    content: bytes
+    expires_at: float
+    etag: str = ''
+    last_modified: str = ''
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def json(self) -> Dict:
+        """Decode a fresh copy of the body so callers can mutate it safely"""
+        return json.loads(self.content)
+
+
+class TMDBResponseCache:
+    """Thread-safe LRU cache for TMDB responses with per-endpoint TTLs"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttls: Dict[str, int],
+                 default_ttl: int, stale_grace: int, persistent_alias: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.stale_grace = stale_grace
+        self.persistent_alias = persistent_alias
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'revalidated': 0,
+            'stores': 0,
+            'evictions': 0,
+            'persistent_hits': 0,
+        }
+
+    @staticmethod
+    def build_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        """Build a cache key from the endpoint and normalized params (without api_key)"""
+        items = sorted(
+            (str(key), str(value).lower() if isinstance(value, bool) else str(value))
+            for key, value in (params or {}).items()
+            if key != 'api_key' and value is not None
+        )
+        return f"{endpoint.strip('/')}?{urlencode(items)}"
+
+    def ttl_for(self, endpoint: str) -> int:
+        """Return the TTL (seconds) configured for an endpoint"""
+        endpoint = endpoint.strip('/')
+        if endpoint in self.ttls:
+            return self.ttls[endpoint]
+        for pattern, ttl in self.ttls.items():
+            if fnmatch(endpoint, pattern):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key (fresh or stale) and update hit counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._load_persistent(key)
+
+        with self._lock:
+            if entry is None:
+                self._counters['misses'] += 1
+            elif entry.is_fresh:
+                self._counters['hits'] += 1
+            else:
+                self._counters['stale'] += 1
+        return entry
+
+    def store(self, key: str, content: bytes, ttl: int, etag: str = '', last_modified: str = ''):
+        """Store a response body; a non-positive TTL disables caching"""
+        if ttl <= 0 or len(content) > self.max_bytes:
+            return
+        entry = CacheEntry(
+            content=content,
+            expires_at=time.time() + ttl,
+            etag=etag or '',
+            last_modified=last_modified or ''
+        )
+        self._put(key, entry)
+        self._save_persistent(key, entry, ttl)
+        with self._lock:
+            self._counters['stores'] += 1
+
+    def refresh(self, key: str, entry: CacheEntry, ttl: int):
+        """Extend a stale entry after the server answered 304 Not Modified"""
+        entry.expires_at = time.time() + ttl
+        self._put(key, entry)
+        self._save_persistent(key, entry, ttl)
+        with self._lock:
+            self._counters['revalidated'] += 1
+
+    def clear(self):
+        """Drop every in-memory entry"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses'] + self._counters['stale']
+            return {
+                **self._counters,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_ratio': round(self._counters['hits'] / lookups, 4) if lookups else 0.0,
+            }
+
+    def _put(self, key: str, entry: CacheEntry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.content)
+            self._entries[key] = entry
+            self._size += len(entry.content)
+
+            # Evict least recently used entries until both bounds hold
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+                self._counters['evictions'] += 1
+
+    def _persistent_key(self, key: str) -> str:
+        return f"tmdb:response:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+    def _load_persistent(self, key: str) -> Optional[CacheEntry]:
+        if not self.persistent_alias:
+            return None
+        try:
+            entry = caches[self.persistent_alias].get(self._persistent_key(key))
+        except Exception as e:
+            logger.warning(f"TMDB persistent cache read failed: {e}")
+            return None
+        if entry is None:
+            return None
+        self._put(key, entry)
+        with self._lock:
+            self._counters['persistent_hits'] += 1
+        return entry
+
+    def _save_persistent(self, key: str, entry: CacheEntry, ttl: int):
+        if not self.persistent_alias:
+            return
+        try:
+            caches[self.persistent_alias].set(
+                self._persistent_key(key), entry, timeout=ttl + self.stale_grace
+            )
+        except Exception as e:
+            logger.warning(f"TMDB persistent cache write failed: {e}")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[TMDBResponseCache]:
+    """Return the process-wide TMDB response cache, or None when disabled"""
+    global _default_cache
+    if not settings.TMDB_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = TMDBResponseCache(
+                    max_entries=settings.TMDB_CACHE_MAX_ENTRIES,
+                    max_bytes=settings.TMDB_CACHE_MAX_BYTES,
+                    ttls=settings.TMDB_CACHE_TTLS,
+                    default_ttl=settings.TMDB_CACHE_DEFAULT_TTL,
+                    stale_grace=settings.TMDB_CACHE_STALE_GRACE,
+                    persistent_alias=settings.TMDB_CACHE_ALIAS,
+                )
+    return _default_cache
@@ -0,0 +1,205 @@
+"""
+Local stand-in for the TMDB API used for offline benchmarking and load tests.
+Serves recorded fixtures (see tmdb_transport.FixtureStore) for the endpoints
+TMDBService uses, optionally synthesizes deterministic payloads for requests
+without a fixture, and can inject latency and errors.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .tmdb_transport import FixtureStore, NOT_FOUND_BODY
+
+logger = logging.getLogger(__name__)
+
+ROUTES = [
+    re.compile(r'^movie/\d+$'),
+    re.compile(r'^movie/changes$'),
+    re.compile(r'^search/movie$'),
+    re.compile(r'^company/\d+$'),
+    re.compile(r'^genre/movie/list$'),
+]
+
+SYNTHETIC_GENRES = [
+    {'id': 28, 'name': 'Action'}, {'id': 12, 'name': 'Adventure'},
+    {'id': 16, 'name': 'Animation'}, {'id': 35, 'name': 'Comedy'},
+    {'id': 80, 'name': 'Crime'}, {'id': 18, 'name': 'Drama'},
+    {'id': 14, 'name': 'Fantasy'}, {'id': 27, 'name': 'Horror'},
+    {'id': 878, 'name': 'Science Fiction'}, {'id': 53, 'name': 'Thriller'},
+]
+
+
+def synthesize(endpoint: str, params: Dict) -> Optional[Dict]:
+    """Build a deterministic TMDB-shaped payload for an endpoint"""
+    parts = endpoint.split('/')
+    if endpoint == 'genre/movie/list':
+        return {'genres': SYNTHETIC_GENRES}
+
+    if parts[0] == 'company':
+        company_id = int(parts[1])
+        return {
+            'id': company_id,
+            'name': f"Synthetic Studio {company_id}",
+            'logo_path': f"/company{company_id}.png",
+            'origin_country': 'US',
+        }
+
+    if endpoint == 'movie/changes':
+        page = int(params.get('page', 1))
+        seed = f"{params.get('start_date')}:{params.get('end_date')}"
+        changed = sorted(random.Random(seed).sample(range(1, 5000), 250))
+        results = [{'id': movie_id, 'adult': False} for movie_id in changed[(page - 1) * 100:page * 100]]
+        return {'page': page, 'results': results, 'total_pages': 3, 'total_results': len(changed)}
+
+    if parts[0] == 'movie':
+        movie_id = int(parts[1])
+        rng = random.Random(movie_id)
+        company_ids = rng.sample(range(1, 500), rng.randint(1, 4))
+        person_ids = rng.sample(range(1, 50000), 14)
+        return {
+            'id': movie_id,
+            'title': f"Synthetic Movie {movie_id}",
+            'original_title': f"Synthetic Movie {movie_id}",
+            'overview': f"A synthetic movie generated for benchmarking (#{movie_id}).",
+            'tagline': '',
+            'release_date': f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'runtime': rng.randint(80, 180),
+            'budget': rng.randint(0, 200) * 1000000,
+            'revenue': rng.randint(0, 900) * 1000000,
+            'status': 'Released',
+            'adult': False,
+            'popularity': round(rng.uniform(0, 500), 3),
+            'vote_average': round(rng.uniform(1, 10), 1),
+            'vote_count': rng.randint(0, 30000),
+            'poster_path': f"/poster{movie_id}.jpg",
+            'backdrop_path': f"/backdrop{movie_id}.jpg",
+            'genres': rng.sample(SYNTHETIC_GENRES, rng.randint(1, 3)),
+            # Only id/name, like TMDB's embedded companies, so syncs fetch details
+            'production_companies': [
+                {'id': company_id, 'name': f"Synthetic Studio {company_id}"}
+                for company_id in company_ids
+            ],
+            'credits': {
+                'cast': [
+                    {'id': person_id, 'name': f"Actor {person_id}", 'character': f"Role {order}",
+                     'order': order, 'profile_path': None}
+                    for order, person_id in enumerate(person_ids[:10])
+                ],
+                'crew': [
+                    {'id': person_ids[10], 'name': f"Director {person_ids[10]}",
+                     'job': 'Director', 'department': 'Directing'},
+                    {'id': person_ids[11], 'name': f"Producer {person_ids[11]}",
+                     'job': 'Producer', 'department': 'Production'},
+                    {'id': person_ids[12], 'name': f"Writer {person_ids[12]}",
+                     'job': 'Screenplay', 'department': 'Writing'},
+                    {'id': person_ids[13], 'name': f"Composer {person_ids[13]}",
+                     'job': 'Original Music Composer', 'department': 'Sound'},
+                ],
+            },
+            'external_ids': {'imdb_id': f"tt{movie_id:07d}"},
+        }
+
+    if endpoint == 'search/movie':
+        query = params.get('query', '')
+        page = int(params.get('page', 1))
+        seed = int(hashlib.sha1(query.lower().encode('utf-8')).hexdigest()[:8], 16)
+        rng = random.Random(seed + page)
+        results = []
+        for _ in range(20):
+            movie_id = rng.randint(1, 1000000)
+            results.append({
+                'id': movie_id,
+                'title': f"{query.title()} {movie_id}",
+                'original_title': f"{query.title()} {movie_id}",
+                'overview': '',
+                'release_date': f"{rng.randint(1950, 2024)}-01-01",
+                'popularity': round(rng.uniform(0, 500), 3),
+                'vote_average': round(rng.uniform(1, 10), 1),
+                'vote_count': rng.randint(0, 30000),
+                'poster_path': f"/poster{movie_id}.jpg",
+                'adult': False,
+            })
+        return {'page': page, 'results': results, 'total_pages': 5, 'total_results': 100}
+
+    return None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Request handler; configuration lives on the server instance"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        split = urlsplit(self.path)
+        endpoint = split.path.strip('/')
+        if endpoint.startswith('3/'):
+            endpoint = endpoint[2:]
+        params = dict(parse_qsl(split.query))
+
+        if server.latency:
+            time.sleep(max(0.0, random.gauss(server.latency, server.latency_jitter)))
+
+        if not any(route.match(endpoint) for route in ROUTES):
+            return self._send_json(404, NOT_FOUND_BODY)
+
+        if server.error_rate and random.random() < server.error_rate:
+            if random.random() < 0.5:
+                return self._send_json(429, {'status_code': 25, 'status_message': 'Rate limited'},
+                                       {'Retry-After': '1'})
+            return self._send_json(503, {'status_code': 11, 'status_message': 'Internal error'})
+
+        status_code, body, headers = self._lookup(endpoint, params)
+        etag = headers.get('ETag')
+        if etag and self.headers.get('If-None-Match') == etag:
+            return self._send_json(304, None, headers)
+        return self._send_json(status_code, body, headers)
+
+    def _lookup(self, endpoint: str, params: Dict) -> Tuple[int, Optional[Dict], Dict]:
+        fixture = self.server.store.load(endpoint, params) if self.server.store else None
+        if fixture is not None:
+            return fixture.get('status', 200), fixture.get('body'), fixture.get('headers', {})
+        if self.server.synthesize:
+            body = synthesize(endpoint, params)
+            if body is not None:
+                digest = hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+                return 200, body, {'ETag': f'"{digest[:16]}"'}
+        return 404, NOT_FOUND_BODY, {}
+
+    def _send_json(self, status_code: int, body, headers: Optional[Dict] = None):
+        content = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status_code)
+        for key, value in (headers or {}).items():
+            if key.lower() not in ('content-type', 'content-length'):
+                self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+        self.server.requests_served += 1
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8765, fixture_dir: Optional[str] = None,
+                latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                synthesize_missing: bool = False) -> ThreadingHTTPServer:
+    """Create (but do not start) a stand-in server; latencies are in seconds"""
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.store = FixtureStore(fixture_dir) if fixture_dir else None
+    server.latency = latency
+    server.latency_jitter = latency_jitter
+    server.error_rate = error_rate
+    server.synthesize = synthesize_missing
+    server.requests_served = 0
+    return server
@@ -0,0 +1,213 @@
+"""
+Pluggable HTTP transports for TMDBService.
+HTTPTransport talks to the network through pooled keep-alive sessions,
+RecordingTransport additionally captures every response into a fixture
+directory, and ReplayTransport serves those fixtures without any network
+access, so sync and search paths can be benchmarked offline.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping in fixtures (cache validators and rate limits)
+RECORDED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Retry-After']
+
+NOT_FOUND_BODY = {
+    'success': False,
+    'status_code': 34,
+    'status_message': 'The resource you requested could not be found.'
+}
+
+
+class FixtureStore:
+    """Reads and writes recorded TMDB responses as JSON files"""
+
+    def __init__(self, directory: str):
+        self.directory = str(directory)
+
+    @staticmethod
+    def normalize_params(params: Optional[Dict]) -> Dict:
+        """
+        Drop credentials and stringify values the way requests encodes them
+        (False -> 'False'), so a request recorded from Python params and the
+        same request parsed from a query string by the stand-in share a fixture
+        """
+        return {
+            str(key): str(value)
+            for key, value in sorted((params or {}).items())
+            if key != 'api_key' and value is not None
+        }
+
+    def path_for(self, endpoint: str, params: Optional[Dict] = None) -> str:
+        """Return the fixture path; requests with params get a hashed suffix"""
+        name = endpoint.strip('/').replace('/', '__')
+        normalized = self.normalize_params(params)
+        if normalized:
+            digest = hashlib.sha1(
+                json.dumps(normalized, sort_keys=True).encode('utf-8')
+            ).hexdigest()[:12]
+            name = f"{name}__{digest}"
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Load the fixture for a request, falling back to the endpoint-wide fixture"""
+        for path in (self.path_for(endpoint, params), self.path_for(endpoint)):
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as fixture:
+                    return json.load(fixture)
+        return None
+
+    def save(self, endpoint: str, params: Optional[Dict], status_code: int,
+             headers: Dict, body) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(endpoint, params)
+        fixture = {
+            'endpoint': endpoint.strip('/'),
+            'params': self.normalize_params(params),
+            'status': status_code,
+            'headers': {key: headers[key] for key in RECORDED_HEADERS if key in headers},
+            'body': body,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            json.dump(fixture, out, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+        return path
+
+
+def build_response(url: str, status_code: int, body, headers: Optional[Dict] = None) -> requests.Response:
+    """Build a requests.Response from a fixture so callers see the usual API"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.headers.setdefault('Content-Type', 'application/json;charset=utf-8')
+    response._content = json.dumps(body).encode('utf-8') if body is not None else b''
+    response.encoding = 'utf-8'
+    return response
+
+
+class HTTPTransport:
+    """Real network transport backed by process-wide pooled sessions"""
+
+    # Sessions keyed by whether failed requests are retried
+    _sessions = {}
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls, retries: bool = True) -> requests.Session:
+        """Return a shared keep-alive session, creating it on first use"""
+        session = cls._sessions.get(retries)
+        if session is None:
+            with cls._session_lock:
+                session = cls._sessions.get(retries)
+                if session is None:
+                    session = cls._sessions[retries] = cls._build_session(retries)
+        return session
+
+    @staticmethod
+    def _build_session(retries: bool = True) -> requests.Session:
+        """Build a pooled session that retries 429/5xx with jittered backoff"""
+        max_retries = settings.TMDB_HTTP_MAX_RETRIES if retries else 0
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            status_forcelist=settings.TMDB_HTTP_RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=settings.TMDB_HTTP_BACKOFF_FACTOR,
+            backoff_max=settings.TMDB_HTTP_BACKOFF_MAX,
+            backoff_jitter=settings.TMDB_HTTP_BACKOFF_JITTER,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.TMDB_HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.TMDB_HTTP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def close_sessions(cls):
+        """Close the shared sessions and drop their pooled connections"""
+        with cls._session_lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+
+    def get(self, endpoint: str, url: str, params: Dict, headers: Dict,
+            timeout, retries: bool = True) -> requests.Response:
+        return self.get_session(retries).get(url, params=params, headers=headers, timeout=timeout)
+
+
+class RecordingTransport(HTTPTransport):
+    """Network transport that also saves successful responses as fixtures"""
+
+    def __init__(self, fixture_dir: str):
+        self.store = FixtureStore(fixture_dir)
+
+    def get(self, endpoint: str, url: str, params: Dict, headers: Dict,
+            timeout, retries: bool = True) -> requests.Response:
+        response = super().get(endpoint, url, params, headers, timeout, retries)
+        if response.status_code in (200, 404):
+            try:
+                body = response.json()
+            except ValueError:
+                logger.warning(f"Not recording non-JSON TMDB response for {endpoint}")
+            else:
+                path = self.store.save(endpoint, params, response.status_code, response.headers, body)
+                logger.debug(f"Recorded TMDB fixture {path}")
+        return response
+
+
+class ReplayTransport:
+    """Offline transport that serves recorded fixtures; unknown requests get a 404"""
+
+    def __init__(self, fixture_dir: str):
+        self.store = FixtureStore(fixture_dir)
+
+    def get(self, endpoint: str, url: str, params: Dict, headers: Dict,
+            timeout, retries: bool = True) -> requests.Response:
+        fixture = self.store.load(endpoint, params)
+        if fixture is None:
+            logger.warning(f"No TMDB fixture for {endpoint} {FixtureStore.normalize_params(params)}")
+            return build_response(url, 404, NOT_FOUND_BODY)
+
+        fixture_headers = fixture.get('headers', {})
+        etag = fixture_headers.get('ETag')
+        if etag and headers.get('If-None-Match') == etag:
+            return build_response(url, 304, None, fixture_headers)
+        return build_response(url, fixture.get('status', 200), fixture.get('body'), fixture_headers)
+
+
+TRANSPORTS = {
+    'http': lambda: HTTPTransport(),
+    'record': lambda: RecordingTransport(settings.TMDB_FIXTURE_DIR),
+    'replay': lambda: ReplayTransport(settings.TMDB_FIXTURE_DIR),
+}
+
+
+def get_transport(mode: Optional[str] = None):
+    """Build the transport selected by ``mode`` or the TMDB_TRANSPORT setting"""
+    mode = mode or settings.TMDB_TRANSPORT
+    try:
+        return TRANSPORTS[mode]()
+    except KeyError:
+        raise ValueError(f"Unknown TMDB transport '{mode}', expected one of {sorted(TRANSPORTS)}")
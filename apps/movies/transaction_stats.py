@@ -0,0 +1,73 @@
+"""
+Hold-time instrumentation for write transactions.
+On SQLite a write transaction blocks every other writer for as long as it is
+open, so each sync records how long its transaction stayed open; recent
+samples are kept per label for percentiles and slow ones are logged.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionStats:
+    """Rolling per-label statistics of transaction hold times"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._totals: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(label, deque(maxlen=self.window)).append(seconds)
+            totals = self._totals.setdefault(label, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['total_seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            report = {}
+            for label, samples in self._samples.items():
+                ordered = sorted(samples)
+                totals = self._totals[label]
+                report[label] = {
+                    'count': totals['count'],
+                    'total_seconds': round(totals['total_seconds'], 3),
+                    'max_ms': round(totals['max_seconds'] * 1000, 1),
+                    'p50_ms': round(ordered[int(0.50 * (len(ordered) - 1))] * 1000, 1),
+                    'p95_ms': round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1),
+                }
+            return report
+
+
+write_transactions = TransactionStats()
+
+
+@contextmanager
+def timed_atomic(label: str):
+    """
+    transaction.atomic() that records how long the transaction was held,
+    including the commit; yields a dict whose 'seconds' is set on exit.
+    """
+    timing = {'seconds': None}
+    started = time.perf_counter()
+    try:
+        with transaction.atomic():
+            yield timing
+    finally:
+        held = time.perf_counter() - started
+        timing['seconds'] = held
+        write_transactions.record(label, held)
+        if held >= settings.SLOW_WRITE_TRANSACTION_SECONDS:
+            logger.warning(f"Write transaction '{label}' held for {held * 1000:.0f}ms")
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MovieViewSet, GenreViewSet, ProductionCompanyViewSet, PersonViewSet
+from .views import (
+    MovieViewSet, GenreViewSet, ProductionCompanyViewSet, PersonViewSet, BackgroundJobViewSet
+)
 
 app_name = 'movies'
 
@@ -10,6 +12,7 @@ router.register(r'movies', MovieViewSet, basename='movie')
 router.register(r'genres', GenreViewSet, basename='genre')
 router.register(r'production-companies', ProductionCompanyViewSet, basename='production-company')
 router.register(r'people', PersonViewSet, basename='person')
+router.register(r'jobs', BackgroundJobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,34 +1,55 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Q, Prefetch
+from django.conf import settings
+from django.db.models import Prefetch
+from django.urls import reverse
 from utils.permissions import IsAdminOrReadOnly
 import logging
+import math
 
 from .models import (
     Movie, Genre, ProductionCompany, Person,
-    MovieCast, MovieCrew
+    MovieCast, MovieCrew, BackgroundJob
 )
 from .serializers import (
     MovieListSerializer, MovieDetailSerializer, MovieCreateUpdateSerializer,
     GenreSerializer, GenreDetailSerializer,
     ProductionCompanySerializer, ProductionCompanyDetailSerializer,
     PersonSerializer, PersonDetailSerializer,
-    MovieCastSerializer, MovieCrewSerializer
+    MovieCastSerializer, MovieCrewSerializer, BackgroundJobSerializer
+)
+from .filters import (
+    MovieFilter, GenreFilter, ProductionCompanyFilter, PersonFilter,
+    MovieSearchFilter, RelevanceOrderingFilter
 )
-from .filters import MovieFilter, GenreFilter, ProductionCompanyFilter, PersonFilter
 from .services import MovieSearchService, MovieDataService, TMDBService
+from .ratelimit import PRIORITY_HIGH
+from .coalescing import tmdb_requests, movie_syncs
+from .jobs import enqueue
+from .search_cache import get_search_cache
+from .facets import get_facets, parse_facets
+from .autocomplete import get_title_index
 
 logger = logging.getLogger(__name__)
 
+# Job priority of admin-triggered syncs (search-triggered syncs use 0)
+ADMIN_JOB_PRIORITY = 10
+
+
+def _is_true(value) -> bool:
+    """Parse a boolean request parameter"""
+    return str(value).lower() in ('1', 'true', 'yes')
+
 
 class MovieViewSet(viewsets.ModelViewSet):
     """ViewSet for Movie model"""
     queryset = Movie.objects.all()
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, MovieSearchFilter, RelevanceOrderingFilter]
     filterset_class = MovieFilter
     search_fields = ['title', 'original_title', 'overview', 'tagline']
     ordering_fields = [
@@ -45,6 +66,19 @@ class MovieViewSet(viewsets.ModelViewSet):
             return MovieCreateUpdateSerializer
         return MovieDetailSerializer
 
+    def list(self, request, *args, **kwargs):
+        """List movies; ?facets= adds counts per facet value of the filtered set"""
+        if not request.query_params.get('facets'):
+            return super().list(request, *args, **kwargs)
+        try:
+            names = parse_facets(request.query_params['facets'])
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = super().list(request, *args, **kwargs)
+        response.data['facets'] = get_facets(self.filter_queryset(self.get_queryset()), names)
+        return response
+
     def get_queryset(self):
         """Optimize queryset with select_related and prefetch_related"""
         queryset = Movie.objects.all()
@@ -72,7 +106,7 @@ class MovieViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Enhanced search movies endpoint with TMDB integration"""
+        """Enhanced search movies endpoint with TMDB integration (cursor-paginated)"""
         query = request.query_params.get('q', '')
         if not query:
             return Response({'detail': 'Search query parameter "q" is required.'}, 
@@ -81,56 +115,109 @@ class MovieViewSet(viewsets.ModelViewSet):
         # Get search options
         include_tmdb = request.query_params.get('include_tmdb', 'true').lower() == 'true'
         sync_missing = request.query_params.get('sync_missing', 'true').lower() == 'true'
+        cursor = request.query_params.get('cursor', '')
+        try:
+            page_size = min(
+                int(request.query_params.get('page_size', settings.SEARCH_PAGE_SIZE)), settings.SEARCH_MAX_PAGE_SIZE
+            )
+        except ValueError:
+            return Response({'detail': 'Query parameter "page_size" must be an integer.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        page_size = max(page_size, 1)
+        
+        # Popular queries are answered from the versioned response cache
+        search_cache = get_search_cache()
+        if search_cache:
+            cache_key = search_cache.build_key(
+                query, include_tmdb=include_tmdb, sync_missing=sync_missing, cursor=cursor, page_size=page_size
+            )
+            cached = search_cache.get(cache_key)
+            if cached is not None:
+                return Response(cached)
+        
+        response = self._search(request, query, include_tmdb, sync_missing, cursor, page_size)
         
+        if search_cache and response.status_code == status.HTTP_200_OK:
+            stats = response.data.get('search_stats', {})
+            if not stats.get('degraded'):
+                search_cache.set(
+                    cache_key, response.data,
+                    negative=not response.data.get('results') and not response.data.get('tmdb_results')
+                )
+        return response
+
+    def _search(self, request, query, include_tmdb, sync_missing, cursor, page_size):
+        """Run a search and build its response (uncached)"""
         try:
-            if include_tmdb and sync_missing:
+            search_service = MovieSearchService()
+            if cursor:
+                # Later page: local matches continue from the cursor, then TMDB pages
+                state = search_service.read_cursor(cursor, query)
+                if state is None:
+                    return Response({'detail': 'Invalid or expired cursor.'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+                search_results = search_service.search_page(query, state, page_size)
+            elif include_tmdb and sync_missing:
                 # Use comprehensive search that includes TMDB and syncing
-                search_service = MovieSearchService()
-                search_results = search_service.comprehensive_search(query, include_tmdb=True)
-                
-                # Combine local and synced results
-                all_movies = list(search_results['local_results']) + search_results['synced_movies']
-                
-                # Serialize the movies
-                serializer = MovieListSerializer(all_movies, many=True)
-                
-                response_data = {
-                    'query': query,
-                    'results': serializer.data,
-                    'search_stats': {
-                        'local_count': len(search_results['local_results']),
-                        'tmdb_count': len(search_results['tmdb_results']),
-                        'synced_count': len(search_results['synced_movies']),
-                        'total_count': len(all_movies)
-                    }
-                }
-                
-                return Response(response_data)
+                search_results = search_service.comprehensive_search(query, include_tmdb=True, page_size=page_size)
             else:
                 # Standard local search only
-                queryset = self.get_queryset().filter(
-                    Q(title__icontains=query) |
-                    Q(original_title__icontains=query) |
-                    Q(overview__icontains=query) |
-                    Q(tagline__icontains=query)
-                ).distinct()
-                
-                page = self.paginate_queryset(queryset)
-                if page is not None:
-                    serializer = MovieListSerializer(page, many=True)
-                    return self.get_paginated_response(serializer.data)
-                
-                serializer = MovieListSerializer(queryset, many=True)
-                return Response({
-                    'query': query,
-                    'results': serializer.data,
-                    'search_stats': {
-                        'local_count': len(serializer.data),
-                        'tmdb_count': 0,
-                        'synced_count': 0,
-                        'total_count': len(serializer.data)
+                search_results = search_service.search_page(
+                    query, search_service.first_page_state(include_tmdb=False), page_size
+                )
+            
+            # Stored movies (local matches, stored TMDB hits, synced ones) in merged order
+            movies = [entry['movie'] for entry in search_results['merged'] if entry['movie']]
+            
+            # Serialize the movies
+            serializer = MovieListSerializer(movies, many=True)
+            
+            response_data = {
+                'query': query,
+                'results': serializer.data,
+                'tmdb_results': [
+                    search_service.summarize_tmdb_result(movie_data)
+                    for movie_data in search_results['tmdb_results']
+                ],
+                # One ranking over both lists: movies by id, TMDB-only hits by tmdb_id
+                'merged': [
+                    {
+                        'source': entry['source'],
+                        'id': str(entry['movie'].id) if entry['movie'] else None,
+                        'tmdb_id': entry['movie'].tmdb_id if entry['movie'] else entry['tmdb']['id'],
+                        'score': round(entry['score'], 5),
                     }
-                })
+                    for entry in search_results['merged']
+                ],
+                # No COUNT: clients follow `next` until it is null
+                'next': replace_query_param(
+                    request.build_absolute_uri(), 'cursor', search_service.make_cursor(search_results['next'])
+                ) if search_results['next'] else None,
+                'search_stats': {
+                    'local_count': len(search_results['local_results']),
+                    'tmdb_count': len(search_results['tmdb_results']),
+                    'synced_count': len(search_results['synced_movies']),
+                    'queued_count': len(search_results['queued_syncs']),
+                    'fuzzy_count': len(search_results['fuzzy_matches']),
+                    'total_count': len(movies),
+                    'timings': search_results['timings'],
+                    'degraded': search_results['degraded']
+                }
+            }
+            
+            # Typo-tolerant matches carry their title similarity (0..1)
+            if search_results['fuzzy_matches']:
+                response_data['fuzzy_matches'] = search_results['fuzzy_matches']
+            
+            # Syncs run in the background; clients poll search_results with the token
+            if search_results['queued_syncs']:
+                response_data['sync'] = {
+                    'token': search_service.make_sync_token(search_results['queued_syncs']),
+                    'pending_tmdb_ids': search_results['queued_syncs'],
+                    'poll_url': request.build_absolute_uri(reverse('movies:movie-search-results'))
+                }
+            
+            return Response(response_data)
                 
         except Exception as e:
             logger.error(f"Search error for query '{query}': {str(e)}")
@@ -139,6 +226,51 @@ class MovieViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['get'])
+    def search_results(self, request):
+        """Poll (or long-poll with wait=<seconds>) for movies synced after a search"""
+        token = request.query_params.get('token', '')
+        if not token:
+            return Response({'detail': 'Query parameter "token" is required.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            wait = math.nan
+        if not math.isfinite(wait):
+            return Response({'detail': 'Query parameter "wait" must be a number.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        results = MovieSearchService().get_synced_results(token, wait=wait)
+        if results is None:
+            return Response({'detail': 'Invalid or expired token.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'complete': results['complete'],
+            'results': MovieListSerializer(results['movies'], many=True).data,
+            'pending_tmdb_ids': results['pending_tmdb_ids'],
+            'failed_tmdb_ids': results['failed_tmdb_ids']
+        })
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Title suggestions for a search box, served from the in-process prefix index"""
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            return Response({'detail': 'Query parameter "q" is required.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), settings.AUTOCOMPLETE_MAX_LIMIT)
+        except ValueError:
+            return Response({'detail': 'Query parameter "limit" must be an integer.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'query': query,
+            'results': get_title_index().suggest(query, limit=max(limit, 1))
+        })
+
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured movies"""
@@ -202,14 +334,39 @@ class MovieViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            movie_service = MovieDataService()
-            movie = movie_service.sync_movie_from_tmdb(tmdb_id)
+            tmdb_id = int(tmdb_id)
+        except (TypeError, ValueError):
+            return Response(
+                {'detail': 'TMDB ID must be an integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # refresh=true re-fetches an existing movie and writes only what changed
+        refresh = _is_true(request.data.get('refresh', ''))
+        if _is_true(request.data.get('background', settings.TMDB_SYNC_IN_BACKGROUND)):
+            job = enqueue(
+                'movies.sync_movie',
+                {'tmdb_id': tmdb_id, 'refresh': refresh, 'priority': PRIORITY_HIGH},
+                priority=ADMIN_JOB_PRIORITY,
+                # A queued plain sync would not refresh, so refreshes get their own key
+                dedupe_key=f"sync_movie:{tmdb_id}:refresh" if refresh else f"sync_movie:{tmdb_id}"
+            )
+            return Response({
+                'message': f'Sync of TMDB ID {tmdb_id} queued',
+                'job': BackgroundJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        try:
+            movie_service = MovieDataService(priority=PRIORITY_HIGH)
+            movie = movie_service.sync_movie_from_tmdb(tmdb_id, update_existing=refresh)
             
             if movie:
                 serializer = MovieDetailSerializer(movie)
                 return Response({
                     'message': f'Successfully synced movie: {movie.title}',
-                    'movie': serializer.data
+                    'movie': serializer.data,
+                    'timings': movie_service.last_sync_timings,
+                    'changes': movie_service.last_sync_changes
                 }, status=status.HTTP_201_CREATED)
             else:
                 return Response(
@@ -227,8 +384,15 @@ class MovieViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def sync_genres_from_tmdb(self, request):
         """Sync all genres from TMDB"""
+        if _is_true(request.data.get('background', settings.TMDB_SYNC_IN_BACKGROUND)):
+            job = enqueue('movies.sync_genres', priority=ADMIN_JOB_PRIORITY, dedupe_key='sync_genres')
+            return Response({
+                'message': 'Genre sync queued',
+                'job': BackgroundJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
+        
         try:
-            movie_service = MovieDataService()
+            movie_service = MovieDataService(priority=PRIORITY_HIGH)
             genres = movie_service.sync_genres_from_tmdb()
             
             serializer = GenreSerializer(genres, many=True)
@@ -244,6 +408,23 @@ class MovieViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def tmdb_stats(self, request):
+        """Report TMDB client health and counters"""
+        search_cache = get_search_cache()
+        return Response({
+            'cache': TMDBService.cache_stats(),
+            'rate_limit': TMDBService.rate_limit_stats(),
+            'circuit_breaker': TMDBService.breaker_stats(),
+            'write_transactions': MovieDataService.transaction_stats(),
+            'write_queue': MovieDataService.write_queue_stats(),
+            'search_cache': search_cache.stats() if search_cache else None,
+            'coalesced': {
+                'requests': tmdb_requests.coalesced,
+                'syncs': movie_syncs.coalesced
+            }
+        })
+    
     @action(detail=False, methods=['get'])
     def tmdb_search(self, request):
         """Search TMDB directly without syncing to database"""
@@ -254,6 +435,12 @@ class MovieViewSet(viewsets.ModelViewSet):
         
         try:
             tmdb_service = TMDBService()
+            if not tmdb_service.is_available():
+                return Response(
+                    {'detail': 'TMDB is temporarily unavailable.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            tmdb_service.set_latency_budget(settings.TMDB_SEARCH_LATENCY_BUDGET)
             results = tmdb_service.search_movies(query)
             
             if results:
@@ -261,6 +448,11 @@ class MovieViewSet(viewsets.ModelViewSet):
                     'query': query,
                     'tmdb_results': results
                 })
+            elif tmdb_service.degraded:
+                return Response(
+                    {'detail': 'TMDB did not respond in time.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             else:
                 return Response(
                     {'detail': 'No results found on TMDB'}, 
@@ -324,3 +516,14 @@ class PersonViewSet(viewsets.ModelViewSet):
         if self.action == 'retrieve':
             return PersonDetailSerializer
         return PersonSerializer
+
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Read-only ViewSet for polling background jobs (admin only)"""
+    queryset = BackgroundJob.objects.all()
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['status', 'name']
+    ordering_fields = ['created_at', 'run_at', 'duration_seconds']
+    ordering = ['-created_at']
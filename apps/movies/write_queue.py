@@ -0,0 +1,227 @@
+"""
+Optional single-writer queue for SQLite.
+SQLite allows one writer at a time; concurrent writers otherwise collide with
+"database is locked" errors or spin in busy waits. When enabled, write
+callables are handed to one dedicated writer thread per process, which commits
+them in groups (one transaction, a savepoint per callable) while holding a
+cross-process file lock, so writers on the host queue up instead of
+contending. Reads are unaffected and keep running on the callers' threads.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .transaction_stats import timed_atomic
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueueTimeout(Exception):
+    """Raised when a submitted write did not complete in time"""
+    pass
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by every process on the host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        if self._file is None:
+            self._file = open(self.path, 'a+')
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+
+class WriteQueue:
+    """Runs submitted write callables on one writer thread with group commit"""
+
+    def __init__(self, lock_path: str, max_batch: int = 64, group_window: float = 0.005,
+                 timeout: float = 30.0):
+        self.lock = FileLock(lock_path)
+        self.max_batch = max_batch
+        self.group_window = group_window
+        self.timeout = timeout
+
+        self._queue: "queue.Queue[Tuple[Callable, tuple, dict, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'writes': 0, 'failed_writes': 0, 'commits': 0, 'failed_commits': 0}
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Run ``fn`` on the writer thread and return its result once committed"""
+        return self.submit_timed(fn, *args, **kwargs)[0]
+
+    def submit_timed(self, fn: Callable, *args, **kwargs) -> Tuple[Any, Optional[float]]:
+        """
+        Like submit(), also returning how long the group transaction that
+        committed ``fn`` was held (None when called from the writer thread,
+        whose group is still open)
+        """
+        if self.on_writer_thread():
+            return fn(*args, **kwargs), None
+        self._ensure_started()
+        future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriteQueueTimeout(f"Write not started within {self.timeout}s; it was cancelled")
+        # Already running: it commits (or fails) with its group, so report that outcome
+        logger.warning(f"Write started but not committed within {self.timeout}s, waiting for its group")
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise WriteQueueTimeout(
+                f"Write started but not committed within {2 * self.timeout}s; it may still commit"
+            )
+
+    def on_writer_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.error(f"Write queue failed to commit a group of {len(batch)} writes: {e}")
+            finally:
+                close_old_connections()
+
+    def _next_batch(self) -> List[Tuple[Callable, tuple, dict, Future]]:
+        """Block for one write, then gather what arrives within the group window"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.group_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with self.lock, timed_atomic('write_queue') as group:
+                for fn, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        # Savepoint per write so one failure does not sink the group
+                        with transaction.atomic():
+                            outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # Locking or committing failed: nothing in the group was written
+            self._record(commits=0, failed_commits=1, writes=0, failed_writes=len(batch))
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        self._record(commits=1, failed_commits=0, writes=len(outcomes) - failed, failed_writes=failed)
+        # Results are only handed out after the commit succeeded
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((result, group['seconds']))
+
+    def _record(self, **counts):
+        with self._stats_lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def stats(self):
+        with self._stats_lock:
+            writes = self._stats['writes'] + self._stats['failed_writes']
+            return {
+                **self._stats,
+                'queued': self._queue.qsize(),
+                'writes_per_commit': round(writes / self._stats['commits'], 2) if self._stats['commits'] else 0.0,
+            }
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> Optional[WriteQueue]:
+    """Return the process-wide write queue, or None when disabled"""
+    global _write_queue
+    if not settings.SQLITE_WRITE_QUEUE_ENABLED:
+        return None
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(
+                    lock_path=settings.SQLITE_WRITE_LOCK_PATH or f"{settings.DATABASES['default']['NAME']}.write.lock",
+                    max_batch=settings.SQLITE_WRITE_QUEUE_MAX_BATCH,
+                    group_window=settings.SQLITE_WRITE_QUEUE_GROUP_WINDOW,
+                    timeout=settings.SQLITE_WRITE_QUEUE_TIMEOUT,
+                )
+    return _write_queue
+
+
+def run_write(fn: Callable, *args, **kwargs):
+    """
+    Run a write callable through the write queue when it is enabled, or
+    directly otherwise. Callers already inside a transaction run inline so
+    their writes stay part of it.
+    """
+    write_queue = get_write_queue()
+    if write_queue is None or connection.in_atomic_block:
+        return fn(*args, **kwargs)
+    return write_queue.submit(fn, *args, **kwargs)
+
+
+def run_timed_write(label: str, fn: Callable, *args, **kwargs) -> Tuple[Any, Optional[float]]:
+    """
+    run_write() in a timed transaction; returns the result and the hold time.
+    Queued writes share their group's transaction, so they report the group's
+    hold time (recorded once per group under 'write_queue') rather than their
+    own savepoint's.
+    """
+    def write():
+        with timed_atomic(label) as txn:
+            result = fn(*args, **kwargs)
+        return result, txn['seconds']
+
+    write_queue = get_write_queue()
+    if write_queue is None or connection.in_atomic_block:
+        return write()
+    return write_queue.submit_timed(fn, *args, **kwargs)
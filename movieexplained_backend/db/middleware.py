@@ -0,0 +1,16 @@
+from .routers import read_connection
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadConnectionMiddleware:
+    """Serve reads of GET/HEAD/OPTIONS requests from the read alias"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            return self.get_response(request)
+        with read_connection():
+            return self.get_response(request)
@@ -0,0 +1,50 @@
+"""
+Database routing for the optional read alias.
+When DATABASES has a 'read' entry (a query-only connection to the same SQLite
+file), reads made while serving safe-method requests go to it. Writes,
+reads inside a transaction on the default alias, and everything outside a
+request (workers, commands) stay on 'default'.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_ALIAS = 'read'
+
+_use_read_connection = ContextVar('use_read_connection', default=False)
+
+
+@contextmanager
+def read_connection():
+    """Route reads in this context to the read alias when it is configured"""
+    token = _use_read_connection.set(READ_ALIAS in settings.DATABASES)
+    try:
+        yield
+    finally:
+        _use_read_connection.reset(token)
+
+
+class ReadConnectionRouter:
+    """Sends reads of safe-method requests to the query-only read alias"""
+
+    def db_for_read(self, model, **hints):
+        if _use_read_connection.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return READ_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are connections to the same database
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, READ_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == READ_ALIAS:
+            return False
+        return None
@@ -0,0 +1,77 @@
+"""
+SQLite backend with a production profile.
+Subclasses Django's sqlite3 backend to apply tuning pragmas (WAL journal,
+synchronous=NORMAL, mmap, page cache, busy timeout, in-memory temp tables) to
+every new connection, to check persistent connections before reuse, and to
+open query-only connections for the read alias (see db/routers.py).
+
+OPTIONS (besides the stock sqlite3 ones):
+    'pragmas':   {name: value} applied to every new connection
+    'read_only': open the connection with PRAGMA query_only = ON
+"""
+
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base as sqlite3_base
+
+Database = sqlite3_base.Database
+
+# Pragmas that may be set through OPTIONS['pragmas'], in the order they are applied
+# (busy_timeout first so switching the journal mode waits out other connections)
+SUPPORTED_PRAGMAS = [
+    'busy_timeout',
+    'journal_mode',
+    'synchronous',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+    'wal_autocheckpoint',
+    'journal_size_limit',
+]
+PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+
+class DatabaseWrapper(sqlite3_base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        pragmas = kwargs.pop('pragmas', None) or {}
+        self.read_only = bool(kwargs.pop('read_only', False))
+
+        unknown = set(pragmas) - set(SUPPORTED_PRAGMAS)
+        if unknown:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES[{self.alias!r}]['OPTIONS']['pragmas'] has unsupported "
+                f"pragmas: {', '.join(sorted(unknown))}"
+            )
+        for name, value in pragmas.items():
+            if not PRAGMA_VALUE.match(str(value)):
+                raise ImproperlyConfigured(f"Invalid value for PRAGMA {name}: {value!r}")
+        self.pragmas = [(name, pragmas[name]) for name in SUPPORTED_PRAGMAS if name in pragmas]
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas:
+            if name == 'journal_mode':
+                # Persistent in the database file; only switch when needed, and never
+                # from a query-only connection or on an in-memory database
+                if self.read_only or self.is_in_memory_db():
+                    continue
+                current = conn.execute('PRAGMA journal_mode').fetchone()[0]
+                if current.lower() == str(value).lower():
+                    continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def is_usable(self):
+        # The stock backend always reports True; run a trivial query so
+        # CONN_HEALTH_CHECKS replaces a broken persistent connection
+        try:
+            self.connection.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
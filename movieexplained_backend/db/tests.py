@@ -0,0 +1,113 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase
+from django.test.client import RequestFactory
+
+from apps.movies.models import Movie
+from .middleware import ReadConnectionMiddleware
+from .routers import READ_ALIAS, ReadConnectionRouter, read_connection
+from .sqlite.base import Database, DatabaseWrapper
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """Tests for the pragma handling of the SQLite backend"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def make_wrapper(self, **options):
+        settings_dict = {**settings.DATABASES[DEFAULT_DB_ALIAS], 'NAME': self.path, 'OPTIONS': options}
+        settings_dict.setdefault('TIME_ZONE', None)
+        wrapper = DatabaseWrapper(settings_dict, alias='backend_test')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        return wrapper.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_unsupported_pragma_is_rejected(self):
+        wrapper = self.make_wrapper(pragmas={'foreign_keys': 'OFF'})
+        with self.assertRaisesMessage(ImproperlyConfigured, 'unsupported pragmas: foreign_keys'):
+            wrapper.get_connection_params()
+
+    def test_pragma_value_cannot_inject_sql(self):
+        wrapper = self.make_wrapper(pragmas={'synchronous': 'OFF; DROP TABLE movies'})
+        with self.assertRaisesMessage(ImproperlyConfigured, 'Invalid value for PRAGMA synchronous'):
+            wrapper.get_connection_params()
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        wrapper = self.make_wrapper(
+            transaction_mode='IMMEDIATE',
+            pragmas={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234, 'cache_size': -2048},
+        )
+        wrapper.ensure_connection()
+
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1234)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -2048)
+        self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+
+    def test_read_only_connection_refuses_writes(self):
+        writer = self.make_wrapper(pragmas={'journal_mode': 'WAL'})
+        writer.ensure_connection()
+        writer.connection.execute('CREATE TABLE probe (id INTEGER)')
+
+        reader = self.make_wrapper(pragmas={'journal_mode': 'DELETE'}, read_only=True)
+        reader.ensure_connection()
+        # A query-only connection never switches the journal mode
+        self.assertEqual(self.pragma(reader, 'journal_mode'), 'wal')
+        with self.assertRaises(Database.OperationalError):
+            reader.connection.execute('INSERT INTO probe VALUES (1)')
+
+    def test_closed_connection_is_not_usable(self):
+        wrapper = self.make_wrapper()
+        wrapper.ensure_connection()
+        self.assertTrue(wrapper.is_usable())
+        wrapper.connection.close()
+        self.assertFalse(wrapper.is_usable())
+
+
+@mock.patch.dict(settings.DATABASES, {READ_ALIAS: {}})
+class ReadConnectionRouterTests(SimpleTestCase):
+    """Tests for routing safe-method reads to the read alias"""
+
+    def setUp(self):
+        self.router = ReadConnectionRouter()
+
+    def test_reads_use_the_read_alias_only_inside_read_connection(self):
+        self.assertIsNone(self.router.db_for_read(Movie))
+        with read_connection():
+            self.assertEqual(self.router.db_for_read(Movie), READ_ALIAS)
+            self.assertEqual(self.router.db_for_write(Movie), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_reads_inside_a_transaction_stay_on_default(self):
+        with read_connection(), mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+            self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_read_connection_is_a_no_op_without_the_alias(self):
+        with mock.patch.dict(settings.DATABASES):
+            del settings.DATABASES[READ_ALIAS]
+            with read_connection():
+                self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_relations_and_migrations(self):
+        default, read = Movie(), Movie()
+        default._state.db, read._state.db = DEFAULT_DB_ALIAS, READ_ALIAS
+        self.assertTrue(self.router.allow_relation(default, read))
+        self.assertFalse(self.router.allow_migrate(READ_ALIAS, 'movies'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'movies'))
+
+    def test_middleware_routes_safe_methods_only(self):
+        middleware = ReadConnectionMiddleware(lambda request: self.router.db_for_read(Movie))
+        factory = RequestFactory()
+        self.assertEqual(middleware(factory.get('/')), READ_ALIAS)
+        self.assertIsNone(middleware(factory.post('/')))
@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'movieexplained_backend.db.middleware.ReadConnectionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,13 +92,44 @@ WSGI_APPLICATION = 'movieexplained_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite with a production profile (movieexplained_backend/db/sqlite): WAL journal so
+# readers do not block the writer, fsync only at checkpoints, memory-mapped reads
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # negative = KiB
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'movieexplained_backend.db.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections, checked with SELECT 1 before reuse
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock at BEGIN so busy_timeout applies instead of
+            # read-to-write upgrades failing immediately with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': SQLITE_PRAGMAS,
+        },
     }
 }
 
+# Optional query-only connection for reads of GET/HEAD/OPTIONS requests
+SQLITE_READ_CONNECTIONS = os.getenv('SQLITE_READ_CONNECTIONS', 'False') == 'True'
+if SQLITE_READ_CONNECTIONS:
+    DATABASES['read'] = {
+        **DATABASES['default'],
+        'OPTIONS': {'pragmas': SQLITE_PRAGMAS, 'read_only': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['movieexplained_backend.db.routers.ReadConnectionRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -151,7 +183,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Page numbers, or keyset pages (no COUNT, no OFFSET) when ?cursor= is passed
+    'DEFAULT_PAGINATION_CLASS': 'utils.pagination.KeysetOrPageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -241,7 +274,148 @@ STATICFILES_DIRS = [
 # TMDB API Settings
 TMDB_API_KEY = os.getenv('TMDB_API_KEY')
 TMDB_ACCESS_TOKEN = os.getenv('TMDB_ACCESS_TOKEN')
-TMDB_BASE_URL = 'https://api.themoviedb.org/3'
+TMDB_BASE_URL = os.getenv('TMDB_BASE_URL', 'https://api.themoviedb.org/3')
+
+# TMDB transport: 'http' (network), 'record' (network + save fixtures) or 'replay' (fixtures only)
+TMDB_TRANSPORT = os.getenv('TMDB_TRANSPORT', 'http')
+TMDB_FIXTURE_DIR = Path(os.getenv('TMDB_FIXTURE_DIR', BASE_DIR / 'fixtures' / 'tmdb'))
+
+# TMDB HTTP transport (pooled keep-alive session shared by every TMDBService)
+TMDB_HTTP_POOL_CONNECTIONS = int(os.getenv('TMDB_HTTP_POOL_CONNECTIONS', 4))
+TMDB_HTTP_POOL_MAXSIZE = int(os.getenv('TMDB_HTTP_POOL_MAXSIZE', 20))
+TMDB_HTTP_CONNECT_TIMEOUT = float(os.getenv('TMDB_HTTP_CONNECT_TIMEOUT', 3.05))
+TMDB_HTTP_READ_TIMEOUT = float(os.getenv('TMDB_HTTP_READ_TIMEOUT', 10))
+TMDB_HTTP_MAX_RETRIES = int(os.getenv('TMDB_HTTP_MAX_RETRIES', 3))
+TMDB_HTTP_BACKOFF_FACTOR = float(os.getenv('TMDB_HTTP_BACKOFF_FACTOR', 0.5))
+TMDB_HTTP_BACKOFF_MAX = float(os.getenv('TMDB_HTTP_BACKOFF_MAX', 10))
+TMDB_HTTP_BACKOFF_JITTER = float(os.getenv('TMDB_HTTP_BACKOFF_JITTER', 0.3))
+TMDB_HTTP_RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+# TMDB response cache (in-process LRU, optionally persisted to a Django cache alias)
+TMDB_CACHE_ENABLED = os.getenv('TMDB_CACHE_ENABLED', 'True') == 'True'
+TMDB_CACHE_MAX_ENTRIES = int(os.getenv('TMDB_CACHE_MAX_ENTRIES', 5000))
+TMDB_CACHE_MAX_BYTES = int(os.getenv('TMDB_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+TMDB_CACHE_DEFAULT_TTL = 60 * 60
+TMDB_CACHE_STALE_GRACE = 24 * 60 * 60
+TMDB_CACHE_ALIAS = os.getenv('TMDB_CACHE_ALIAS') or None
+TMDB_CACHE_TTLS = {
+    'genre/movie/list': 7 * 24 * 60 * 60,
+    'movie/changes': 10 * 60,
+    'company/*': 7 * 24 * 60 * 60,
+    'person/*': 24 * 60 * 60,
+    'movie/*': 6 * 60 * 60,
+    'search/*': 15 * 60,
+}
+
+# Host-wide TMDB rate limiter (token bucket shared by all workers via a SQLite file)
+TMDB_RATE_LIMIT_ENABLED = os.getenv('TMDB_RATE_LIMIT_ENABLED', 'True') == 'True'
+TMDB_RATE_LIMIT_PATH = os.getenv('TMDB_RATE_LIMIT_PATH')  # defaults to the system temp dir
+TMDB_RATE_LIMIT_PER_SECOND = float(os.getenv('TMDB_RATE_LIMIT_PER_SECOND', 35))
+TMDB_RATE_LIMIT_BURST = int(os.getenv('TMDB_RATE_LIMIT_BURST', 40))
+# Seconds a caller may queue for a token before failing fast, per priority
+TMDB_RATE_LIMIT_MAX_WAIT = {
+    'high': 5.0,
+    'normal': 2.0,
+    'low': 0.5,
+    'batch': 30.0,
+}
+# Tokens each priority must leave in the bucket for higher priorities
+TMDB_RATE_LIMIT_RESERVE = {
+    'high': 0,
+    'normal': 4,
+    'low': 10,
+    'batch': 10,
+}
+
+# TMDB circuit breaker: opens when FAILURE_RATE of the last WINDOW calls failed or
+# took longer than SLOW_CALL_SECONDS, and stays open for RESET_TIMEOUT seconds
+TMDB_BREAKER_ENABLED = os.getenv('TMDB_BREAKER_ENABLED', 'True') == 'True'
+TMDB_BREAKER_WINDOW = int(os.getenv('TMDB_BREAKER_WINDOW', 20))
+TMDB_BREAKER_MIN_CALLS = int(os.getenv('TMDB_BREAKER_MIN_CALLS', 5))
+TMDB_BREAKER_FAILURE_RATE = float(os.getenv('TMDB_BREAKER_FAILURE_RATE', 0.5))
+TMDB_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('TMDB_BREAKER_SLOW_CALL_SECONDS', 3.0))
+TMDB_BREAKER_RESET_TIMEOUT = float(os.getenv('TMDB_BREAKER_RESET_TIMEOUT', 30))
+
+# Total seconds a search request may spend on TMDB calls before serving local results
+TMDB_SEARCH_LATENCY_BUDGET = float(os.getenv('TMDB_SEARCH_LATENCY_BUDGET', 3.0))
+# Threads running the TMDB half of searches alongside the local lookup
+TMDB_SEARCH_WORKERS = int(os.getenv('TMDB_SEARCH_WORKERS', 8))
+
+# Cross-process sync claims: how long a claim is valid and how long others wait on it
+TMDB_SYNC_CLAIM_TTL = 60
+TMDB_SYNC_CLAIM_WAIT = 15
+
+# How far back the first ratings refresh reads the TMDB changes feed (later runs
+# continue from the stored watermark)
+TMDB_CHANGES_INITIAL_LOOKBACK_DAYS = int(os.getenv('TMDB_CHANGES_INITIAL_LOOKBACK_DAYS', 1))
+
+# Write transactions held at least this long are logged (they block other SQLite writers)
+SLOW_WRITE_TRANSACTION_SECONDS = float(os.getenv('SLOW_WRITE_TRANSACTION_SECONDS', 0.5))
+
+# Fuzzy title search (trigram index): matches below MIN_SIMILARITY are dropped, and
+# a local match of at least SERVE_SIMILARITY answers a search without calling TMDB
+SEARCH_FUZZY_MIN_SIMILARITY = float(os.getenv('SEARCH_FUZZY_MIN_SIMILARITY', 0.3))
+SEARCH_FUZZY_SERVE_SIMILARITY = float(os.getenv('SEARCH_FUZZY_SERVE_SIMILARITY', 0.45))
+SEARCH_FUZZY_CANDIDATES = 50
+# Rough cap on index postings a fuzzy lookup reads (its rarest trigrams are used first)
+SEARCH_FUZZY_MAX_POSTINGS = int(os.getenv('SEARCH_FUZZY_MAX_POSTINGS', 20000))
+
+# Cursor-paginated search: default and largest page size, how long a cursor stays
+# valid, how many TMDB result pages one request may fetch to fill a page, and how
+# many local matches a search's relevance snapshot keeps (later pages read it)
+SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', 10))
+SEARCH_MAX_PAGE_SIZE = 50
+SEARCH_CURSOR_MAX_AGE = 60 * 60
+SEARCH_MAX_TMDB_PAGES_PER_REQUEST = 2
+SEARCH_SNAPSHOT_MAX_RESULTS = int(os.getenv('SEARCH_SNAPSHOT_MAX_RESULTS', 1000))
+
+# Search response cache, invalidated by a catalog version bumped on every movie write;
+# responses without any local or TMDB result expire sooner (negative caching)
+SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'True') == 'True'
+SEARCH_CACHE_ALIAS = os.getenv('SEARCH_CACHE_ALIAS', 'default')
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 5 * 60))
+SEARCH_CACHE_NEGATIVE_TTL = int(os.getenv('SEARCH_CACHE_NEGATIVE_TTL', 60))
+
+# Facet counts of the movie list (?facets=): cache of the unfiltered catalog's
+# counts (versioned like the search cache) and how many companies are listed
+FACET_CACHE_ALIAS = os.getenv('FACET_CACHE_ALIAS', 'default')
+FACET_CACHE_TTL = int(os.getenv('FACET_CACHE_TTL', 24 * 60 * 60))
+FACET_TOP_COMPANIES = 20
+
+# Title autocomplete (in-process prefix index): keys per title (its full title and
+# word-start suffixes), largest page, and how often changes made by other processes
+# are polled / deletions reconciled
+AUTOCOMPLETE_MAX_KEYS_PER_TITLE = 4
+AUTOCOMPLETE_MAX_LIMIT = 20
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', 5))
+AUTOCOMPLETE_RECONCILE_SECONDS = float(os.getenv('AUTOCOMPLETE_RECONCILE_SECONDS', 300))
+
+# Optional single-writer queue (apps.movies.write_queue): sync and admin writes go
+# through one writer thread per process, group-committed under a host-wide file lock
+SQLITE_WRITE_QUEUE_ENABLED = os.getenv('SQLITE_WRITE_QUEUE_ENABLED', 'False') == 'True'
+SQLITE_WRITE_LOCK_PATH = os.getenv('SQLITE_WRITE_LOCK_PATH')  # defaults to <database>.write.lock
+SQLITE_WRITE_QUEUE_MAX_BATCH = int(os.getenv('SQLITE_WRITE_QUEUE_MAX_BATCH', 64))
+SQLITE_WRITE_QUEUE_GROUP_WINDOW = float(os.getenv('SQLITE_WRITE_QUEUE_GROUP_WINDOW', 0.005))
+SQLITE_WRITE_QUEUE_TIMEOUT = float(os.getenv('SQLITE_WRITE_QUEUE_TIMEOUT', 30))
+
+# Database-backed job queue (apps.movies.jobs), run with `manage.py run_workers`
+JOB_QUEUE_MAX_ATTEMPTS = int(os.getenv('JOB_QUEUE_MAX_ATTEMPTS', 5))
+JOB_QUEUE_RETRY_BACKOFF = float(os.getenv('JOB_QUEUE_RETRY_BACKOFF', 5))  # doubled per attempt
+JOB_QUEUE_RETRY_BACKOFF_MAX = float(os.getenv('JOB_QUEUE_RETRY_BACKOFF_MAX', 15 * 60))
+JOB_QUEUE_LEASE_SECONDS = int(os.getenv('JOB_QUEUE_LEASE_SECONDS', 5 * 60))
+JOB_QUEUE_POLL_INTERVAL = float(os.getenv('JOB_QUEUE_POLL_INTERVAL', 1.0))
+JOB_QUEUE_CLAIM_CANDIDATES = 5
+# Run TMDB syncs triggered by API requests on the job queue instead of inline.
+# Opt-in: queued syncs only run while `manage.py run_workers` is running
+TMDB_SYNC_IN_BACKGROUND = os.getenv('TMDB_SYNC_IN_BACKGROUND', 'False') == 'True'
+# Polling for search results synced in the background: token lifetime, longest
+# long-poll wait per request, and how often a long-poll re-checks
+SEARCH_SYNC_TOKEN_MAX_AGE = 60 * 60
+SEARCH_SYNC_MAX_WAIT = float(os.getenv('SEARCH_SYNC_MAX_WAIT', 20))
+SEARCH_SYNC_POLL_INTERVAL = 0.25
+
+# Max concurrent TMDB requests used to fan out a single movie sync
+TMDB_FETCH_WORKERS = int(os.getenv('TMDB_FETCH_WORKERS', 8))
 TMDB_IMAGE_BASE_URL = 'https://image.tmdb.org/t/p'
 TMDB_IMAGE_SIZES = {
     'poster': 'w500',
@@ -0,0 +1,126 @@
+import base64
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetOrPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination, or keyset pagination when the request passes
+    ?cursor= (empty for the first page).
+
+    Keyset pages continue after the sort key and primary key of the previous
+    page's last row, encoded in an opaque cursor, so deep pages cost the same
+    as the first and no COUNT query is made. Any ordering over the model's own
+    fields works; NULLs sort last in both directions and the primary key breaks
+    ties.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset)
+        fields = [self.get_field(queryset.model, name.lstrip('-')) for name in ordering]
+
+        queryset = queryset.order_by(*[
+            F(name.lstrip('-')).desc(nulls_last=True) if name.startswith('-') else F(name).asc(nulls_last=True)
+            for name in ordering
+        ])
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = queryset.filter(self.after(ordering, fields, self.decode_cursor(cursor, ordering, fields)))
+
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(ordering, page[-1]) if len(rows) > page_size else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_ordering(self, queryset):
+        """Sort fields of the queryset (model default if unordered), ending with the primary key"""
+        if queryset.query.extra_order_by:
+            raise ValidationError({
+                self.cursor_query_param: 'Keyset pagination needs an explicit ordering (e.g. ?ordering=title).'
+            })
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if not all(isinstance(name, str) for name in ordering):
+            raise ValidationError({self.cursor_query_param: 'Keyset pagination does not support this ordering.'})
+        pk_name = queryset.model._meta.pk.name
+        ordering = [name for name in ordering if name.lstrip('-') not in ('pk', pk_name)]
+        return ordering + [pk_name]
+
+    def get_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ValidationError({self.cursor_query_param: f'Keyset pagination cannot order by "{name}".'})
+
+    def after(self, ordering, fields, values):
+        """Filter matching rows sorted after ``values`` (NULLs last, one field after another)"""
+        condition = None
+        # Built from the last field (the unique primary key) outwards
+        for name, field, value in reversed(list(zip(ordering, fields, values))):
+            column = name.lstrip('-')
+            if value is None:
+                # Only NULLs follow a NULL
+                condition = Q(**{f'{column}__isnull': True}) & condition
+                continue
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            later = Q(**{f'{column}__{lookup}': value})
+            if field.null:
+                later |= Q(**{f'{column}__isnull': True})
+            condition = later if condition is None else later | (Q(**{column: value}) & condition)
+        return condition
+
+    def encode_cursor(self, ordering, row):
+        values = [self.encode_value(getattr(row, name.lstrip('-'))) for name in ordering]
+        data = json.dumps({'o': ordering, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def encode_value(value):
+        # Full precision: JSON encoders round datetimes to milliseconds
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, (uuid.UUID, Decimal)):
+            return str(value)
+        return value
+
+    def decode_cursor(self, cursor, ordering, fields):
+        """Sort key values of a cursor, checked against the current ordering"""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if data['o'] != ordering or len(data['v']) != len(fields):
+                raise ValueError
+            return [None if value is None else field.to_python(value) for field, value in zip(fields, data['v'])]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)